@@ -1,16 +1,70 @@
 from pubsub import pub
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Callable
+from ..core.dispatcher import AsyncDispatcher, get_dispatcher
+from ..core.coalescing import CoalescePolicy, Coalescer
+from ..core.transport import EventTransport, get_transport
+from ..core.usage_ledger import usage_scope
 
 class BaseAgent:
-    def __init__(self, name: str):
+    def __init__(
+        self,
+        name: str,
+        dispatcher: Optional[AsyncDispatcher] = None,
+        transport: Optional[EventTransport] = None
+    ):
         self.name = name
+        self.dispatcher = dispatcher or get_dispatcher()
+        self.transport = transport or get_transport()
+        # pypubsub only keeps weak references, so dispatch wrappers live here
+        self._listeners: List[Callable] = []
+        self._coalescers: List[Coalescer] = []
         self.log(f"{self.name} initialized")
 
     def log(self, message: str):
         print(f"[{self.name}] {message}")
 
-    def subscribe(self, event_type: str):
-        pub.subscribe(self.handle_event, event_type)
+    def subscribe(self, event_type: str, coalesce: Optional[CoalescePolicy] = None):
+        """Subscribe handle_event to a topic.
+
+        With a ``coalesce`` policy, handle_event receives one
+        ``{"type": event_type, "batch": [...]}`` event per flush interval
+        holding the buffered events instead of one call per event.
+        """
+        is_async = AsyncDispatcher.is_async_handler(self.handle_event)
+        if not is_async and coalesce is None:
+            pub.subscribe(self.handle_event, event_type)
+            return
+
+        def handle(event):
+            # LLM calls made while handling the event are charged to this agent
+            with usage_scope(agent=self.name):
+                if is_async:
+                    self.dispatcher.submit(
+                        event_type,
+                        self.handle_event,
+                        {"event": event},
+                        on_error=self._handle_dispatch_error
+                    )
+                else:
+                    self.handle_event(event)
+
+        if coalesce is not None:
+            coalescer = Coalescer(
+                coalesce,
+                lambda events: handle({"type": event_type, "batch": events})
+            )
+            self._coalescers.append(coalescer)
+            def listener(event):
+                coalescer.add(event)
+        else:
+            listener = handle
+        self._listeners.append(listener)
+        pub.subscribe(listener, event_type)
+
+    def flush_coalesced(self) -> None:
+        """Deliver events buffered by coalesced subscriptions now"""
+        for coalescer in self._coalescers:
+            coalescer.flush()
 
     def publish(self, topic: str, data: Dict[str, Any]) -> None:
         """Publish an event to the event bus"""
@@ -20,6 +74,21 @@ class BaseAgent:
             "data": data
         }
         pub.sendMessage(topic, event=event)
+        # Reach agents running in other worker processes, if any
+        try:
+            self.transport.send(topic, {"event": event})
+        except Exception as e:
+            self.log(f"Error forwarding {topic} to other processes: {str(e)}")
+
+    async def publish_and_wait(self, topic: str, data: Dict[str, Any]) -> List[Any]:
+        """Publish an event and wait for the async handlers it scheduled"""
+        with self.dispatcher.collect() as pending:
+            self.publish(topic, data)
+        return await self.dispatcher.wait_for(pending)
+
+    def _handle_dispatch_error(self, handler: Callable, error: Exception) -> None:
+        """Log errors raised by async event handlers"""
+        self.log(f"Error in async handler {getattr(handler, '__qualname__', handler)}: {str(error)}")
 
     def handle_event(self, event):
         """Override this method in derived agent classes"""
@@ -27,4 +96,4 @@ class BaseAgent:
 
     def execute_task(self, task: Any):
         """Override this method in derived agent classes"""
-        raise NotImplementedError("execute_task must be implemented by derived classes") 
\ No newline at end of file
+        raise NotImplementedError("execute_task must be implemented by derived classes")
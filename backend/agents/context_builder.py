@@ -0,0 +1,151 @@
+from typing import Dict, Any, Optional, List, Tuple
+import json
+from ..core.token_counter import TokenCounter, get_token_counter
+
+# Project summary fields every feature prompt needs, most important first
+SUMMARY_FIELDS = ("title", "description", "goals", "target_users", "requirements", "constraints")
+
+# Analysis fields that apply to every feature
+ANALYSIS_FIELDS = ("constraints", "technical_requirements", "integration_points")
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+class FeatureContextBuilder:
+    """Builds the slice of project context a feature prompt needs.
+
+    Instead of the whole ``ProjectContext.to_dict()``, a feature gets the
+    project summary, the status and definition of the features it depends
+    on, its own validation feedback, project-wide analysis constraints and
+    a count of features by status. Sections are added in that order of
+    priority until ``max_tokens`` is reached, so the prompt stays the same
+    size however many features the project has. Contexts that are not a
+    ProjectContext are passed through under the same budget.
+    """
+    def __init__(self, max_tokens: int = 1500, counter: Optional[TokenCounter] = None):
+        self.max_tokens = max_tokens
+        self.counter = counter or get_token_counter()
+
+    def _tokens(self, value: Any) -> int:
+        return self.counter.count_text(_dumps(value))
+
+    def build(self, feature: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the context to show the model for ``feature``"""
+        if "original_summary" not in context:
+            sections = list(context.items())
+        else:
+            sections = self._sections(feature, context)
+
+        result: Dict[str, Any] = {}
+        used = 2  # The enclosing braces
+        for key, value in sections:
+            remaining = self.max_tokens - used - self._tokens(key) - 1
+            if remaining <= 0:
+                break
+            fitted = self._fit(value, remaining)
+            if fitted is None:
+                continue
+            result[key] = fitted
+            # Without the braces, plus the separating comma
+            used += self._tokens({key: fitted}) - 1
+        return result
+
+    def _sections(self, feature: Dict[str, Any], context: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """Relevant pieces of a ProjectContext, most important first"""
+        name = feature.get("name", "")
+        summary = context.get("original_summary") or {}
+        analysis = context.get("analysis") or {}
+        statuses = context.get("features_status") or {}
+        feedback = context.get("validation_feedback") or {}
+
+        sections: List[Tuple[str, Any]] = []
+        project = {field: summary[field] for field in SUMMARY_FIELDS if summary.get(field)}
+        if project:
+            sections.append(("project", project))
+
+        dependencies = self._dependencies(feature, analysis, statuses)
+        if dependencies:
+            sections.append(("dependencies", dependencies))
+
+        if feedback.get(name):
+            sections.append(("validation_feedback", feedback[name]))
+
+        for field in ANALYSIS_FIELDS:
+            if analysis.get(field):
+                sections.append((field, analysis[field]))
+
+        if statuses:
+            counts: Dict[str, int] = {}
+            for status in statuses.values():
+                counts[status] = counts.get(status, 0) + 1
+            sections.append(("feature_counts", counts))
+        return sections
+
+    def _dependencies(
+        self,
+        feature: Dict[str, Any],
+        analysis: Dict[str, Any],
+        statuses: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        """Status and definition of the project features this one depends on.
+
+        A feature that does not list its dependencies, such as one passed back
+        for revision, uses those of its definition in the analysis.
+        """
+        definitions = {
+            str(other.get("name", "")).lower(): other
+            for other in analysis.get("core_features") or []
+            if isinstance(other, dict)
+        }
+        declared = feature.get("dependencies")
+        if declared is None:
+            declared = definitions.get(str(feature.get("name", "")).lower(), {}).get("dependencies")
+        wanted = {str(name).lower() for name in declared or []}
+        if not wanted:
+            return []
+        dependencies = []
+        for name, status in statuses.items():
+            if name.lower() in wanted:
+                entry = {"name": name, "status": status}
+                definition = definitions.get(name.lower())
+                if definition and definition.get("description"):
+                    entry["description"] = definition["description"]
+                dependencies.append(entry)
+        return dependencies
+
+    def _fit(self, value: Any, budget: int) -> Optional[Any]:
+        """Shrink a value to ``budget`` tokens: whole, a prefix of a list or a cut string"""
+        if self._tokens(value) <= budget:
+            return value
+        if isinstance(value, str):
+            # Cut in proportion to the overshoot, then tighten
+            cut = value[:max(0, len(value) * budget // max(1, self._tokens(value)))]
+            while cut and self._tokens(cut + "...") > budget:
+                cut = cut[:int(len(cut) * 0.9)]
+            return cut + "..." if cut else None
+        if isinstance(value, list):
+            items: List[Any] = []
+            used = 2
+            for item in value:
+                fitted = self._fit(item, budget - used - 1)
+                if fitted is None:
+                    break
+                items.append(fitted)
+                used += self._tokens(fitted) + 1
+                if fitted is not item:
+                    break
+            return items or None
+        if isinstance(value, dict):
+            fitted_dict: Dict[str, Any] = {}
+            used = 2
+            for key, item in value.items():
+                remaining = budget - used - self._tokens(key) - 1
+                fitted = self._fit(item, remaining) if remaining > 0 else None
+                if fitted is None:
+                    break
+                fitted_dict[key] = fitted
+                used += self._tokens({key: fitted}) - 1
+                if fitted is not item:
+                    break
+            return fitted_dict or None
+        return None
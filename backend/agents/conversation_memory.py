@@ -0,0 +1,153 @@
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Sequence, Set
+from collections import deque
+import asyncio
+import re
+from ..core.token_counter import TokenCounter, TOKENS_PER_MESSAGE, get_token_counter
+
+Message = Dict[str, str]
+# Folds new messages into the previous summary, returning the new summary
+Summarizer = Callable[[str, List[Message]], Awaitable[Optional[str]]]
+
+class TopicTracker:
+    """Tracks which topics a conversation has covered, one message at a time.
+
+    Every keyword of every topic is compiled into a single alternation, so
+    each message is scanned once however many keywords there are, and
+    messages already seen are never scanned again.
+    """
+    def __init__(self, topics: Dict[str, Sequence[str]]):
+        self.topics = {topic: tuple(keywords) for topic, keywords in topics.items()}
+        self._topic_for = {
+            keyword.lower(): topic
+            for topic, keywords in self.topics.items()
+            for keyword in keywords
+        }
+        # Longest first, so a keyword is never shadowed by its own prefix
+        self._pattern = re.compile(
+            "|".join(re.escape(keyword) for keyword in sorted(self._topic_for, key=len, reverse=True)),
+            re.IGNORECASE
+        )
+        self.covered: Set[str] = set()
+
+    def update(self, text: str) -> Set[str]:
+        """Scan a message and return the topics it covered for the first time"""
+        if self.is_complete():
+            return set()
+        found = {self._topic_for[match.lower()] for match in self._pattern.findall(text)}
+        new = found - self.covered
+        self.covered |= new
+        return new
+
+    @property
+    def missing(self) -> Set[str]:
+        return set(self.topics) - self.covered
+
+    def is_complete(self) -> bool:
+        return len(self.covered) == len(self.topics)
+
+class ConversationMemory:
+    """Recent turns within a token budget plus a rolling summary of older ones.
+
+    Messages pushed out of the window are folded into the summary by
+    ``summarize`` in a background task. Until that finishes they stay in
+    the prompt, so nothing is lost if a refresh is slow or fails; a failed
+    refresh is retried the next time the window overflows.
+    """
+    def __init__(
+        self,
+        summarize: Optional[Summarizer] = None,
+        max_window_tokens: int = 2000,
+        min_window_messages: int = 2,
+        counter: Optional[TokenCounter] = None
+    ):
+        self.summarize = summarize
+        self.max_window_tokens = max_window_tokens
+        self.min_window_messages = min_window_messages
+        self.counter = counter or get_token_counter()
+        # Every message, for callers that need the full transcript
+        self.history: List[Message] = []
+        self.summary = ""
+        self._window: deque = deque()
+        self._window_tokens = 0
+        self._unsummarized: List[Message] = []
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+
+    def _tokens(self, message: Message) -> int:
+        return self.counter.count_text(message["content"]) + TOKENS_PER_MESSAGE
+
+    def add(self, role: str, content: str) -> Message:
+        """Append a message, moving the oldest out of the window if over budget"""
+        message = {"role": role, "content": content}
+        self.history.append(message)
+        tokens = self._tokens(message)
+        self._window.append((message, tokens))
+        self._window_tokens += tokens
+        while self._window_tokens > self.max_window_tokens and len(self._window) > self.min_window_messages:
+            old, old_tokens = self._window.popleft()
+            self._window_tokens -= old_tokens
+            self._unsummarized.append(old)
+        if self._unsummarized:
+            self._schedule_refresh()
+        return message
+
+    def _schedule_refresh(self) -> None:
+        if self.summarize is None or (self._refresh_task is not None and not self._refresh_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refresh_task = loop.create_task(self.refresh())
+
+    async def refresh(self) -> None:
+        """Fold messages that left the window into the summary"""
+        if self.summarize is None or not self._unsummarized:
+            return
+        batch = list(self._unsummarized)
+        summary = await self.summarize(self.summary, batch)
+        if summary is None:
+            return
+        self.summary = summary
+        # Messages evicted while the summary was being written wait for the next refresh
+        del self._unsummarized[:len(batch)]
+        self.refreshes += 1
+        if self._unsummarized:
+            await self.refresh()
+
+    async def wait_for_refresh(self) -> None:
+        """Wait for a background summary refresh, if one is running"""
+        if self._refresh_task is not None:
+            await asyncio.shield(self._refresh_task)
+
+    def window(self) -> List[Message]:
+        """Messages not yet covered by the summary, oldest first"""
+        return self._unsummarized + [message for message, _ in self._window]
+
+    def messages(self, system_prompt: Optional[str] = None) -> List[Message]:
+        """Prompt messages: instructions, the summary so far and the recent window"""
+        messages: List[Message] = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the conversation so far:\n{self.summary}"
+            })
+        return messages + self.window()
+
+    def transcript(self) -> str:
+        """The summary and the recent window as plain text"""
+        lines = [f"Summary: {self.summary}"] if self.summary else []
+        lines.extend(f"{message['role']}: {message['content']}" for message in self.window())
+        return "\n".join(lines)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "messages": len(self.history),
+            "window_messages": len(self._window),
+            "window_tokens": self._window_tokens,
+            "unsummarized": len(self._unsummarized),
+            "summary_tokens": self.counter.count_text(self.summary) if self.summary else 0,
+            "refreshes": self.refreshes
+        }
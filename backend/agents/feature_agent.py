@@ -1,6 +1,8 @@
 from typing import Dict, Any
 from .base_agent import BaseAgent
 from ..services.llm_service import LLMService
+from .context_builder import FeatureContextBuilder
+from ..core.prompt_registry import PromptTemplate, get_prompt_registry
 import json
 
 # Define feature analysis schema
@@ -26,10 +28,18 @@ FEATURE_SCHEMA = {
     "required": ["name", "description", "requirements", "priority"]
 }
 
+# Instructions first, so every feature analysis shares the same prompt prefix
+FEATURE_ANALYSIS_PROMPT = get_prompt_registry().register(PromptTemplate("feature.analysis", [
+    ("system", "Analyze this feature in the context of its project."),
+    ("user", "Feature: {feature}\nContext: {context}")
+]))
+
 class FeatureAgent(BaseAgent):
-    def __init__(self, llm_service=None):
+    def __init__(self, llm_service=None, context_builder=None):
         super().__init__("FeatureAgent")
         self.llm = llm_service or LLMService()
+        # Prompts get only the context relevant to the feature, within a token budget
+        self.context_builder = context_builder or FeatureContextBuilder()
 
     async def handle_event(self, event: Dict[str, Any]) -> None:
         """Handle incoming feature requests"""
@@ -50,12 +60,11 @@ class FeatureAgent(BaseAgent):
     async def analyze_feature(self, feature: Dict[str, Any], context: Dict[str, Any]):
         """Analyze and expand a feature definition"""
         try:
+            relevant_context = self.context_builder.build(feature, context)
             response = await self.llm.structured_output(
-                messages=[{
-                    "role": "user",
-                    "content": f"Analyze this feature in context:\nFeature: {json.dumps(feature)}\nContext: {json.dumps(context)}"
-                }],
-                output_schema=FEATURE_SCHEMA
+                messages=FEATURE_ANALYSIS_PROMPT.render(feature=feature, context=relevant_context),
+                output_schema=FEATURE_SCHEMA,
+                call_class="feature"
             )
             
             if response["status"] == "success":
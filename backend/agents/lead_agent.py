@@ -1,13 +1,23 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from contextlib import aclosing
 from .base_agent import BaseAgent
 from dataclasses import dataclass
 from ..services.llm_service import LLMService
 from .memory_agent import MemoryAgent
+from ..core.deadline import deadline_budget
+from ..core.usage_ledger import current_usage_scope, usage_scope
+from ..core.prompt_registry import PromptTemplate, get_prompt_registry
 import json
+import uuid
 import yaml
 from pathlib import Path
 from schemas.project_schemas import FEATURE_ANALYSIS_SCHEMA, validate_project_summary
 
+FEATURE_BREAKDOWN_PROMPT = get_prompt_registry().register(PromptTemplate("lead.feature_breakdown", [
+    ("system", "Break down the project into discrete features for development."),
+    ("user", "Project Summary:\n{summary}")
+]))
+
 @dataclass
 class ProjectContext:
     summary: Dict[str, Any]
@@ -16,6 +26,7 @@ class ProjectContext:
     documentation_path: str = ".notes"
     features_status: Dict[str, str] = None  # Track status of each feature
     validation_feedback: Dict[str, List[str]] = None  # Store validation feedback
+    delegation_finished: bool = False  # Every feature of the analysis has been delegated
 
     def __post_init__(self):
         self.features_status = {}
@@ -28,15 +39,29 @@ class ProjectContext:
             "status": self.status,
             "documentation_path": self.documentation_path,
             "features_status": self.features_status,
-            "validation_feedback": self.validation_feedback
+            "validation_feedback": self.validation_feedback,
+            "delegation_finished": self.delegation_finished
         }
 
 class LeadAgent(BaseAgent):
-    def __init__(self, llm_service=None, settings=None):
+    def __init__(
+        self,
+        llm_service=None,
+        settings=None,
+        stream_features: bool = False,
+        deadline_s: Optional[float] = None,
+        correlation_id: Optional[str] = None
+    ):
         super().__init__("LeadAgent")
         self.llm = llm_service or LLMService()
         self.project_context = None
         self.settings = settings
+        # Delegate each feature as soon as the model finishes writing it
+        self.stream_features = stream_features
+        # Time budget for one pipeline request, shared by every agent it reaches
+        self.deadline_s = deadline_s
+        # Run the LLM usage of this project is recorded under
+        self.correlation_id = correlation_id
         
         # Define expected documentation structure
         self.documentation_structure = {
@@ -66,23 +91,31 @@ class LeadAgent(BaseAgent):
 
     async def initialize_from_summary(self, project_summary: Dict[str, Any]):
         """Initialize project from consultant's summary and begin feature development process"""
+        # Feature agents handling the delegated features inherit the deadline and usage scope
+        if self.correlation_id is None:
+            scope = current_usage_scope()
+            self.correlation_id = scope.correlation_id if scope and scope.correlation_id else str(uuid.uuid4())
+        with deadline_budget(self.deadline_s), usage_scope(self.correlation_id, agent=self.name):
+            return await self._initialize_from_summary(project_summary)
+
+    async def _initialize_from_summary(self, project_summary: Dict[str, Any]):
         try:
             self.project_context = ProjectContext(summary=project_summary)
             self.log("Initializing project from consultant summary")
             
+            messages = FEATURE_BREAKDOWN_PROMPT.render(summary=yaml.dump(project_summary))
+            if self.stream_features:
+                return await self._stream_feature_analysis(messages, project_summary)
+
             # Analyze project for feature breakdown
             features_response = await self.llm.structured_output(
-                messages=[{
-                    "role": "system",
-                    "content": "Break down the project into discrete features for development."
-                }, {
-                    "role": "user",
-                    "content": f"Project Summary:\n{yaml.dump(project_summary)}"
-                }],
-                output_schema=FEATURE_ANALYSIS_SCHEMA
+                messages=messages,
+                output_schema=FEATURE_ANALYSIS_SCHEMA,
+                call_class="analysis"
             )
             
             if features_response["status"] == "success":
+                self.project_context.analysis = features_response["data"]
                 features = features_response["data"]["core_features"]
                 
                 # Initialize feature tracking
@@ -96,6 +129,10 @@ class LeadAgent(BaseAgent):
                         "context": self.project_context.to_dict(),
                         "requirements": project_summary.get("requirements", {})
                     })
+                self.project_context.delegation_finished = True
+                # Handlers run synchronously may already have validated every feature
+                if self._all_features_complete():
+                    await self._generate_documentation()
                 
                 self.log(f"Delegated {len(features)} features to feature agents")
                 return {
@@ -112,6 +149,63 @@ class LeadAgent(BaseAgent):
             self.log(f"Error in initialize_from_summary: {str(e)}")
             return {"status": "error", "error": str(e)}
 
+    async def _stream_feature_analysis(
+        self,
+        messages: List[Dict[str, str]],
+        project_summary: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Delegate each core feature as soon as it is streamed, before the analysis finishes"""
+        delegated = 0
+        streamed: List[Dict[str, Any]] = []
+        # Closing the stream on every exit path releases the HTTP response
+        async with aclosing(self.llm.structured_output_stream(
+            messages=messages,
+            output_schema=FEATURE_ANALYSIS_SCHEMA,
+            item_paths=[("core_features",)],
+            call_class="analysis"
+        )) as stream:
+            async for event in stream:
+                if event["type"] == "item":
+                    feature = event["data"]
+                    name = feature.get("name") if isinstance(feature, dict) else None
+                    if not name:
+                        self.log(f"Skipping streamed feature without a name: {feature!r}")
+                        continue
+                    self.project_context.features_status[name] = "assigned"
+                    # The analysis so far, so a feature sees the definitions of
+                    # the earlier features it depends on
+                    streamed.append(feature)
+                    self.project_context.analysis = {"core_features": list(streamed)}
+                    self.publish("feature_request", {
+                        "feature": feature,
+                        "context": self.project_context.to_dict(),
+                        "requirements": project_summary.get("requirements", {})
+                    })
+                    delegated += 1
+                elif event["type"] == "complete":
+                    self.project_context.analysis = event["data"]
+                    self.project_context.delegation_finished = True
+                    # Features may all have been validated while the analysis was streaming
+                    if self._all_features_complete():
+                        await self._generate_documentation()
+                elif event["type"] == "error":
+                    # Features already delegated belong to an analysis that never finished
+                    cancelled = list(self.project_context.features_status)
+                    for name in cancelled:
+                        self.project_context.features_status[name] = "cancelled"
+                    return {
+                        "status": "analysis_failed",
+                        "error": event.get("error", "Unknown error in feature analysis"),
+                        "feature_count": delegated,
+                        "cancelled_features": cancelled
+                    }
+
+        self.log(f"Delegated {delegated} features to feature agents")
+        return {
+            "status": "features_delegated",
+            "feature_count": delegated
+        }
+
     async def handle_event(self, event: Dict[str, Any]):
         """Handle various events in the feature development pipeline"""
         event_type = event.get("type")
@@ -127,9 +221,14 @@ class LeadAgent(BaseAgent):
         if self._all_features_complete():
             await self._generate_documentation()
 
+    def _is_cancelled(self, feature_name: str) -> bool:
+        return self.project_context.features_status.get(feature_name) == "cancelled"
+
     async def _handle_feature_completion(self, data: Dict[str, Any]):
         """Process a completed feature from a feature agent"""
         feature_name = data["feature"]["name"]
+        if self._is_cancelled(feature_name):
+            return
         self.project_context.features_status[feature_name] = "completed"
         
         # Request validation
@@ -141,6 +240,8 @@ class LeadAgent(BaseAgent):
     async def _handle_validation_result(self, data: Dict[str, Any]):
         """Process validation results for a feature"""
         feature_name = data["feature"]["name"]
+        if self._is_cancelled(feature_name):
+            return
         if data["status"] == "valid":
             self.project_context.features_status[feature_name] = "validated"
         else:
@@ -179,6 +280,9 @@ class LeadAgent(BaseAgent):
             })
 
     def _all_features_complete(self) -> bool:
-        """Check if all features are validated"""
+        """Check if every feature of a finished delegation is validated"""
+        context = self.project_context
+        if context is None or not context.delegation_finished or not context.features_status:
+            return False
         return all(status == "validated" 
-                  for status in self.project_context.features_status.values()) 
\ No newline at end of file
+                  for status in context.features_status.values()) 
\ No newline at end of file
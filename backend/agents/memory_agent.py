@@ -4,13 +4,21 @@ from typing import Dict, Any, List, Optional
 import faiss
 import numpy as np
 from .base_agent import BaseAgent
+from ..core.embedding_engine import HashedNgramEmbedder
 import os
 
 class MemoryAgent(BaseAgent):
-    def __init__(self, settings):
+    def __init__(self, settings, embedder=None, embedding_service=None):
         super().__init__("MemoryAgent")
         self.vector_dim = settings.VECTOR_DIM
         self.vector_db = faiss.IndexFlatL2(self.vector_dim)
+        # Local embeddings by default; vectors are unit length, so L2 ranks like cosine
+        self.embedder = embedder or HashedNgramEmbedder(self.vector_dim)
+        # Texts of the indexed vectors the local embedder made, by index id, for re-embedding
+        self._local_texts: Dict[int, str] = {}
+        # Optional service with generate_embeddings (e.g. core LLMService) for embed_many_async;
+        # its model's dimension must match VECTOR_DIM
+        self.embedding_service = embedding_service
         self.sql_db = self._initialize_database(settings.SQLITE_DB_PATH)
         
         # Subscribe to memory update events
@@ -178,15 +186,17 @@ class MemoryAgent(BaseAgent):
                 })
                 # Event bus notification is already handled in store method
 
-    def store(self, data: Dict[str, Any]) -> None:
-        """Store data in memory"""
+    def store(self, data: Dict[str, Any], embedding: Optional[np.ndarray] = None) -> None:
+        """Store data in memory, using ``embedding`` for research text if already computed"""
         cursor = self.sql_db.cursor()
         
         if 'type' in data and data['type'] == 'research':
             # Handle research data
             if 'text' in data:
-                embedding = self._generate_embedding(data['text'])
-                self.vector_db.add(np.array([embedding]).astype('float32'))
+                if embedding is None:
+                    embedding = self.embedder.embed(data['text'])
+                    self._local_texts[self.vector_db.ntotal] = data['text']
+                self.vector_db.add(self._as_vectors([embedding], 1))
             cursor.execute(
                 "INSERT INTO features (name, description, status) VALUES (?, ?, ?)",
                 (data.get('name', ''), data.get('text', ''), data.get('status', 'active'))
@@ -215,19 +225,50 @@ class MemoryAgent(BaseAgent):
             "data": data
         })
 
+    def warm_up(self, texts: List[str]) -> None:
+        """Learn which n-grams are common from a corpus, then fix the local embedder's weights.
+
+        Stored vectors the local embedder made are re-embedded with the new
+        weights, so they stay comparable with queries embedded from now on.
+        """
+        self.embedder.observe(texts)
+        self.embedder.freeze()
+        if not self._local_texts:
+            return
+        vectors = self.vector_db.reconstruct_n(0, self.vector_db.ntotal)
+        ids = list(self._local_texts)
+        vectors[ids] = self.embedder.embed_many([self._local_texts[i] for i in ids])
+        self.vector_db.reset()
+        self.vector_db.add(vectors)
+
+    def _as_vectors(self, embeddings: Any, count: int) -> np.ndarray:
+        """``(count, vector_dim)`` float32 array, or ValueError for vectors of another dimension"""
+        vectors = np.asarray(embeddings, dtype='float32')
+        if vectors.shape != (count, self.vector_dim):
+            raise ValueError(
+                f"Expected {count} embeddings of dimension {self.vector_dim} (VECTOR_DIM), got shape {vectors.shape}; "
+                "VECTOR_DIM must match the embedding model, e.g. 1536 for text-embedding-ada-002"
+            )
+        return vectors
+
     def _generate_embedding(self, text: str) -> np.ndarray:
-        # TODO: Replace with actual embedding model
-        # This is a temporary implementation for testing
-        padding = [0] * self.vector_dim
-        for i, char in enumerate(text[:self.vector_dim]):
-            padding[i] = float(ord(char)) / 255.0
-        return np.array(padding, dtype='float32')
-
-    def search_similar(self, query: str, k: int = 5):
-        query_embedding = self._generate_embedding(query)
-        distances, indices = self.vector_db.search(
-            np.array([query_embedding]).astype('float32'), k
-        )
+        return self.embedder.embed(text)
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts with the local embedder"""
+        return self.embedder.embed_many(texts)
+
+    async def embed_many_async(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts through the embedding service if one is set, else locally"""
+        if self.embedding_service is None:
+            return self.embed_many(texts)
+        embeddings = await self.embedding_service.generate_embeddings(texts)
+        return self._as_vectors(embeddings, len(texts))
+
+    def search_similar(self, query: str, k: int = 5, embedding: Optional[np.ndarray] = None):
+        """Find the k stored texts nearest the query, using ``embedding`` if already computed"""
+        query_embedding = self._generate_embedding(query) if embedding is None else embedding
+        distances, indices = self.vector_db.search(self._as_vectors([query_embedding], 1), k)
         return distances, indices
 
     def __del__(self):
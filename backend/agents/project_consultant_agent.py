@@ -1,14 +1,40 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncGenerator
+from contextlib import aclosing
 from .base_agent import BaseAgent
-from services.llm_service import LLMService
+from ..services.llm_service import LLMService
+from .conversation_memory import ConversationMemory, TopicTracker
+from ..core.prompt_registry import PromptTemplate, get_prompt_registry
 from schemas.project_schemas import PROJECT_SUMMARY_SCHEMA, validate_project_summary
 
+# Topics that must come up before a summary is attempted, with the words that signal them
+REQUIRED_TOPICS = {
+    "problem": ("problem",),
+    "users": ("users",),
+    "goals": ("goals",),
+    "features": ("features",)
+}
+
+SUMMARY_UPDATE_PROMPT = get_prompt_registry().register(PromptTemplate("consultant.summary_update", [
+    ("system", """Update the running summary of a product consultation.
+    Keep every fact about the problem, users, goals, features and constraints. Be concise."""),
+    ("user", "Current summary:\n{summary}\n\nNew messages:\n{transcript}")
+]))
+
+PROJECT_SUMMARY_PROMPT = get_prompt_registry().register(PromptTemplate("consultant.project_summary", [
+    ("system", """Based on the conversation, generate a structured project summary.
+    Extract key information and organize it into a clear, structured format."""),
+    ("user", "Generate a structured summary from this conversation:\n{transcript}")
+]))
+
 class ProjectConsultantAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, llm_service=None, max_window_tokens: int = 2000):
         super().__init__("ProjectConsultantAgent")
-        self.conversation_history = []
         self.current_summary = None
-        self.llm = LLMService()
+        self.llm = llm_service or LLMService()
+        # Recent turns within a token budget; older turns live on in a rolling summary
+        self.memory = ConversationMemory(self._summarize_turns, max_window_tokens=max_window_tokens)
+        self.conversation_history = self.memory.history
+        self.topics = TopicTracker(REQUIRED_TOPICS)
         
         self.system_prompt = """You are an experienced product consultant helping users define their software projects. 
         Guide the conversation to understand:
@@ -22,14 +48,19 @@ class ProjectConsultantAgent(BaseAgent):
     async def process_message(self, message: str) -> Dict[str, Any]:
         """Process user message and guide the conversation"""
         try:
-            self.conversation_history.append({"role": "user", "content": message})
+            self.memory.add("user", message)
+            self.topics.update(message)
             
             if self._is_ready_for_summary():
                 return await self._generate_structured_summary()
             
-            response = await self.llm.chat_completion(self.conversation_history)
+            response = await self.llm.chat_completion(
+                self.memory.messages(self.system_prompt),
+                call_class="chat"
+            )
             if response["status"] == "success":
-                self.conversation_history.append({"role": "assistant", "content": response["content"]})
+                self.memory.add("assistant", response["content"])
+                self.topics.update(response["content"])
                 return {
                     "message": response["content"],
                     "status": "consulting"
@@ -46,28 +77,69 @@ class ProjectConsultantAgent(BaseAgent):
                 "status": "error"
             }
 
+    async def stream_message(self, message: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Process user message, yielding the reply as it is generated.
+
+        Yields ``{"type": "token", "content": ...}`` for each piece of the
+        reply, then ``{"type": "complete", ...}`` carrying what
+        process_message would return, or ``{"type": "error", ...}``. The
+        reply joins the history only once it is complete, so an abandoned
+        stream leaves no partial turn behind.
+        """
+        try:
+            self.memory.add("user", message)
+            self.topics.update(message)
+            
+            if self._is_ready_for_summary():
+                yield {"type": "complete", **await self._generate_structured_summary()}
+                return
+            
+            parts = []
+            async with aclosing(self.llm.chat_completion_stream(
+                self.memory.messages(self.system_prompt),
+                call_class="chat"
+            )) as stream:
+                async for text in stream:
+                    parts.append(text)
+                    yield {"type": "token", "content": text}
+            
+            reply = "".join(parts)
+            self.memory.add("assistant", reply)
+            self.topics.update(reply)
+            yield {
+                "type": "complete",
+                "message": reply,
+                "status": "consulting"
+            }
+        except Exception as e:
+            print(f"Error streaming message: {str(e)}")
+            yield {
+                "type": "error",
+                "message": f"Error: {str(e)}",
+                "status": "error"
+            }
+
     def _is_ready_for_summary(self) -> bool:
         """Check if we have enough information for a summary"""
-        required_topics = ["problem", "users", "goals", "features"]
-        conversation_text = " ".join(msg["content"].lower() 
-                                   for msg in self.conversation_history)
-        return all(topic in conversation_text for topic in required_topics)
+        return self.topics.is_complete()
+
+    async def _summarize_turns(self, summary: str, messages: List[Dict[str, str]]):
+        """Fold turns that left the memory window into the rolling summary"""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        response = await self.llm.chat_completion(
+            SUMMARY_UPDATE_PROMPT.render(summary=summary or "(none)", transcript=transcript),
+            call_class="chat"
+        )
+        if response["status"] == "success":
+            return response["content"]
+        self.log(f"Could not update conversation summary: {response.get('error')}")
+        return None
 
     async def _generate_structured_summary(self) -> Dict[str, Any]:
         """Generate structured summary from conversation"""
-        messages = [
-            {
-                "role": "system",
-                "content": """Based on the conversation, generate a structured project summary.
-                Extract key information and organize it into a clear, structured format."""
-            },
-            {
-                "role": "user",
-                "content": f"Generate a structured summary from this conversation: {self.conversation_history}"
-            }
-        ]
+        messages = PROJECT_SUMMARY_PROMPT.render(transcript=self.memory.transcript())
 
-        response = await self.llm.structured_output(messages, PROJECT_SUMMARY_SCHEMA)
+        response = await self.llm.structured_output(messages, PROJECT_SUMMARY_SCHEMA, call_class="summary")
         if response["status"] == "success" and validate_project_summary(response["data"]):
             self.current_summary = response["data"]
             return {
@@ -1,26 +1,46 @@
 from fastapi import FastAPI, HTTPException
-from typing import Dict, List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
+from dataclasses import dataclass, field
+from datetime import datetime
+import asyncio
 import json
+import os
 from ..agents.lead_agent import LeadAgent
 from ..agents.research_agent import ResearchAgent
 from ..agents.feature_agent import FeatureAgent
 from ..agents.validation_agent import ValidationAgent
 from ..agents.memory_agent import MemoryAgent
-from ..events.event_bus import EventBus
+from ..agents.project_consultant_agent import ProjectConsultantAgent
+from ..core.usage_ledger import get_usage_ledger, usage_scope
+from ..core.session_store import SessionStore, DEFAULT_MAX_SESSIONS, DEFAULT_SESSION_TTL_S
+from config.settings import Settings
 
 app = FastAPI(title="AI PRD Generator")
 
-# Initialize event bus and agents
-event_bus = EventBus()
+# Initialize agents; they communicate over pubsub topics
+settings = Settings()
 agents = {
-    "lead": LeadAgent(event_bus),
-    "memory": MemoryAgent(event_bus),
-    "research": ResearchAgent(event_bus, api_key="YOUR_TAVILY_API_KEY"),
-    "feature": FeatureAgent(event_bus),
-    "validation": ValidationAgent(event_bus)
+    "lead": LeadAgent(),
+    "memory": MemoryAgent(settings),
+    "research": ResearchAgent(),
+    "feature": FeatureAgent(),
+    "validation": ValidationAgent()
 }
 
+@dataclass
+class ConsultationSession:
+    """One conversation's consultant, with a lock so its turns do not interleave"""
+    consultant: ProjectConsultantAgent
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+# Idle or least recently used conversations are dropped once the limits are reached
+consultations: SessionStore[ConsultationSession] = SessionStore(
+    max_sessions=int(os.getenv("CONSULTATION_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)),
+    ttl_s=float(os.getenv("CONSULTATION_SESSION_TTL_S", DEFAULT_SESSION_TTL_S))
+)
+
 # Pydantic models for request/response validation
 class ProjectInit(BaseModel):
     title: str
@@ -36,6 +56,13 @@ class ProjectProgress(BaseModel):
     features: List[Dict]
     validation_results: Optional[List[Dict]] = None
 
+class ConsultationMessage(BaseModel):
+    message: str
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.post("/api/init")
 async def initialize_project(project_data: ProjectInit):
     """Initialize PRD generation"""
@@ -57,6 +84,67 @@ async def submit_feedback(feedback: ProjectFeedback):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/consultation")
+async def create_consultation():
+    """Start a consultation and get the session id its messages are sent to"""
+    session_id = consultations.create(ConsultationSession(ProjectConsultantAgent()))
+    return {"session_id": session_id}
+
+@app.delete("/api/consultation/{session_id}")
+async def close_consultation(session_id: str):
+    """End a consultation and free its state"""
+    if not consultations.close(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown consultation session {session_id}")
+    return {"status": "closed"}
+
+@app.post("/api/consultation/{session_id}/stream")
+async def stream_consultation(session_id: str, body: ConsultationMessage):
+    """Stream the consultant's reply as Server-Sent Events.
+
+    Sends a ``token`` event for each piece of the reply as it arrives, then
+    a ``complete`` event with the full result, or an ``error`` event.
+    """
+    session = consultations.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired consultation session {session_id}")
+    consultant = session.consultant
+
+    async def events():
+        # The session id is the correlation id of the consultation's LLM usage
+        async with session.lock:
+            with usage_scope(session_id, agent=consultant.name):
+                async for event in consultant.stream_message(body.message):
+                    kind = event.pop("type")
+                    yield format_sse(kind, event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/usage")
+async def get_usage(limit: int = 10):
+    """Get the runs that used the most LLM tokens"""
+    ledger = get_usage_ledger()
+    return {"runs": ledger.top_runs(limit), "metrics": ledger.get_metrics()}
+
+@app.get("/api/usage/{correlation_id}")
+async def get_run_usage(correlation_id: str, group_by: Optional[str] = "call_class", records: bool = False):
+    """Get LLM usage of one run, broken down by comma separated ``group_by`` fields"""
+    ledger = get_usage_ledger()
+    if correlation_id not in ledger.runs():
+        raise HTTPException(status_code=404, detail=f"No usage recorded for {correlation_id}")
+    try:
+        fields = [field for field in (group_by or "").split(",") if field]
+        result = ledger.summary(correlation_id, group_by=fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if records:
+        result["records"] = ledger.records(correlation_id)
+    return result
+
 @app.get("/api/progress")
 async def get_progress():
     """Get current PRD generation progress"""
@@ -0,0 +1,147 @@
+from typing import Dict, Any, Optional, Tuple, AsyncIterator
+import asyncio
+import importlib.util
+import logging
+import os
+import httpx
+from openai import AsyncOpenAI
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 60.0
+
+def http2_available() -> bool:
+    """Whether the h2 package httpx needs for HTTP/2 is installed"""
+    return importlib.util.find_spec("h2") is not None
+
+class ClientRegistry:
+    """Hands out one pooled ``AsyncOpenAI`` client per API key and event loop.
+
+    Every client sits on an ``httpx.AsyncClient`` with the configured
+    connection limits and keep-alive, so concurrent calls from different
+    agents reuse warm connections instead of opening new ones. HTTP/2 is
+    used when requested and the ``h2`` package is installed.
+
+    Connections belong to the loop that opened them, so each running loop
+    gets its own clients. They are closed while the loop shuts down its
+    async generators, as ``asyncio.run`` does; clients of a loop closed
+    without that are dropped the next time a client is requested.
+    """
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = True,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and http2_available()
+        if http2 and not self.http2:
+            self.logger.info("h2 is not installed, LLM clients will use HTTP/1.1")
+        self.timeout = timeout
+        self._clients: Dict[Tuple[Optional[str], Optional[asyncio.AbstractEventLoop]], AsyncOpenAI] = {}
+        # Suspended async generators that close a loop's clients at its shutdown
+        self._shutdown_hooks: Dict[asyncio.AbstractEventLoop, AsyncIterator[None]] = {}
+
+    def _http_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=self.limits,
+            http2=self.http2,
+            timeout=self.timeout
+        )
+
+    def openai_client(self, api_key: Optional[str] = None) -> AsyncOpenAI:
+        """Get the shared client for an API key on the running loop.
+
+        The key defaults to ``OPENAI_API_KEY``. Outside a running loop the
+        client is shared by every caller without one.
+        """
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        client = self._clients.get((api_key, loop))
+        if client is None:
+            self._drop_closed_loops()
+            client = AsyncOpenAI(api_key=api_key, http_client=self._http_client())
+            self._clients[(api_key, loop)] = client
+            if loop is not None and loop not in self._shutdown_hooks:
+                self._watch_shutdown(loop)
+        return client
+
+    def _watch_shutdown(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Close the loop's clients when it shuts down its async generators"""
+        async def hook() -> AsyncIterator[None]:
+            try:
+                yield
+            finally:
+                await self._close_loop(loop)
+
+        async def start(generator: AsyncIterator[None]) -> None:
+            # Running to the first yield registers the generator with the loop
+            await generator.__anext__()
+
+        generator = hook()
+        self._shutdown_hooks[loop] = generator
+        loop.create_task(start(generator))
+
+    async def _close_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._shutdown_hooks.pop(loop, None)
+        keys = [key for key in self._clients if key[1] is loop]
+        for key in keys:
+            await self._clients.pop(key).close()
+
+    def _drop_closed_loops(self) -> None:
+        """Forget clients whose loop closed; their connections cannot be used or awaited"""
+        for key in [key for key in self._clients if key[1] is not None and key[1].is_closed()]:
+            del self._clients[key]
+        for loop in [loop for loop in self._shutdown_hooks if loop.is_closed()]:
+            del self._shutdown_hooks[loop]
+
+    async def aclose(self) -> None:
+        """Close the pooled connections usable from the running loop and forget every client"""
+        loop = asyncio.get_running_loop()
+        clients = [client for (_, client_loop), client in self._clients.items() if client_loop in (loop, None)]
+        self._clients.clear()
+        self._shutdown_hooks.clear()
+        for client in clients:
+            await client.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get pool configuration and the number of clients handed out"""
+        return {
+            "clients": len(self._clients),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "http2": self.http2
+        }
+
+_default_registry: Optional[ClientRegistry] = None
+
+def get_client_registry() -> ClientRegistry:
+    """Get the process-wide registry shared by every LLM service.
+
+    Pool settings come from ``LLM_MAX_CONNECTIONS``,
+    ``LLM_MAX_KEEPALIVE_CONNECTIONS``, ``LLM_KEEPALIVE_EXPIRY`` and
+    ``LLM_HTTP2`` (set to ``0`` to stay on HTTP/1.1).
+    """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ClientRegistry(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            max_keepalive_connections=int(
+                os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_MAX_KEEPALIVE_CONNECTIONS)
+            ),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY)),
+            http2=os.getenv("LLM_HTTP2", "1") != "0"
+        )
+    return _default_registry
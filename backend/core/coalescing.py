@@ -0,0 +1,153 @@
+from typing import Dict, Any, Optional, List, Callable, Hashable
+import asyncio
+import logging
+import threading
+import time
+
+class CoalescePolicy:
+    """Base policy: buffer events and deliver them as a list once per interval"""
+    def __init__(self, interval: float = 0.1, max_batch: Optional[int] = None):
+        self.interval = interval
+        self.max_batch = max_batch
+
+    def create_buffer(self) -> "CoalesceBuffer":
+        raise NotImplementedError("create_buffer must be implemented by policies")
+
+class BatchPerTick(CoalescePolicy):
+    """Deliver every event received during the interval, in arrival order"""
+    def create_buffer(self) -> "CoalesceBuffer":
+        return ListBuffer()
+
+class LatestByKey(CoalescePolicy):
+    """Deliver only the latest event per key received during the interval"""
+    def __init__(
+        self,
+        key_fn: Callable[[Any], Hashable],
+        interval: float = 0.1,
+        max_batch: Optional[int] = None
+    ):
+        super().__init__(interval, max_batch)
+        self.key_fn = key_fn
+
+    def create_buffer(self) -> "CoalesceBuffer":
+        return KeyedBuffer(self.key_fn)
+
+class CoalesceBuffer:
+    """Events pending delivery"""
+    def add(self, event: Any) -> None:
+        raise NotImplementedError
+
+    def drain(self) -> List[Any]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+class ListBuffer(CoalesceBuffer):
+    def __init__(self):
+        self._events: List[Any] = []
+
+    def add(self, event: Any) -> None:
+        self._events.append(event)
+
+    def drain(self) -> List[Any]:
+        events, self._events = self._events, []
+        return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+class KeyedBuffer(CoalesceBuffer):
+    def __init__(self, key_fn: Callable[[Any], Hashable]):
+        self.key_fn = key_fn
+        self._events: Dict[Hashable, Any] = {}
+
+    def add(self, event: Any) -> None:
+        key = self.key_fn(event)
+        # Move replaced keys to the end so delivery follows the latest update order
+        self._events.pop(key, None)
+        self._events[key] = event
+
+    def drain(self) -> List[Any]:
+        events = list(self._events.values())
+        self._events = {}
+        return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+class Coalescer:
+    """Buffers events for one listener and flushes them per interval.
+
+    The first event of a window schedules a flush ``policy.interval`` seconds
+    later on the running event loop. Without a running loop nothing is
+    scheduled: the first event added once the interval has passed flushes
+    the window on the adding thread, and ``close`` delivers what is left.
+    Reaching ``policy.max_batch`` flushes immediately.
+    """
+    def __init__(
+        self,
+        policy: CoalescePolicy,
+        deliver: Callable[[List[Any]], None],
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.policy = policy
+        self.deliver = deliver
+        self._clock = clock
+        self._buffer = policy.create_buffer()
+        self._lock = threading.Lock()
+        self._scheduled: Optional[asyncio.TimerHandle] = None
+        # When the window opened, if it has no scheduled flush
+        self._window_started: Optional[float] = None
+        self.received = 0
+        self.delivered_batches = 0
+
+    def add(self, event: Any) -> None:
+        """Buffer an event, scheduling or triggering a flush"""
+        with self._lock:
+            self._buffer.add(event)
+            self.received += 1
+            due = self.policy.max_batch is not None and len(self._buffer) >= self.policy.max_batch
+            if self._window_started is not None:
+                due = due or self._clock() - self._window_started >= self.policy.interval
+            elif not due and self._scheduled is None:
+                self._open_window()
+        if due:
+            self.flush()
+
+    def _open_window(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._window_started = self._clock()
+            return
+        self._scheduled = loop.call_later(self.policy.interval, self.flush)
+
+    def flush(self) -> None:
+        """Deliver buffered events now"""
+        with self._lock:
+            if self._scheduled is not None:
+                self._scheduled.cancel()
+                self._scheduled = None
+            self._window_started = None
+            events = self._buffer.drain()
+            if not events:
+                return
+            self.delivered_batches += 1
+        try:
+            self.deliver(events)
+        except Exception as e:
+            self.logger.error(f"Error delivering coalesced events: {e}", exc_info=True)
+
+    def close(self) -> None:
+        """Deliver the events still buffered"""
+        self.flush()
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Get received event and delivered batch counts"""
+        return {
+            "received": self.received,
+            "delivered_batches": self.delivered_batches,
+            "pending": len(self._buffer)
+        }
@@ -0,0 +1,77 @@
+from typing import Optional, Callable, Iterator
+from contextlib import contextmanager
+import contextvars
+import time
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call is attempted after its request's budget is spent"""
+    pass
+
+class Deadline:
+    """Point in time by which a whole pipeline request must finish"""
+    def __init__(self, budget_s: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.budget_s = budget_s
+        self.expires_at = clock() + budget_s
+
+    def remaining(self) -> float:
+        """Seconds left in the budget, never negative"""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """Timeout for the next call: ``default`` shrunk to what is left"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline budget of {self.budget_s}s is spent")
+        return remaining if default is None else min(default, remaining)
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "current_deadline", default=None
+)
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the request being served, if any"""
+    return _current_deadline.get()
+
+@contextmanager
+def use_deadline(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Serve the block under an existing deadline, e.g. one captured by another task"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+@contextmanager
+def deadline_budget(
+    budget_s: Optional[float],
+    clock: Callable[[], float] = time.monotonic
+) -> Iterator[Optional[Deadline]]:
+    """Give the block a budget of ``budget_s`` seconds.
+
+    A budget nested in a tighter one keeps the tighter deadline. ``None``
+    leaves the current deadline, if any, in place.
+    """
+    outer = _current_deadline.get()
+    if budget_s is None:
+        yield outer
+        return
+    deadline = Deadline(budget_s, clock)
+    if outer is not None and outer.expires_at <= deadline.expires_at:
+        deadline = outer
+    with use_deadline(deadline):
+        yield deadline
+
+def call_timeout(default: Optional[float] = None) -> Optional[float]:
+    """Timeout for a call made now: ``default`` capped by the current deadline.
+
+    Raises DeadlineExceeded if the current deadline has already passed.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return deadline.timeout(default)
@@ -0,0 +1,205 @@
+from typing import Dict, Any, Optional, List, Set, Callable, Awaitable
+import asyncio
+import contextvars
+import inspect
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from .deadline import Deadline, current_deadline, use_deadline
+from .usage_ledger import UsageScope, current_usage_scope, use_usage_scope
+
+# Futures created while a publish_and_wait call is collecting
+_pending_collector: contextvars.ContextVar[Optional[List[asyncio.Future]]] = contextvars.ContextVar(
+    "pending_collector", default=None
+)
+
+class DispatchQueueFull(Exception):
+    """Raised when a topic queue has no room for another handler invocation"""
+    pass
+
+@dataclass
+class DispatchItem:
+    """A single coroutine handler invocation waiting in a topic queue"""
+    handler: Callable[..., Awaitable[Any]]
+    kwargs: Dict[str, Any]
+    future: asyncio.Future
+    on_error: Optional[Callable[[Callable, Exception], None]] = None
+    # Deadline of the request that published the event
+    deadline: Optional[Deadline] = None
+    # Run and agent the handler's LLM usage is charged to
+    usage_scope: Optional[UsageScope] = None
+
+class TopicLane:
+    """Bounded queue plus an on-demand pool of workers for one topic"""
+    def __init__(self, topic: str, loop: asyncio.AbstractEventLoop, max_queue_size: int, max_workers: int):
+        self.topic = topic
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.max_workers = max_workers
+        self.workers: Set[asyncio.Task] = set()
+
+    def put(self, item: DispatchItem) -> None:
+        """Enqueue an item, spawning a worker while under the worker limit"""
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            raise DispatchQueueFull(
+                f"Dispatch queue for {self.topic} is full ({self.queue.maxsize} pending)"
+            )
+        if len(self.workers) < self.max_workers:
+            worker = self.loop.create_task(self._worker())
+            self.workers.add(worker)
+            worker.add_done_callback(self.workers.discard)
+
+    async def _worker(self) -> None:
+        """Run queued handlers until the queue is empty"""
+        # Handlers run by this worker must not feed an outer publish_and_wait
+        _pending_collector.set(None)
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                with use_deadline(item.deadline), use_usage_scope(item.usage_scope):
+                    result = await item.handler(**item.kwargs)
+                if not item.future.done():
+                    item.future.set_result(result)
+            except asyncio.CancelledError:
+                if not item.future.done():
+                    item.future.cancel()
+                raise
+            except Exception as e:
+                if item.on_error:
+                    item.on_error(item.handler, e)
+                if not item.future.done():
+                    item.future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    def cancel(self) -> None:
+        """Cancel all workers of this lane"""
+        for worker in list(self.workers):
+            worker.cancel()
+        self.workers.clear()
+
+class AsyncDispatcher:
+    """Schedules coroutine event handlers as asyncio tasks.
+
+    Each topic gets its own bounded queue drained by up to ``max_workers``
+    concurrent workers that exit once the queue is empty, so independent
+    listeners and repeated publishes to the same topic run in parallel instead
+    of one after another. When no event loop is running, handlers are run to
+    completion synchronously.
+    """
+    def __init__(self, max_queue_size: int = 1000, max_workers: int = 16):
+        self.logger = logging.getLogger(__name__)
+        self.max_queue_size = max_queue_size
+        self.max_workers = max_workers
+        self._lanes: Dict[str, TopicLane] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def is_async_handler(handler: Callable) -> bool:
+        """Check whether a handler must be awaited"""
+        return inspect.iscoroutinefunction(handler) or inspect.iscoroutinefunction(
+            getattr(handler, "__call__", None)
+        )
+
+    def _get_lane(self, topic: str, loop: asyncio.AbstractEventLoop) -> TopicLane:
+        """Get the lane for a topic, discarding lanes bound to a previous loop"""
+        if self._loop is not loop:
+            for lane in self._lanes.values():
+                if not lane.loop.is_closed():
+                    lane.loop.call_soon_threadsafe(lane.cancel)
+            self._lanes = {}
+            self._loop = loop
+        lane = self._lanes.get(topic)
+        if lane is None:
+            lane = TopicLane(topic, loop, self.max_queue_size, self.max_workers)
+            self._lanes[topic] = lane
+        return lane
+
+    def submit(
+        self,
+        topic: str,
+        handler: Callable[..., Awaitable[Any]],
+        kwargs: Dict[str, Any],
+        on_error: Optional[Callable[[Callable, Exception], None]] = None
+    ) -> Optional[asyncio.Future]:
+        """Schedule a coroutine handler for a topic.
+
+        Returns the future tracking the invocation, or None when the handler
+        was run synchronously because no event loop is running.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            try:
+                asyncio.run(handler(**kwargs))
+            except Exception as e:
+                if on_error:
+                    on_error(handler, e)
+                else:
+                    raise
+            return None
+
+        future = loop.create_future()
+        self._get_lane(topic, loop).put(
+            DispatchItem(handler, kwargs, future, on_error, current_deadline(), current_usage_scope())
+        )
+
+        collector = _pending_collector.get()
+        if collector is not None:
+            collector.append(future)
+        return future
+
+    @contextmanager
+    def collect(self):
+        """Collect futures for every handler scheduled inside the block"""
+        pending: List[asyncio.Future] = []
+        token = _pending_collector.set(pending)
+        try:
+            yield pending
+        finally:
+            _pending_collector.reset(token)
+
+    async def wait_for(self, pending: List[asyncio.Future]) -> List[Any]:
+        """Wait for collected handler invocations, returning results or exceptions"""
+        if not pending:
+            return []
+        return await asyncio.gather(*pending, return_exceptions=True)
+
+    async def drain(self) -> None:
+        """Wait until every queued handler has finished"""
+        for lane in list(self._lanes.values()):
+            await lane.queue.join()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and worker counts per topic"""
+        return {
+            topic: {
+                "queued": lane.queue.qsize(),
+                "workers": len(lane.workers)
+            }
+            for topic, lane in self._lanes.items()
+        }
+
+    def shutdown(self) -> None:
+        """Cancel all workers and drop queued handlers"""
+        for lane in self._lanes.values():
+            lane.cancel()
+        self._lanes = {}
+        self._loop = None
+
+_default_dispatcher: Optional[AsyncDispatcher] = None
+
+def get_dispatcher() -> AsyncDispatcher:
+    """Get the process-wide dispatcher shared by EventSystem and agents"""
+    global _default_dispatcher
+    if _default_dispatcher is None:
+        _default_dispatcher = AsyncDispatcher()
+    return _default_dispatcher
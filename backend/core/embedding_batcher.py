@@ -0,0 +1,152 @@
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import logging
+
+# Most inputs the embeddings endpoint accepts in one request
+MAX_EMBEDDING_BATCH = 2048
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+class EmbeddingBatcher:
+    """Gathers texts from concurrent callers into shared embedding requests.
+
+    Texts submitted within ``max_wait_ms`` of the first pending text are
+    sent in one request of at most ``max_batch_size`` inputs, and each
+    vector is routed back to the caller that asked for it. Vectors are
+    cached by a hash of the text, so repeated texts are never sent again,
+    and identical texts pending in the same window are sent once.
+    """
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        max_batch_size: int = MAX_EMBEDDING_BATCH,
+        max_wait_ms: float = 5.0,
+        cache_size: int = 10000
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        # Pending texts in arrival order, keyed by hash
+        self._pending: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: set = set()
+        self.requested = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.texts_sent = 0
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    async def embed(self, text: str) -> List[float]:
+        """Get the embedding of one text"""
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for texts, in order"""
+        return (await self.embed_many_with_misses(texts))[0]
+
+    async def embed_many_with_misses(self, texts: List[str]) -> Tuple[List[List[float]], List[str]]:
+        """Get embeddings for texts, in order, and the texts this call sent to be embedded.
+
+        Texts answered from the cache or already pending for another caller
+        are not among the misses.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures from another loop cannot be awaited here
+            self._pending.clear()
+            self._flush_handle = None
+            self._loop = loop
+
+        results: List[Any] = []
+        misses: List[str] = []
+        for text in texts:
+            self.requested += 1
+            key = self._key(text)
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                results.append(vector)
+                continue
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.coalesced += 1
+                results.append(pending[1])
+                continue
+            future = loop.create_future()
+            self._pending[key] = (text, future)
+            results.append(future)
+            misses.append(text)
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        futures = [item for item in results if isinstance(item, asyncio.Future)]
+        if futures:
+            # gather retrieves every outcome, so a failed batch raises once
+            await asyncio.gather(*futures)
+        return [
+            list(item.result()) if isinstance(item, asyncio.Future) else list(item)
+            for item in results
+        ], misses
+
+    def _flush(self) -> None:
+        """Send every pending text, in requests of at most max_batch_size"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch = []
+            while self._pending and len(batch) < self.max_batch_size:
+                batch.append(self._pending.popitem(last=False))
+            task = self._loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[tuple]) -> None:
+        """Embed one batch and resolve its callers' futures"""
+        self.batches += 1
+        self.texts_sent += len(batch)
+        try:
+            vectors = await self.embed_fn([text for _, (text, _) in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            self.logger.error(f"Embedding batch of {len(batch)} failed: {e}")
+            for _, (_, future) in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (key, (_, future)), vector in zip(batch, vectors):
+            self._remember(key, vector)
+            if not future.done():
+                future.set_result(vector)
+
+    def _remember(self, key: bytes, vector: List[float]) -> None:
+        self._cache[key] = vector
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get request, batch and cache counters"""
+        return {
+            "requested": self.requested,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "texts_sent": self.texts_sent,
+            "avg_batch_size": self.texts_sent / self.batches if self.batches else 0.0,
+            "cached": len(self._cache),
+            "pending": len(self._pending)
+        }
@@ -0,0 +1,175 @@
+from typing import Dict, Any, List, Sequence, Tuple
+import re
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+# Odd multipliers for the polynomial n-gram hashes and the final bucket mix
+_BASE = np.uint64(1099511628211)
+_BIGRAM = np.uint64(0x100000001B3)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# Salts keeping word, bigram and character features of equal hash apart
+_WORD_SALT = np.uint64(0x5BD1E995)
+_BIGRAM_SALT = np.uint64(0x27D4EB2F)
+_CHAR_SALT = np.uint64(0x165667B1)
+
+def _powers(length: int) -> np.ndarray:
+    """``_BASE ** k`` for k below ``length``, wrapping at 64 bits"""
+    powers = np.ones(max(length, 1), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for k in range(1, length):
+            powers[k] = powers[k - 1] * _BASE
+    return powers
+
+class HashedNgramEmbedder:
+    """Offline text embeddings from hashed word and character n-grams.
+
+    Texts are lowercased and split into words. Word unigrams, word bigrams
+    and character n-grams of each space-padded word are hashed into ``dim``
+    buckets, weighted by sublinear term frequency times inverse document
+    frequency and L2 normalized, so nearest neighbours by L2 distance are
+    the texts with the highest cosine similarity. Hashing, counting and
+    weighting run over a whole batch at once in NumPy, and the hashes do
+    not depend on the process, so vectors stay comparable across restarts.
+
+    Document frequencies are learned from the texts passed to ``observe``
+    or embedded with ``update=True``; until then every bucket weighs the
+    same. Learning changes the weights, so vectors made before and after
+    are not comparable. ``freeze`` fixes the weights once a warm-up corpus
+    has been observed, after which learning raises instead.
+    """
+    def __init__(self, dim: int = 768, char_ngrams: Tuple[int, int] = (3, 5), word_bigrams: bool = True):
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        if not 1 <= char_ngrams[0] <= char_ngrams[1]:
+            raise ValueError(f"Invalid character n-gram range: {char_ngrams}")
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+        self.word_bigrams = word_bigrams
+        self._document_frequency = np.zeros(dim, dtype=np.float64)
+        self.documents = 0
+        self.embedded = 0
+        self.frozen = False
+
+    def embed(self, text: str) -> np.ndarray:
+        """Vector for a single text"""
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: Sequence[str], update: bool = False) -> np.ndarray:
+        """``(len(texts), dim)`` float32 vectors; ``update`` also learns their document frequencies"""
+        counts = self._counts(texts)
+        if update:
+            self._observe_counts(counts)
+        self.embedded += len(texts)
+        weights = np.log1p(counts) * self._idf()
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        # Texts without words stay zero vectors
+        np.divide(weights, norms, out=weights, where=norms > 0)
+        return weights.astype(np.float32)
+
+    def observe(self, texts: Sequence[str]) -> None:
+        """Learn document frequencies from texts without embedding them"""
+        self._observe_counts(self._counts(texts))
+
+    def freeze(self) -> None:
+        """Stop learning, so every later vector uses the same weights"""
+        self.frozen = True
+
+    def _observe_counts(self, counts: np.ndarray) -> None:
+        if self.frozen:
+            raise RuntimeError("Document frequencies are frozen; vectors already made would no longer match")
+        self._document_frequency += np.count_nonzero(counts, axis=0)
+        self.documents += counts.shape[0]
+
+    def _idf(self) -> np.ndarray:
+        # Smoothed, so buckets never seen still get a positive weight
+        return np.log((1 + self.documents) / (1 + self._document_frequency)) + 1
+
+    def _counts(self, texts: Sequence[str]) -> np.ndarray:
+        """Feature counts per text and bucket"""
+        n = len(texts)
+        if n == 0:
+            return np.zeros((0, self.dim), dtype=np.float64)
+        # Each text as " word word ... ", so every word is padded by single spaces
+        encoded = [(" " + " ".join(_WORD.findall(text.lower())) + " ").encode("utf-8") for text in texts]
+        lengths = np.fromiter((len(doc) for doc in encoded), dtype=np.int64, count=n)
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        doc_of = np.repeat(np.arange(n), lengths)
+        is_space = buffer == 32
+
+        docs: List[np.ndarray] = []
+        hashes: List[np.ndarray] = []
+        word_docs, word_hashes = self._word_hashes(buffer, is_space, doc_of)
+        docs.append(word_docs)
+        hashes.append(word_hashes ^ _WORD_SALT)
+        if self.word_bigrams and len(word_hashes) > 1:
+            same_doc = word_docs[:-1] == word_docs[1:]
+            with np.errstate(over="ignore"):
+                bigrams = word_hashes[:-1] * _BIGRAM + word_hashes[1:]
+            docs.append(word_docs[:-1][same_doc])
+            hashes.append(bigrams[same_doc] ^ _BIGRAM_SALT)
+        for size in range(self.char_ngrams[0], self.char_ngrams[1] + 1):
+            char_docs, char_hashes = self._char_hashes(buffer, is_space, doc_of, size)
+            docs.append(char_docs)
+            hashes.append(char_hashes ^ _CHAR_SALT ^ np.uint64(size))
+
+        all_hashes = np.concatenate(hashes)
+        with np.errstate(over="ignore"):
+            buckets = ((all_hashes * _MIX) >> np.uint64(32)) % np.uint64(self.dim)
+        index = np.concatenate(docs) * self.dim + buckets.astype(np.int64)
+        return np.bincount(index, minlength=n * self.dim).reshape(n, self.dim).astype(np.float64)
+
+    def _word_hashes(
+        self,
+        buffer: np.ndarray,
+        is_space: np.ndarray,
+        doc_of: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Document and polynomial hash of every word, in order"""
+        starts = np.flatnonzero(is_space[:-1] & ~is_space[1:]) + 1
+        if len(starts) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+        positions = np.flatnonzero(~is_space)
+        is_start = np.zeros(len(buffer), dtype=bool)
+        is_start[starts] = True
+        # Offset of each character within its word
+        word_of = np.cumsum(is_start[positions]) - 1
+        offsets = positions - starts[word_of]
+        with np.errstate(over="ignore"):
+            terms = buffer[positions].astype(np.uint64) * _powers(int(offsets.max()) + 1)[offsets]
+            hashes = np.add.reduceat(terms, np.flatnonzero(offsets == 0))
+        return doc_of[starts], hashes
+
+    def _char_hashes(
+        self,
+        buffer: np.ndarray,
+        is_space: np.ndarray,
+        doc_of: np.ndarray,
+        size: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Document and hash of every character n-gram inside a padded word"""
+        if len(buffer) < size:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, size)
+        first = np.arange(len(windows))
+        last = first + size - 1
+        # Spaces may only pad the ends of a gram, and a gram never spans two texts
+        spaces_before = np.concatenate(([0], np.cumsum(is_space)))
+        interior_spaces = spaces_before[last] - spaces_before[first + 1] if size > 2 else 0
+        valid = (doc_of[first] == doc_of[last]) & (interior_spaces == 0)
+        if size <= 2:
+            # Too short to hold a character between two padding spaces
+            valid &= ~(is_space[first] & is_space[last])
+        with np.errstate(over="ignore"):
+            hashes = (windows[valid].astype(np.uint64) * _powers(size)[::-1]).sum(axis=1, dtype=np.uint64)
+        return doc_of[first[valid]], hashes
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "dim": self.dim,
+            "documents": self.documents,
+            "embedded": self.embedded,
+            "frozen": self.frozen,
+            "buckets_seen": int(np.count_nonzero(self._document_frequency))
+        }
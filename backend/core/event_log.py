@@ -0,0 +1,375 @@
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+# payload length, crc32, timestamp (epoch seconds), correlation id length
+FRAME_HEADER = struct.Struct("<IIdH")
+SEGMENT_SUFFIX = ".seg"
+
+class EventLogClosedError(RuntimeError):
+    """Raised when a closed event log is written to or read from"""
+    pass
+
+@dataclass
+class SegmentInfo:
+    """Metadata for one on-disk segment, rebuilt from frame headers on open.
+
+    Records are appended in completion order, which need not be timestamp
+    order, so ``first_timestamp`` and ``last_timestamp`` are the earliest
+    and latest timestamps in the segment rather than those of its first and
+    last records.
+    """
+    path: str
+    base_sequence: int
+    size: int = 0
+    records: int = 0
+    first_timestamp: Optional[float] = None
+    last_timestamp: Optional[float] = None
+
+    def overlaps(self, start: Optional[float], end: Optional[float]) -> bool:
+        """Check whether the segment may hold records in [start, end]"""
+        if self.records == 0:
+            return False
+        if start is not None and self.last_timestamp < start:
+            return False
+        if end is not None and self.first_timestamp > end:
+            return False
+        return True
+
+def _to_epoch(timestamp: datetime) -> float:
+    """Convert a naive UTC datetime to epoch seconds"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+def _from_epoch(seconds: float) -> datetime:
+    """Convert epoch seconds back to a naive UTC datetime"""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+def _iter_frames(buffer, size: int) -> Iterator[Tuple[int, float, bytes, int, int]]:
+    """Yield (offset, timestamp, correlation id, payload start, payload end) per valid frame.
+
+    Iteration stops at the first truncated or corrupt frame, which marks
+    the end of the durable part of a segment.
+    """
+    offset = 0
+    while offset + FRAME_HEADER.size <= size:
+        length, crc, timestamp, corr_length = FRAME_HEADER.unpack_from(buffer, offset)
+        body_start = offset + FRAME_HEADER.size
+        body_end = body_start + corr_length + length
+        if body_end > size or zlib.crc32(buffer[body_start:body_end]) != crc:
+            return
+        correlation_id = bytes(buffer[body_start:body_start + corr_length])
+        yield offset, timestamp, correlation_id, body_start + corr_length, body_end
+        offset = body_end
+
+def _sync_periodically(log_ref: "weakref.ref[EventLog]", stop: threading.Event, interval: float) -> None:
+    """Sync a log's unsynced records every interval until it is closed or collected"""
+    while not stop.wait(interval):
+        log = log_ref()
+        if log is None:
+            return
+        log._sync_if_stale()
+        del log
+
+class EventLog:
+    """Append-only, segmented on-disk event log.
+
+    Records are framed with a small binary header (length, crc32, timestamp,
+    correlation id) followed by a JSON body. Writes are buffered and fsynced
+    every ``fsync_every`` records, and a background thread syncs records
+    left unsynced for ``fsync_interval`` seconds even when no further
+    writes arrive. Reads map segments into memory and only decode the records
+    that match a replay filter. Old segments are dropped by retention and
+    small sealed segments can be merged by ``compact``.
+    """
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 16 * 1024 * 1024,
+        fsync_every: int = 100,
+        fsync_interval: float = 1.0,
+        max_segments: Optional[int] = None,
+        retention_seconds: Optional[float] = None
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.max_segments = max_segments
+        self.retention_seconds = retention_seconds
+
+        self._lock = threading.RLock()
+        self._segments: List[SegmentInfo] = []
+        self._active_file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_segments()
+
+        self._stop_syncer = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        if fsync_interval:
+            self._syncer = threading.Thread(
+                target=_sync_periodically,
+                args=(weakref.ref(self), self._stop_syncer, fsync_interval),
+                name="event-log-sync",
+                daemon=True
+            )
+            self._syncer.start()
+
+    def _load_segments(self) -> None:
+        """Rebuild segment metadata from disk and open the newest segment for appends"""
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            path = os.path.join(self.directory, name)
+            info = SegmentInfo(path=path, base_sequence=int(name[:-len(SEGMENT_SUFFIX)]))
+            file_size = os.path.getsize(path)
+            if file_size:
+                with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    for offset, timestamp, _, _, end in _iter_frames(buffer, file_size):
+                        self._track_record(info, timestamp, end)
+            if info.size < file_size:
+                # Drop a torn tail left by a crash mid-write
+                self.logger.warning(f"Truncating {path} from {file_size} to {info.size} bytes")
+                os.truncate(path, info.size)
+            self._segments.append(info)
+
+        if not self._segments:
+            self._segments.append(self._new_segment_info(0))
+        self._active_file = open(self._segments[-1].path, "ab")
+
+    def _new_segment_info(self, base_sequence: int) -> SegmentInfo:
+        """Create metadata for a new segment file"""
+        return SegmentInfo(
+            path=os.path.join(self.directory, f"{base_sequence:020d}{SEGMENT_SUFFIX}"),
+            base_sequence=base_sequence
+        )
+
+    @staticmethod
+    def _track_record(info: SegmentInfo, timestamp: float, end_offset: int) -> None:
+        """Account for a record in segment metadata"""
+        info.size = end_offset
+        info.records += 1
+        if info.first_timestamp is None or timestamp < info.first_timestamp:
+            info.first_timestamp = timestamp
+        if info.last_timestamp is None or timestamp > info.last_timestamp:
+            info.last_timestamp = timestamp
+
+    @staticmethod
+    def _encode(timestamp: float, correlation_id: Optional[str], record: Dict[str, Any]) -> bytes:
+        """Frame a record"""
+        corr = (correlation_id or "").encode("utf-8")
+        payload = json.dumps(record, default=str, separators=(",", ":")).encode("utf-8")
+        body = corr + payload
+        return FRAME_HEADER.pack(len(payload), zlib.crc32(body), timestamp, len(corr)) + body
+
+    def append(
+        self,
+        topic: str,
+        data: Any,
+        timestamp: datetime,
+        processing_time_ms: float = 0.0,
+        correlation_id: Optional[str] = None
+    ) -> None:
+        """Append an event, rolling the segment and syncing as needed"""
+        epoch = _to_epoch(timestamp)
+        frame = self._encode(epoch, correlation_id, {
+            "topic": topic,
+            "data": data,
+            "processing_time_ms": processing_time_ms
+        })
+        with self._lock:
+            self._check_open()
+            active = self._segments[-1]
+            if active.size and active.size + len(frame) > self.segment_max_bytes:
+                self._roll()
+                active = self._segments[-1]
+            self._active_file.write(frame)
+            self._track_record(active, epoch, active.size + len(frame))
+
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+
+    def _check_open(self) -> None:
+        if self._active_file is None:
+            raise EventLogClosedError(f"Event log {self.directory} is closed")
+
+    def sync(self) -> None:
+        """Flush buffered records and fsync the active segment"""
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_if_stale(self) -> None:
+        """Sync when records have waited for at least the sync interval"""
+        with self._lock:
+            if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        if self._active_file is None:
+            return
+        self._active_file.flush()
+        os.fsync(self._active_file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _roll(self) -> None:
+        """Seal the active segment and start a new one"""
+        self._sync_locked()
+        self._active_file.close()
+        sealed = self._segments[-1]
+        self._segments.append(self._new_segment_info(sealed.base_sequence + sealed.records))
+        self._active_file = open(self._segments[-1].path, "ab")
+        self._apply_retention()
+
+    def _apply_retention(self) -> None:
+        """Delete the oldest sealed segments beyond the retention limits"""
+        cutoff = time.time() - self.retention_seconds if self.retention_seconds else None
+        while len(self._segments) > 1:
+            oldest = self._segments[0]
+            too_many = self.max_segments is not None and len(self._segments) > self.max_segments
+            expired = cutoff is not None and (oldest.last_timestamp or 0) < cutoff
+            if not (too_many or expired):
+                break
+            os.remove(oldest.path)
+            self._segments.pop(0)
+
+    def compact(self) -> int:
+        """Merge adjacent small sealed segments and drop expired records.
+
+        Returns the number of segments removed.
+        """
+        with self._lock:
+            self._apply_retention()
+            cutoff = time.time() - self.retention_seconds if self.retention_seconds else None
+            sealed = self._segments[:-1]
+            merged: List[SegmentInfo] = []
+            removed = 0
+            group: List[SegmentInfo] = []
+
+            def flush_group():
+                nonlocal removed
+                if len(group) > 1 or (group and cutoff is not None
+                                      and (group[0].first_timestamp or 0) < cutoff):
+                    merged.append(self._merge(group, cutoff))
+                    removed += len(group) - 1
+                else:
+                    merged.extend(group)
+                group.clear()
+
+            for info in sealed:
+                if group and sum(g.size for g in group) + info.size > self.segment_max_bytes:
+                    flush_group()
+                group.append(info)
+            flush_group()
+
+            self._segments = [info for info in merged if info.records] + self._segments[-1:]
+            return removed
+
+    def _merge(self, group: List[SegmentInfo], cutoff: Optional[float]) -> SegmentInfo:
+        """Rewrite a group of segments into one, skipping records older than cutoff"""
+        target = self._new_segment_info(group[0].base_sequence)
+        tmp_path = target.path + ".compact"
+        with open(tmp_path, "wb") as out:
+            for info in group:
+                if not info.size:
+                    continue
+                with open(info.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    for offset, timestamp, _, _, end in _iter_frames(buffer, info.size):
+                        if cutoff is not None and timestamp < cutoff:
+                            continue
+                        out.write(buffer[offset:end])
+                        self._track_record(target, timestamp, target.size + (end - offset))
+            out.flush()
+            os.fsync(out.fileno())
+        # The merged file takes the first segment's name, so swap it in atomically
+        # before removing the rest of the group
+        if target.records:
+            os.replace(tmp_path, target.path)
+        else:
+            os.remove(tmp_path)
+            os.remove(group[0].path)
+        for info in group[1:]:
+            os.remove(info.path)
+        return target
+
+    def replay(
+        self,
+        correlation_id: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream logged events in append order, filtered by correlation id and time window"""
+        start = _to_epoch(start_time) if start_time else None
+        end = _to_epoch(end_time) if end_time else None
+        wanted = correlation_id.encode("utf-8") if correlation_id is not None else None
+
+        # Map the snapshot's segments while holding the lock; compaction and
+        # retention may replace or delete the files once it is released, but
+        # the open mappings keep the snapshot's records readable
+        mapped: List[Tuple[Any, mmap.mmap, int]] = []
+        try:
+            with self._lock:
+                self._check_open()
+                self._active_file.flush()
+                for info in self._segments:
+                    if not info.overlaps(start, end):
+                        continue
+                    f = open(info.path, "rb")
+                    try:
+                        mapped.append((f, mmap.mmap(f.fileno(), info.size, access=mmap.ACCESS_READ), info.size))
+                    except BaseException:
+                        f.close()
+                        raise
+
+            for _, buffer, size in mapped:
+                for _, timestamp, corr, payload_start, payload_end in _iter_frames(buffer, size):
+                    if start is not None and timestamp < start:
+                        continue
+                    if end is not None and timestamp > end:
+                        continue
+                    if wanted is not None and corr != wanted:
+                        continue
+                    record = json.loads(buffer[payload_start:payload_end])
+                    record["timestamp"] = _from_epoch(timestamp)
+                    record["correlation_id"] = corr.decode("utf-8") or None
+                    yield record
+        finally:
+            for f, buffer, _ in mapped:
+                buffer.close()
+                f.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get segment counts and sizes"""
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "records": sum(info.records for info in self._segments),
+                "bytes": sum(info.size for info in self._segments),
+                "unsynced_records": self._unsynced
+            }
+
+    def close(self) -> None:
+        """Sync and close the active segment"""
+        self._stop_syncer.set()
+        if self._syncer is not None and self._syncer is not threading.current_thread():
+            self._syncer.join(timeout=1.0)
+        with self._lock:
+            if self._active_file is not None:
+                self._sync_locked()
+                self._active_file.close()
+                self._active_file = None
@@ -1,14 +1,36 @@
-from typing import Dict, Any, Optional, List, Set, Callable, Type
+from typing import Dict, Any, Optional, List, Set, Callable, Type, Tuple, Iterator
+import bisect
+import heapq
 import random
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from datetime import datetime
 import logging
 from pubsub import pub
 from pubsub.core.listener import IListenerExcHandler
 import uuid
 import json
-from collections import deque
+import contextvars
+import asyncio
+from .dispatcher import AsyncDispatcher, get_dispatcher
+from .retry_scheduler import RetryScheduler
+from .event_log import EventLog
+from .metrics import LatencyRegistry
+from .topic_router import TopicRouter, TopicSchema, is_wildcard_pattern
+from .coalescing import CoalescePolicy, Coalescer
+from .transport import EventTransport, get_transport
+
+@dataclass
+class PublishContext:
+    """State of an EventSystem.publish call shared with the event tracker"""
+    topic: str
+    correlation_id: str
+    stored_event: Optional["StoredEvent"] = None
+
+# Publish call in progress, read by the event tracker
+_current_publish: contextvars.ContextVar[Optional[PublishContext]] = contextvars.ContextVar(
+    "current_publish", default=None
+)
 
 @dataclass
 class EventMessage:
@@ -27,34 +49,204 @@ class StoredEvent:
     data: Any
     timestamp: datetime
     processing_time_ms: float
+    correlation_id: Optional[str] = None
+    sequence: int = field(default=0, repr=False, compare=False)
+
+class TimeIndex:
+    """Timestamp-ordered sequence supporting append, popleft and range bisection"""
+    def __init__(self):
+        self._keys: List[Tuple[datetime, int]] = []
+        self._items: List[StoredEvent] = []
+        self._head = 0
+    
+    def __len__(self) -> int:
+        return len(self._items) - self._head
+    
+    def append(self, key: Tuple[datetime, int], item: StoredEvent) -> None:
+        """Append an item whose key is not older than the last one"""
+        self._keys.append(key)
+        self._items.append(item)
+    
+    def first_key(self) -> Optional[Tuple[datetime, int]]:
+        """Get the key of the oldest item"""
+        return self._keys[self._head] if len(self) else None
+    
+    def popleft(self) -> StoredEvent:
+        """Remove and return the oldest item"""
+        item = self._items[self._head]
+        self._head += 1
+        # Compact once the evicted prefix dominates, keeping eviction amortized O(1)
+        if self._head > 1024 and self._head * 2 > len(self._items):
+            del self._keys[:self._head]
+            del self._items[:self._head]
+            self._head = 0
+        return item
+    
+    def range(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Tuple[List[Tuple[datetime, int]], List[StoredEvent]]:
+        """Get keys and items with start_time <= timestamp <= end_time"""
+        lo = self._head
+        hi = len(self._items)
+        if start_time is not None:
+            lo = bisect.bisect_left(self._keys, (start_time, -1), lo, hi)
+        if end_time is not None:
+            hi = bisect.bisect_right(self._keys, (end_time, float("inf")), lo, hi)
+        return self._keys[lo:hi], self._items[lo:hi]
+    
+    def clear(self) -> None:
+        self._keys.clear()
+        self._items.clear()
+        self._head = 0
 
 class EventStore:
-    """Simple in-memory event store with size limit"""
-    def __init__(self, max_size: int = 1000):
+    """In-memory event store with size limit.
+
+    Events are kept in timestamp order, globally and per topic, so range
+    queries are answered by bisection. Counters used by metrics are updated
+    as events are appended and evicted rather than recomputed per query.
+    When an EventLog is attached every stored event is also appended to it,
+    so history survives restarts and can be replayed beyond ``max_size``.
+    """
+    def __init__(self, max_size: int = 1000, event_log: Optional[EventLog] = None):
         self.max_size = max_size
-        self.events: deque = deque(maxlen=max_size)
-        self.start_time = time.time()
+        self.event_log = event_log
+        self._events = TimeIndex()
+        self._topic_index: Dict[str, TimeIndex] = {}
+        self._sequence = 0
+        self._last_timestamp: Optional[datetime] = None
+        self._total_processing_ms = 0.0
     
-    def store_event(self, topic: str, data: Any):
-        """Store an event with processing time"""
-        processing_time_ms = (time.time() - self.start_time) * 1000  # Convert to ms
-        self.start_time = time.time()  # Reset for next event
+    def store_event(
+        self,
+        topic: str,
+        data: Any,
+        correlation_id: Optional[str] = None,
+        processing_time_ms: float = 0.0,
+        defer_log: bool = False
+    ) -> StoredEvent:
+        """Store an event.
+
+        ``processing_time_ms`` is the time listeners took to handle the event.
+        When it is not known yet, pass ``defer_log=True`` and report it later
+        through ``complete_event`` so the log entry carries the real value.
+        """
+        # Clamp to the last timestamp so storage stays sorted if the clock steps back
+        timestamp = datetime.utcnow()
+        if self._last_timestamp is not None and timestamp < self._last_timestamp:
+            timestamp = self._last_timestamp
+        self._last_timestamp = timestamp
         
         event = StoredEvent(
             topic=topic,
             data=data,
-            timestamp=datetime.utcnow(),
-            processing_time_ms=processing_time_ms
+            timestamp=timestamp,
+            processing_time_ms=processing_time_ms,
+            correlation_id=correlation_id,
+            sequence=self._sequence
         )
-        self.events.append(event)
+        key = (timestamp, self._sequence)
+        self._sequence += 1
+        
+        self._events.append(key, event)
+        topic_index = self._topic_index.get(topic)
+        if topic_index is None:
+            topic_index = self._topic_index[topic] = TimeIndex()
+        topic_index.append(key, event)
+        self._total_processing_ms += processing_time_ms
+        
+        while len(self._events) > self.max_size:
+            self._evict_oldest()
+        
+        if self.event_log is not None and not defer_log:
+            self.event_log.append(topic, data, timestamp, processing_time_ms, correlation_id)
+        return event
+    
+    def complete_event(self, event: StoredEvent, processing_time_ms: float) -> None:
+        """Record how long listeners took for an event stored with defer_log"""
+        oldest = self._events.first_key()
+        if oldest is not None and event.sequence >= oldest[1]:
+            self._total_processing_ms += processing_time_ms - event.processing_time_ms
+        event.processing_time_ms = processing_time_ms
+        if self.event_log is not None:
+            self.event_log.append(
+                event.topic, event.data, event.timestamp, processing_time_ms, event.correlation_id
+            )
+    
+    def _evict_oldest(self) -> None:
+        """Drop the oldest event and update counters"""
+        event = self._events.popleft()
+        topic_index = self._topic_index[event.topic]
+        topic_index.popleft()
+        if not topic_index:
+            del self._topic_index[event.topic]
+        self._total_processing_ms -= event.processing_time_ms
     
     def get_events(self) -> List[StoredEvent]:
         """Get all stored events"""
-        return list(self.events)
+        return self._events.range()[1]
+    
+    def query(
+        self,
+        topic_prefix: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[StoredEvent]:
+        """Get events in time order, filtered by topic prefix and time range"""
+        if not topic_prefix:
+            return self._events.range(start_time, end_time)[1]
+        
+        ranges = [
+            index.range(start_time, end_time)
+            for topic, index in self._topic_index.items()
+            if topic.startswith(topic_prefix)
+        ]
+        if not ranges:
+            return []
+        if len(ranges) == 1:
+            return ranges[0][1]
+        merged = heapq.merge(*(zip(keys, items) for keys, items in ranges), key=lambda pair: pair[0])
+        return [item for _, item in merged]
+    
+    def replay(
+        self,
+        correlation_id: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Iterator[StoredEvent]:
+        """Stream events for a correlation id or time window.
+
+        Reads from the event log when one is attached, otherwise from memory.
+        """
+        if self.event_log is None:
+            for event in self._events.range(start_time, end_time)[1]:
+                if correlation_id is None or event.correlation_id == correlation_id:
+                    yield event
+            return
+        
+        for record in self.event_log.replay(correlation_id, start_time, end_time):
+            yield StoredEvent(**record)
+    
+    def count(self) -> int:
+        """Get the number of stored events"""
+        return len(self._events)
+    
+    def average_processing_time(self) -> float:
+        """Get the mean processing time of stored events"""
+        count = len(self._events)
+        return self._total_processing_ms / count if count else 0
+    
+    def count_by_topic(self) -> Dict[str, int]:
+        """Get the number of stored events per topic"""
+        return {topic: len(index) for topic, index in self._topic_index.items()}
     
     def clear(self):
         """Clear all stored events"""
-        self.events.clear()
+        self._events.clear()
+        self._topic_index.clear()
+        self._total_processing_ms = 0.0
 
 class EventSystem:
     """Event system implementation using pypubsub"""
@@ -74,22 +266,71 @@ class EventSystem:
         "agent": {
             "events": [
                 "test_event",
-                "test"
+                "test",
+                "feature_request",
+                "feature_defined",
+                "feature_completed",
+                "feature_revision",
+                "validation_request",
+                "validation_result",
+                "validation_complete",
+                "research_request",
+                "research_complete",
+                "update_memory",
+                "memory_updated",
+                "project_summary_ready",
+                "documentation_complete"
             ]
         }
     }
     
-    def __init__(self):
+    MAX_RETRIES = 3
+    
+    # VALID_EVENT_TYPES compiled into a trie on first use, per class so
+    # subclasses with their own event types get their own schema
+    _topic_schema: Optional[TopicSchema] = None
+    
+    def __init__(
+        self,
+        dispatcher: Optional[AsyncDispatcher] = None,
+        retry_scheduler: Optional[RetryScheduler] = None,
+        event_log: Optional[EventLog] = None,
+        transport: Optional[EventTransport] = None
+    ):
         self.logger = logging.getLogger(__name__)
-        self._retry_counts: Dict[str, int] = {}
         self._subscriptions: Dict[str, Set[tuple]] = {}
+        self._topic_cache: Dict[Tuple[str, Optional[str], bool], str] = {}
+        self._coalescers: Dict[Callable, Coalescer] = {}
+        
+        cls = type(self)
+        if cls.__dict__.get("_topic_schema") is None:
+            cls._topic_schema = TopicSchema.from_event_types(cls.VALID_EVENT_TYPES)
+        
+        # Wildcard subscriptions are routed by one catch-all listener
+        self._router = TopicRouter()
+        self._route_handler = self._create_route_handler()
+        pub.subscribe(self._route_handler, pub.ALL_TOPICS)
+        
+        # Coroutine handlers are scheduled as tasks instead of being called inline
+        self._dispatcher = dispatcher or get_dispatcher()
+        
+        # Failed publishes are retried later instead of sleeping: on the loop
+        # that published them, or on the next publish when there was no loop
+        self._retry_scheduler = retry_scheduler or RetryScheduler()
+        
+        # Published events are forwarded to agents running in other processes
+        self._transport = transport or get_transport()
+        
+        # Per-topic, per-listener invocation times
+        self._listener_latency = LatencyRegistry()
+        self._metrics_reporter: Optional[asyncio.Task] = None
         
         # Add error handler for listener exceptions
         self._exc_handler = EventSystemExcHandler(self)
         pub.setListenerExcHandler(self._exc_handler)
         
         # Setup event store
-        self._event_store = EventStore()
+        self._event_store = EventStore(event_log=event_log)
         
         # Track event processing
         self._event_handler = self._create_event_handler()
@@ -110,42 +351,40 @@ class EventSystem:
         """Add random jitter to retry delay"""
         return delay * (1 + random.random() * 0.1)
     
+    def _retry_delay(self, retry_count: int) -> float:
+        """Get the backoff delay with jitter for a retry attempt"""
+        return self._add_jitter(min(30.0, (2 ** retry_count)))
+    
     def subscribe(
         self,
         event_type: str,
         handler: Callable,
         agent_id: Optional[str] = None,
-        filter_fn: Optional[Callable] = None
+        filter_fn: Optional[Callable] = None,
+        coalesce: Optional[CoalescePolicy] = None
     ) -> None:
-        """Subscribe to events with filtering support"""
+        """Subscribe to events with filtering support.
+
+        ``event_type`` may be a pattern where ``*`` matches one topic level
+        and ``#`` matches any number of levels, e.g. ``agent.*.feature_completed``.
+        With a ``coalesce`` policy the handler is called with a list of the
+        events buffered per flush interval instead of once per event.
+        """
         try:
-            # Don't format system events with agent prefix
-            if event_type.startswith("system."):
-                topic = event_type
-            elif event_type == "*":
-                topic = "system"
-            elif agent_id:
-                topic = self._format_topic(
-                    "agent.{agent}.{event}",
-                    agent=agent_id,
-                    event=event_type
-                )
-            else:
-                topic = event_type
+            topic = self._resolve_topic(event_type, agent_id or None, publishing=False)
                 
             if not self._validate_event_type(topic):
                 raise ValueError(f"Invalid event type: {topic}")
             
-            # Create a wrapper handler that applies the filter
-            if filter_fn:
-                def filtered_handler(data=None, **kwargs):
-                    if data is not None and filter_fn(data):
-                        handler(data)
-                actual_handler = filtered_handler
+            if coalesce is not None:
+                actual_handler = self._wrap_coalescing_handler(topic, handler, filter_fn, coalesce)
             else:
-                actual_handler = handler
+                actual_handler = self._wrap_handler(topic, handler, filter_fn)
             
-            pub.subscribe(actual_handler, topic)
+            if is_wildcard_pattern(topic):
+                self._router.add(topic, actual_handler)
+            else:
+                pub.subscribe(actual_handler, topic)
             
             # Track subscription with the actual handler we subscribed
             if agent_id not in self._subscriptions:
@@ -158,11 +397,111 @@ class EventSystem:
             self.logger.error(f"Error subscribing to event: {e}", exc_info=True)
             raise
     
+    def _wrap_handler(
+        self,
+        topic: str,
+        handler: Callable,
+        filter_fn: Optional[Callable] = None
+    ) -> Callable:
+        """Wrap a handler with filtering, timing and async dispatch as needed"""
+        listener_name = getattr(handler, "__qualname__", type(handler).__name__)
+        
+        if AsyncDispatcher.is_async_handler(handler):
+            async def timed_async_handler(**kwargs):
+                start = time.perf_counter()
+                try:
+                    return await handler(**kwargs)
+                finally:
+                    self._listener_latency.record(
+                        topic, listener_name, (time.perf_counter() - start) * 1000
+                    )
+            timed_async_handler.__qualname__ = listener_name
+            
+            def async_handler(data=None, **kwargs):
+                if filter_fn and (data is None or not filter_fn(data)):
+                    return
+                self._dispatcher.submit(
+                    topic,
+                    timed_async_handler,
+                    {"data": data},
+                    on_error=lambda failed, error: self._report_listener_error(topic, failed, error)
+                )
+            return async_handler
+        
+        def timed_handler(data=None, **kwargs):
+            # Filter out events before timing
+            if filter_fn and (data is None or not filter_fn(data)):
+                return
+            start = time.perf_counter()
+            try:
+                handler(data)
+            finally:
+                self._listener_latency.record(
+                    topic, listener_name, (time.perf_counter() - start) * 1000
+                )
+        # pypubsub identifies listeners by name in error reports
+        timed_handler.__name__ = getattr(handler, "__name__", listener_name)
+        timed_handler.__qualname__ = listener_name
+        return timed_handler
+
+    def _wrap_coalescing_handler(
+        self,
+        topic: str,
+        handler: Callable,
+        filter_fn: Optional[Callable],
+        policy: CoalescePolicy
+    ) -> Callable:
+        """Wrap a handler so filtered events are buffered and delivered in batches"""
+        batch_handler = self._wrap_handler(topic, handler)
+        
+        def deliver(events: List[Any]) -> None:
+            try:
+                batch_handler(data=events)
+            except Exception as e:
+                self._report_listener_error(topic, handler, e)
+        
+        coalescer = Coalescer(policy, deliver)
+        
+        def coalescing_handler(data=None, **kwargs):
+            if filter_fn and (data is None or not filter_fn(data)):
+                return
+            coalescer.add(data)
+        coalescing_handler.__name__ = getattr(handler, "__name__", "coalescing_handler")
+        self._coalescers[coalescing_handler] = coalescer
+        return coalescing_handler
+
+    def flush_coalesced(self) -> None:
+        """Deliver all events buffered by coalescing subscriptions now"""
+        for coalescer in list(self._coalescers.values()):
+            coalescer.flush()
+
+    def _report_listener_error(self, topic: str, handler: Callable, error: Exception) -> None:
+        """Publish an error raised by a handler called outside pypubsub"""
+        self.logger.error(f"Handler {handler} failed on topic {topic}: {error}")
+        self.publish(
+            event_type="system.error",
+            source_agent="system",
+            target_agent="system_monitor",
+            payload={
+                "error": "listener_error",
+                "listener": getattr(handler, "__qualname__", repr(handler)),
+                "topic": topic
+            },
+            correlation_id=str(uuid.uuid4()),
+            retry=False
+        )
+
     def unsubscribe_all(self, agent_id: str) -> None:
         """Unsubscribe from all topics for an agent"""
         if agent_id in self._subscriptions:
             for topic, handler in self._subscriptions[agent_id]:
-                pub.unsubscribe(listener=handler, topicName=topic)  # Fix unsubscribe call
+                coalescer = self._coalescers.pop(handler, None)
+                if coalescer is not None:
+                    coalescer.flush()
+                if is_wildcard_pattern(topic):
+                    self._router.remove(topic, handler)
+                else:
+                    pub.unsubscribe(listener=handler, topicName=topic)  # Fix unsubscribe call
             del self._subscriptions[agent_id]
             self.logger.debug(f"Unsubscribed {agent_id} from all topics")
 
@@ -184,6 +523,34 @@ class EventSystem:
             correlation_id=correlation_id
         )
 
+    def _resolve_topic(self, event_type: str, agent: Optional[str], publishing: bool) -> str:
+        """Map an event type and agent to its topic, caching the result"""
+        key = (event_type, agent, publishing)
+        topic = self._topic_cache.get(key)
+        if topic is not None:
+            return topic
+        
+        if event_type.startswith(("system.", "agent.")) or event_type == "#":
+            # Already a full topic or pattern, don't add an agent prefix
+            topic = event_type
+        elif event_type == "*":
+            # Subscribing to "*" means every system event; publishing goes to the root
+            topic = "system" if publishing else "system.#"
+        elif agent and (agent != "*" or not publishing):
+            # A "*" agent id on subscribe becomes a single-level wildcard
+            topic = self._format_topic(
+                "agent.{agent}.{event}",
+                agent=agent,
+                event=event_type
+            )
+        else:
+            topic = event_type
+        
+        if len(self._topic_cache) >= 4096:
+            self._topic_cache.clear()
+        self._topic_cache[key] = topic
+        return topic
+
     def _format_topic(self, pattern: str, **kwargs) -> str:
         """Format topic string based on subscription patterns"""
         try:
@@ -202,6 +569,7 @@ class EventSystem:
         retry: bool = True
     ) -> None:
         """Publish an event with retry logic"""
+        self._retry_scheduler.run_deferred()
         event = self._create_event_message(
             event_type=event_type,
             source_agent=source_agent,
@@ -211,59 +579,107 @@ class EventSystem:
         )
         
         try:
-            if event_type.startswith("system."):  # Don't format system events
-                topic = event_type
-            elif event_type == "*":
-                topic = "system"
-            elif target_agent != "*":
-                topic = self._format_topic(
-                    "agent.{agent}.{event}",
-                    agent=target_agent,
-                    event=event_type
-                )
-            else:
-                topic = event_type
+            topic = self._resolve_topic(event_type, target_agent, publishing=True)
             
             self.logger.debug(f"Publishing to topic {topic} with payload: {payload}")
-            pub.sendMessage(topic, data=event.payload)
+            context = PublishContext(topic=topic, correlation_id=correlation_id)
+            token = _current_publish.set(context)
+            start = time.perf_counter()
+            try:
+                pub.sendMessage(topic, data=event.payload)
+            finally:
+                _current_publish.reset(token)
+                if context.stored_event is not None:
+                    self._event_store.complete_event(
+                        context.stored_event, (time.perf_counter() - start) * 1000
+                    )
             self.logger.debug(f"Successfully published event: {event_type} to {topic}")
+            self._retry_scheduler.forget(self._retry_key(event))
+            self._forward(topic, {"data": event.payload})
             
         except Exception as e:
             self.logger.error(f"Error publishing event: {e}", exc_info=True)
             if retry:
                 self._handle_publish_error(event)
 
+    def _forward(self, topic: str, message: Dict[str, Any]) -> None:
+        """Send a locally delivered event to other processes"""
+        try:
+            self._transport.send(topic, message)
+        except Exception as e:
+            # Local delivery already succeeded, so retrying would duplicate it
+            self.logger.error(f"Error forwarding event to {topic}: {e}", exc_info=True)
+
+    async def publish_and_wait(
+        self,
+        event_type: str,
+        source_agent: str,
+        target_agent: str,
+        payload: Any,
+        correlation_id: str,
+        retry: bool = True
+    ) -> List[Any]:
+        """Publish an event and wait for every async handler it scheduled.
+
+        Returns the handler results in scheduling order; a handler that raised
+        contributes its exception instead of a result.
+        """
+        with self._dispatcher.collect() as pending:
+            self.publish(
+                event_type=event_type,
+                source_agent=source_agent,
+                target_agent=target_agent,
+                payload=payload,
+                correlation_id=correlation_id,
+                retry=retry
+            )
+        return await self._dispatcher.wait_for(pending)
+
+    def _retry_key(self, event: EventMessage) -> str:
+        """Get the key retries of an event are counted under"""
+        return f"{event.correlation_id}:{event.type}"
+
     def _handle_publish_error(self, event: EventMessage) -> None:
-        """Implement retry with backoff and jitter"""
-        event_key = f"{event.correlation_id}:{event.type}"
-        retry_count = self._retry_counts.get(event_key, 0)
+        """Schedule a retry with backoff and jitter without blocking the caller"""
+        event_key = self._retry_key(event)
+        retry_count = self._retry_scheduler.attempts(event_key)
         
-        if retry_count < 3:
-            base_delay = min(30.0, (2 ** retry_count))
-            delay = self._add_jitter(base_delay)
-            time.sleep(delay)
-            self._retry_counts[event_key] = retry_count + 1
-            self.publish(
-                event_type=event.type,
-                source_agent=event.source_agent,
-                target_agent=event.target_agent,
-                payload=event.payload,
-                correlation_id=event.correlation_id,
-                retry=True
+        if retry_count < self.MAX_RETRIES:
+            delay = self._retry_delay(retry_count)
+            self._retry_scheduler.record_attempt(event_key)
+            scheduled = self._retry_scheduler.schedule(
+                event_key,
+                lambda: self.publish(
+                    event_type=event.type,
+                    source_agent=event.source_agent,
+                    target_agent=event.target_agent,
+                    payload=event.payload,
+                    correlation_id=event.correlation_id,
+                    retry=True
+                ),
+                delay
             )
+            if not scheduled:
+                self.logger.error(f"Retry queue full, dropping event: {event}")
+                self._publish_retry_failure(event, "retry_queue_full")
         else:
             self.logger.error(f"Max retries reached for event: {event}")
-            self.publish(
-                event_type="system.error",
-                source_agent=event.source_agent,
-                target_agent="system_monitor",
-                payload={
-                    "error": "max_retries_exceeded",
-                    "original_event": event
-                },
-                correlation_id=event.correlation_id,
-                retry=False
-            ) 
+            self._retry_scheduler.forget(event_key)
+            self._publish_retry_failure(event, "max_retries_exceeded")
+
+    def _publish_retry_failure(self, event: EventMessage, error: str) -> None:
+        """Publish a system error for an event that will not be retried"""
+        self.publish(
+            event_type="system.error",
+            source_agent=event.source_agent,
+            target_agent="system_monitor",
+            payload={
+                "error": error,
+                "original_event": event
+            },
+            correlation_id=event.correlation_id,
+            retry=False
+        )
 
     def get_event_history(
         self,
@@ -272,18 +688,26 @@ class EventSystem:
         end_time: Optional[datetime] = None
     ) -> List[Dict]:
         """Get filtered event history"""
-        events = self._event_store.get_events()
-        
-        if topic_filter:
-            events = [e for e in events if e.topic.startswith(topic_filter)]
-            
-        if start_time:
-            events = [e for e in events if e.timestamp >= start_time]
-            
-        if end_time:
-            events = [e for e in events if e.timestamp <= end_time]
-            
-        return [asdict(e) for e in events]
+        events = self._event_store.query(topic_filter, start_time, end_time)
+        return [
+            {
+                "topic": e.topic,
+                "data": e.data,
+                "timestamp": e.timestamp,
+                "processing_time_ms": e.processing_time_ms,
+                "correlation_id": e.correlation_id
+            }
+            for e in events
+        ]
+    
+    def replay_events(
+        self,
+        correlation_id: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Iterator[StoredEvent]:
+        """Stream stored events for a correlation id or time window"""
+        return self._event_store.replay(correlation_id, start_time, end_time)
     
     def clear_event_history(self):
         """Clear event history"""
@@ -291,21 +715,57 @@ class EventSystem:
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get event system metrics"""
-        events = self._event_store.get_events()
-        return {
-            "total_events": len(events),
-            "avg_processing_time": sum(e.processing_time_ms for e in events) / len(events) if events else 0,
-            "events_by_topic": self._count_events_by_topic(events),
-            "active_subscriptions": self._count_active_subscriptions()
+        metrics = {
+            "total_events": self._event_store.count(),
+            "avg_processing_time": self._event_store.average_processing_time(),
+            "events_by_topic": self._event_store.count_by_topic(),
+            "active_subscriptions": self._count_active_subscriptions(),
+            "dispatch_queues": self._dispatcher.get_metrics(),
+            "retry_queue": self._retry_scheduler.get_metrics(),
+            "listener_latency": self._listener_latency.snapshot(),
+            "coalescing": {
+                getattr(handler, "__name__", repr(handler)): coalescer.get_metrics()
+                for handler, coalescer in self._coalescers.items()
+            }
         }
+        if self._event_store.event_log is not None:
+            metrics["event_log"] = self._event_store.event_log.get_metrics()
+        transport_metrics = self._transport.get_metrics()
+        if transport_metrics:
+            metrics["transport"] = transport_metrics
+        return metrics
     
-    def _count_events_by_topic(self, events: List[StoredEvent]) -> Dict[str, int]:
-        """Count events by topic"""
-        counts = {}
-        for event in events:
-            topic = event.topic
-            counts[topic] = counts.get(topic, 0) + 1
-        return counts
+    def emit_performance_metrics(self) -> None:
+        """Publish listener latency percentiles as a system.performance_metric event"""
+        self.publish(
+            event_type="system.performance_metric",
+            source_agent="system",
+            target_agent="system_monitor",
+            payload={
+                "metric": "listener_latency",
+                "listener_latency": self._listener_latency.snapshot(),
+                "retry_queue": self._retry_scheduler.get_metrics()
+            },
+            correlation_id=str(uuid.uuid4()),
+            retry=False
+        )
+    
+    def start_metrics_reporter(self, interval: float = 60.0) -> asyncio.Task:
+        """Emit performance metrics every ``interval`` seconds on the running loop"""
+        async def report():
+            while True:
+                await asyncio.sleep(interval)
+                self.emit_performance_metrics()
+        
+        self.stop_metrics_reporter()
+        self._metrics_reporter = asyncio.get_running_loop().create_task(report())
+        return self._metrics_reporter
+    
+    def stop_metrics_reporter(self) -> None:
+        """Stop periodic performance metric events"""
+        if self._metrics_reporter is not None:
+            self._metrics_reporter.cancel()
+            self._metrics_reporter = None
     
     def _count_active_subscriptions(self) -> Dict[str, int]:
         """Count active subscriptions by agent"""
@@ -317,32 +777,39 @@ class EventSystem:
     def _create_event_handler(self):
         """Create event tracking handler"""
         def handler(topic=pub.AUTO_TOPIC, **kwargs):
-            self._event_store.store_event(topic.getName(), kwargs.get('data'))
+            context = _current_publish.get()
+            topic_name = topic.getName()
+            if context is None or context.stored_event is not None or context.topic != topic_name:
+                # Sent directly through pypubsub, so listener time is unknown
+                self._event_store.store_event(topic_name, kwargs.get('data'))
+                return
+            context.stored_event = self._event_store.store_event(
+                topic_name,
+                kwargs.get('data'),
+                correlation_id=context.correlation_id,
+                defer_log=True
+            )
         return handler 
 
+    def _create_route_handler(self):
+        """Create the catch-all listener that delivers to wildcard subscriptions"""
+        def handler(topic=pub.AUTO_TOPIC, **kwargs):
+            if not len(self._router):
+                return
+            topic_name = topic.getName()
+            for listener in self._router.match(topic_name):
+                try:
+                    # Same message arguments an exact-topic listener receives
+                    listener(**kwargs)
+                except Exception as e:
+                    self._report_listener_error(topic_name, listener, e)
+        return handler
+
     def _validate_event_type(self, event_type: str) -> bool:
-        """Validate event type against schema"""
-        parts = event_type.split(".")
-        
-        # Handle special cases
+        """Validate an event type or wildcard pattern against the compiled schema"""
         if event_type == "*":
             return True
-        
-        # Handle agent events
-        if parts[0] == "agent" and len(parts) == 3:
-            category = parts[0]
-            event = parts[2]
-            return event in self.VALID_EVENT_TYPES[category]["events"]
-            
-        # Handle system events
-        if parts[0] == "system" and len(parts) == 2:
-            category = parts[0]
-            event = parts[1]
-            for subcategory in self.VALID_EVENT_TYPES[category].values():
-                if event in subcategory:
-                    return True
-        
-        return False
+        return self._topic_schema.is_valid(event_type)
 
 class EventSystemExcHandler(pub.IListenerExcHandler):
     """Exception handler for event system"""
@@ -0,0 +1,121 @@
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Hashable
+import asyncio
+import logging
+import time
+from .metrics import LatencyHistogram
+
+class Hedger:
+    """Sends a backup request when a call runs past the observed tail latency.
+
+    Latency is tracked per ``key``, e.g. ``(model, call_class)``, so a fast
+    model's tail does not trigger backups of a slow one. Once ``min_samples``
+    calls with a key have completed, a call with that key still running
+    after the ``percentile`` latency gets one backup request; whichever
+    finishes first successfully wins and the other is cancelled.
+    ``can_hedge`` lets the caller refuse a backup, e.g. when there is no
+    quota for it.
+    """
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        min_delay_s: float = 0.05,
+        histogram: Optional[LatencyHistogram] = None
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay_s = min_delay_s
+        # Latency of calls made without a key
+        self.latency = histogram or LatencyHistogram()
+        self._latency: Dict[Hashable, LatencyHistogram] = {None: self.latency}
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failures = 0
+
+    def histogram(self, key: Hashable = None) -> LatencyHistogram:
+        """Latency of the calls made with a key"""
+        histogram = self._latency.get(key)
+        if histogram is None:
+            histogram = self._latency[key] = LatencyHistogram()
+        return histogram
+
+    def hedge_delay(self, key: Hashable = None) -> Optional[float]:
+        """Seconds to wait before sending a backup, or None until the key has enough samples"""
+        histogram = self._latency.get(key)
+        if histogram is None or histogram.count < self.min_samples:
+            return None
+        return max(self.min_delay_s, histogram.percentile(self.percentile) / 1000)
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        can_hedge: Callable[[], bool] = lambda: True,
+        timeout: Optional[float] = None,
+        key: Hashable = None
+    ) -> Any:
+        """Await ``fn()``, hedging it with a second ``fn()`` if it is slower than usual for ``key``"""
+        self.calls += 1
+        started: Dict[asyncio.Task, float] = {}
+
+        def launch() -> asyncio.Task:
+            task = asyncio.ensure_future(fn())
+            started[task] = time.monotonic()
+            return task
+
+        tasks: List[asyncio.Task] = [launch()]
+        winner: Optional[asyncio.Task] = None
+        try:
+            async with asyncio.timeout(timeout):
+                delay = self.hedge_delay(key)
+                if delay is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done and can_hedge():
+                        tasks.append(launch())
+                        self.hedged += 1
+                pending = set(tasks)
+                while winner is None:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in tasks:
+                        # A failure only wins when nothing else is left running
+                        if task in done and (task.exception() is None or not pending):
+                            winner = task
+                            break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark the loser's failure as seen
+                    task.exception()
+
+        if winner.exception() is not None:
+            self.failures += 1
+            raise winner.exception()
+        self.histogram(key).record((time.monotonic() - started[winner]) * 1000)
+        if winner is not tasks[0]:
+            self.hedge_wins += 1
+        return winner.result()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get hedge counts and, per key, the latency that triggers a backup"""
+        delay = self.hedge_delay()
+        keys = {}
+        for key, histogram in list(self._latency.items()):
+            if key is None:
+                continue
+            key_delay = self.hedge_delay(key)
+            keys["/".join(map(str, key)) if isinstance(key, tuple) else str(key)] = {
+                "hedge_delay_ms": key_delay * 1000 if key_delay is not None else None,
+                "latency": histogram.snapshot()
+            }
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "hedge_delay_ms": delay * 1000 if delay is not None else None,
+            "latency": self.latency.snapshot(),
+            "keys": keys
+        }
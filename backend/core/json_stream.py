@@ -0,0 +1,160 @@
+from typing import Any, Optional, List, Tuple, Iterable, Sequence
+from bisect import bisect_right
+import json
+
+Path = Tuple[str, ...]
+
+class _Frame:
+    """An open object or array while scanning"""
+    __slots__ = ("is_array", "path", "key", "expect_key", "element_start")
+
+    def __init__(self, is_array: bool, path: Path):
+        self.is_array = is_array
+        self.path = path
+        self.key: Optional[str] = None
+        self.expect_key = not is_array
+        self.element_start: Optional[int] = None
+
+class StreamingJSONParser:
+    """Incremental JSON scanner that emits array elements as they close.
+
+    ``item_paths`` names the arrays to watch by their key path, e.g.
+    ``[("core_features",)]``; elements of nested arrays share their
+    array's path. Text is fed in arbitrary chunks, and ``feed`` returns
+    ``(path, element)`` for every watched element completed by the chunk.
+    Each character is scanned once; only completed elements are decoded,
+    and only the chunks an element or key spans are joined to decode it.
+    """
+    def __init__(self, item_paths: Iterable[Sequence[str]]):
+        self.item_paths = {tuple(path) for path in item_paths}
+        self._parts: List[str] = []
+        # Offset of each chunk in the document
+        self._starts: List[int] = []
+        self._offset = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._done = False
+
+    def _slice(self, start: int, end: int) -> str:
+        """Document text from ``start`` to ``end``, joining only the chunks it spans"""
+        index = bisect_right(self._starts, start) - 1
+        pieces: List[str] = []
+        while index < len(self._parts) and self._starts[index] < end:
+            chunk_start = self._starts[index]
+            pieces.append(self._parts[index][max(start - chunk_start, 0):end - chunk_start])
+            index += 1
+        return "".join(pieces)
+
+    def _value_path(self) -> Path:
+        """Path of a value starting at the current position"""
+        if not self._stack:
+            return ()
+        frame = self._stack[-1]
+        if frame.is_array:
+            return frame.path
+        return frame.path + (frame.key,)
+
+    def _begin_value(self, position: int) -> None:
+        """Note where an element of a watched array starts"""
+        if self._stack:
+            frame = self._stack[-1]
+            if frame.is_array and frame.element_start is None and frame.path in self.item_paths:
+                frame.element_start = position
+
+    def _finish_element(self, frame: _Frame, end: int, completed: List[Tuple[Path, Any]]) -> None:
+        if frame.element_start is not None:
+            raw = self._slice(frame.element_start, end)
+            completed.append((frame.path, json.loads(raw)))
+            frame.element_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """Scan a chunk and return the watched elements it completed"""
+        completed: List[Tuple[Path, Any]] = []
+        if not chunk:
+            return completed
+        base = self._offset
+        self._parts.append(chunk)
+        self._starts.append(base)
+        self._offset += len(chunk)
+        stack = self._stack
+
+        for i, char in enumerate(chunk):
+            position = base + i
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    frame = stack[-1] if stack else None
+                    if frame is not None and not frame.is_array and frame.expect_key:
+                        frame.key = json.loads(self._slice(self._string_start, position + 1))
+                        frame.expect_key = False
+                continue
+
+            if char in " \t\r\n":
+                continue
+            if char == '"':
+                frame = stack[-1] if stack else None
+                if frame is None or frame.is_array or not frame.expect_key:
+                    self._begin_value(position)
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                self._begin_value(position)
+                path = self._value_path()
+                stack.append(_Frame(char == "[", path))
+            elif char in "}]":
+                frame = stack.pop()
+                if frame.is_array and frame.element_start is not None:
+                    # A scalar element ends at the closing bracket
+                    self._finish_element(frame, position, completed)
+                if not stack:
+                    self._done = True
+                    continue
+                parent = stack[-1]
+                if parent.is_array and parent.element_start is not None:
+                    self._finish_element(parent, position + 1, completed)
+            elif char == ",":
+                frame = stack[-1]
+                if frame.is_array:
+                    if frame.element_start is not None:
+                        self._finish_element(frame, position, completed)
+                else:
+                    frame.expect_key = True
+            elif char == ":":
+                continue
+            else:
+                # Numbers and literals
+                self._begin_value(position)
+        return completed
+
+    @property
+    def done(self) -> bool:
+        """Whether the top-level value has closed"""
+        return self._done
+
+    def result(self) -> Any:
+        """Decode the whole document fed so far"""
+        return json.loads("".join(self._parts))
+
+def iter_items(data: Any, item_paths: Iterable[Sequence[str]]) -> List[Tuple[Path, Any]]:
+    """Get the watched array elements of an already decoded document, in document order"""
+    paths = {tuple(path) for path in item_paths}
+    items: List[Tuple[Path, Any]] = []
+
+    def walk(value: Any, path: Path) -> None:
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(child, path + (key,))
+        elif isinstance(value, list):
+            for element in value:
+                walk(element, path)
+                if path in paths:
+                    items.append((path, element))
+
+    walk(data, ())
+    return items
@@ -9,6 +9,12 @@ from dataclasses import dataclass
 from datetime import datetime
 import backoff
 from .event_system import EventSystem
+from .rate_limiter import RateLimiter, RateLimitExceeded, get_rate_limiter
+from .token_counter import get_token_counter
+from .embedding_batcher import EmbeddingBatcher
+from .client_registry import get_client_registry
+from .model_router import ModelRouter, get_model_router
+from .usage_ledger import UsageLedger, get_usage_ledger, response_tokens
 import uuid
 import json
 
@@ -25,7 +31,15 @@ class LLMResponse:
 class LLMService:
     """OpenAI LLM integration service with rate limiting and error handling"""
     
-    def __init__(self, event_system: EventSystem, environment: str = "development"):
+    def __init__(
+        self,
+        event_system: EventSystem,
+        environment: str = "development",
+        rate_limiter: Optional[RateLimiter] = None,
+        client: Optional[openai.AsyncOpenAI] = None,
+        router: Optional[ModelRouter] = None,
+        ledger: Optional[UsageLedger] = None
+    ):
         self.logger = logging.getLogger(__name__)
         self.event_system = event_system
         
@@ -38,7 +52,8 @@ class LLMService:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
-        self.client = openai.OpenAI(api_key=self.api_key)
+        # Async client with a connection pool shared by every LLM service on the same loop
+        self._client = client
         
         # Model configuration based on environment
         self.models = {
@@ -46,42 +61,68 @@ class LLMService:
             "production": "gpt-4-turbo-preview"
         }
         self.default_model = self.models[environment]
+        # Chooses the model for calls made with a call_class
+        self.router = router or get_model_router()
+        # Token usage and latency of every call, per pipeline run
+        self.ledger = ledger or get_usage_ledger()
         
-        # Rate limiting setup
-        self.max_tokens_per_minute = 90000
-        self.token_bucket = self.max_tokens_per_minute
-        self.last_refill = time.time()
+        # Rate limiting is shared with every other LLM service in the process
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_tokens_per_minute = int(self.rate_limiter.tokens.capacity)
         
         # Model specific limits
         self.model_token_limits = {
             "gpt-3.5-turbo": 4096,
             "gpt-4-turbo-preview": 128000
         }
+        
+        # Embedding requests are batched per model
+        self._embedding_batchers: Dict[str, EmbeddingBatcher] = {}
     
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """The injected client, or the pooled one for the running loop"""
+        return self._client or get_client_registry().openai_client(self.api_key)
+
+    @client.setter
+    def client(self, client: Optional[openai.AsyncOpenAI]) -> None:
+        self._client = client
+
+    @property
+    def token_bucket(self) -> float:
+        """Tokens currently available in the shared limiter"""
+        return self.rate_limiter.tokens.level
+
+    @token_bucket.setter
+    def token_bucket(self, value: float) -> None:
+        # Bring the refill clock up to date so the new level starts from now
+        self.rate_limiter.tokens.refill()
+        self.rate_limiter.tokens.level = value
+
+    @property
+    def last_refill(self) -> float:
+        return self.rate_limiter.tokens.last_refill
+
     def _refill_token_bucket(self):
         """Refill token bucket based on time elapsed"""
-        now = time.time()
-        time_passed = now - self.last_refill
-        self.token_bucket = min(
-            self.max_tokens_per_minute,
-            self.token_bucket + (self.max_tokens_per_minute * time_passed / 60)
-        )
-        self.last_refill = now
-
-    def _check_rate_limit(self, tokens: int) -> bool:
-        """Check if we have enough tokens"""
-        self._refill_token_bucket()
-        if self.token_bucket >= tokens:
-            self.token_bucket -= tokens
-            return True
-        return False
+        self.rate_limiter.tokens.refill()
     
-    def _validate_max_tokens(self, model: str, max_tokens: Optional[int]) -> None:
-        """Validate max_tokens against model limits"""
-        if max_tokens is not None:
-            model_limit = self.model_token_limits.get(model)
-            if model_limit and max_tokens > model_limit:
-                raise ValueError(f"max_tokens exceeds model limit of {model_limit}")
+    def _validate_max_tokens(
+        self,
+        model: str,
+        max_tokens: Optional[int],
+        prompt_tokens: int = 0
+    ) -> None:
+        """Validate max_tokens and the prompt size against model limits"""
+        model_limit = self.model_token_limits.get(model)
+        if not model_limit:
+            return
+        if max_tokens is not None and max_tokens > model_limit:
+            raise ValueError(f"max_tokens exceeds model limit of {model_limit}")
+        if prompt_tokens + (max_tokens or 0) > model_limit:
+            raise ValueError(
+                f"Prompt of {prompt_tokens} tokens plus max_tokens exceeds model limit of {model_limit}"
+            )
     
     @backoff.on_exception(
         backoff.expo,
@@ -95,27 +136,37 @@ class LLMService:
         max_tokens: Optional[int] = None,
         temperature: float = 0.7,
         functions: Optional[List[Dict[str, Any]]] = None,
-        stream: bool = False
+        stream: bool = False,
+        call_class: Optional[str] = None
     ) -> Union[LLMResponse, AsyncGenerator[str, None]]:
-        """Generate chat completion with rate limiting and error handling"""
+        """Generate chat completion with rate limiting and error handling.
+
+        Without an explicit model, ``call_class`` lets the router pick one.
+        """
         try:
-            used_model = model or self.default_model
-            self._validate_max_tokens(used_model, max_tokens)
+            used_model = model or (
+                self.router.choose(call_class, self.default_model) if call_class else self.default_model
+            )
+            prompt_tokens = get_token_counter(used_model).count_messages(messages)
+            self._validate_max_tokens(used_model, max_tokens, prompt_tokens)
             
-            # Estimate tokens (simple estimation)
-            estimated_tokens = sum(len(m["content"]) // 4 for m in messages)
-            if not self._check_rate_limit(estimated_tokens):
+            # Wait for quota; only a request larger than the whole budget fails.
+            # Completion tokens count toward the quota too, so reserve max_tokens
+            estimated_tokens = prompt_tokens + (max_tokens or 0)
+            try:
+                await self.rate_limiter.acquire(estimated_tokens)
+            except RateLimitExceeded as e:
                 self.event_system.publish(
                     event_type="system.error",
                     source_agent="llm_service",
                     target_agent="system",
                     payload={
                         "error": "rate_limit_exceeded",
-                        "message": "Token bucket depleted"
+                        "message": str(e)
                     },
                     correlation_id=str(uuid.uuid4())
                 )
-                raise Exception("Rate limit exceeded")
+                raise
 
             kwargs = {
                 "model": used_model,
@@ -129,9 +180,24 @@ class LLMService:
                 kwargs["functions"] = functions
 
             if stream:
-                return self._stream_response(kwargs)
+                return self._stream_response(kwargs, prompt_tokens, call_class, estimated_tokens)
             
-            response = await self.client.chat.completions.create(**kwargs)
+            start = time.monotonic()
+            try:
+                response = await self.client.chat.completions.create(**kwargs)
+            except Exception:
+                # Nothing was consumed, hand the reservation back
+                self.rate_limiter.reconcile(estimated_tokens, 0)
+                latency_ms = (time.monotonic() - start) * 1000
+                self.router.record(used_model, latency_ms, success=False)
+                self.ledger.record("completion", used_model, latency_ms=latency_ms, success=False, call_class=call_class)
+                raise
+            latency_ms = (time.monotonic() - start) * 1000
+            self.router.record(used_model, latency_ms, success=True)
+            usage_prompt_tokens, completion_tokens = response_tokens(response)
+            self.ledger.record(
+                "completion", used_model, usage_prompt_tokens, completion_tokens, latency_ms, call_class=call_class
+            )
             
             # Fix function call handling
             function_call = None
@@ -151,8 +217,8 @@ class LLMService:
                 function_call=function_call
             )
             
-            # Update token bucket with actual usage
-            self.token_bucket -= response.usage.total_tokens
+            # Replace the estimate with the actual usage
+            self.rate_limiter.reconcile(estimated_tokens, response.usage.total_tokens)
             
             return llm_response
             
@@ -170,13 +236,25 @@ class LLMService:
             )
             raise 
 
-    async def _stream_response(self, kwargs: Dict[str, Any]) -> AsyncGenerator[str, None]:
+    async def _stream_response(
+        self,
+        kwargs: Dict[str, Any],
+        prompt_tokens: int = 0,
+        call_class: Optional[str] = None,
+        estimated_tokens: int = 0
+    ) -> AsyncGenerator[str, None]:
         """Handle streaming responses"""
+        start = time.monotonic()
+        success = True
+        counter = get_token_counter(kwargs["model"])
+        completion_tokens = 0
         try:
             async for chunk in await self.client.chat.completions.create(**kwargs):
                 if chunk.choices[0].delta.content is not None:
+                    completion_tokens += counter.count_text(chunk.choices[0].delta.content)
                     yield chunk.choices[0].delta.content
         except Exception as e:
+            success = False
             self.logger.error(f"Error in stream: {str(e)}")
             self.event_system.publish(
                 event_type="system.error",
@@ -189,23 +267,59 @@ class LLMService:
                 correlation_id=str(uuid.uuid4())
             )
             raise
+        finally:
+            # Streams report no usage here, so the prompt estimate and the
+            # counted reply are charged, and replace the max_tokens reservation
+            self.rate_limiter.reconcile(estimated_tokens, prompt_tokens + completion_tokens)
+            self.ledger.record(
+                "stream", kwargs["model"], prompt_tokens, completion_tokens,
+                latency_ms=(time.monotonic() - start) * 1000, success=success, call_class=call_class
+            )
 
-    @backoff.on_exception(
-        backoff.expo,
-        (RateLimitError, APIError, OpenAIError),  # Use correct error types
-        max_tries=3
-    )
     async def generate_embeddings(
         self,
         texts: List[str],
         model: str = "text-embedding-ada-002"
     ) -> List[List[float]]:
-        """Generate embeddings for given texts"""
+        """Generate embeddings for given texts.
+
+        Requests from concurrent callers are batched together and texts
+        embedded before are served from the batcher's cache.
+        """
         # Validate model
         valid_embedding_models = ["text-embedding-ada-002"]
         if model not in valid_embedding_models:
             raise ValueError(f"Model must be one of: {valid_embedding_models}")
-            
+        
+        batcher = self._embedding_batchers.get(model)
+        if batcher is None:
+            batcher = self._embedding_batchers[model] = EmbeddingBatcher(
+                lambda batch: self._request_embeddings(batch, model)
+            )
+        # Batches mix callers, so each caller is charged the token count of
+        # the texts it sent; texts served from the cache cost nothing
+        start = time.monotonic()
+        success = False
+        sent: List[str] = []
+        try:
+            embeddings, sent = await batcher.embed_many_with_misses(texts)
+            success = True
+            return embeddings
+        finally:
+            counter = get_token_counter(model)
+            self.ledger.record(
+                "embedding", model, sum(counter.count_text(text) for text in sent),
+                latency_ms=(time.monotonic() - start) * 1000,
+                cache_hit=success and bool(texts) and not sent, success=success
+            )
+
+    @backoff.on_exception(
+        backoff.expo,
+        (RateLimitError, APIError, OpenAIError),  # Use correct error types
+        max_tries=3
+    )
+    async def _request_embeddings(self, texts: List[str], model: str) -> List[List[float]]:
+        """Send one embeddings request for a batch of texts"""
         try:
             response = await self.client.embeddings.create(
                 model=model,
@@ -227,14 +341,20 @@ class LLMService:
             )
             raise 
 
+    def get_embedding_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get batching and cache statistics per embedding model"""
+        return {model: batcher.get_metrics() for model, batcher in self._embedding_batchers.items()}
+
     def get_token_usage(self) -> Dict[str, int]:
         """Get current token usage statistics"""
+        self._refill_token_bucket()
         return {
             "remaining_tokens": self.token_bucket,
-            "max_tokens_per_minute": self.max_tokens_per_minute
+            "max_tokens_per_minute": self.max_tokens_per_minute,
+            "remaining_requests": self.rate_limiter.requests.level,
+            "waiting_requests": self.rate_limiter.get_metrics()["waiting"]
         }
     
     def reset_rate_limit(self):
         """Reset rate limiting counters"""
-        self.token_bucket = self.max_tokens_per_minute
-        self.last_refill = time.time()
\ No newline at end of file
+        self.rate_limiter.reset()
\ No newline at end of file
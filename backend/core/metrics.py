@@ -0,0 +1,100 @@
+from typing import Dict, Any, Optional, Tuple
+import math
+import threading
+from array import array
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram.
+
+    Bucket bounds grow geometrically from ``min_ms`` by ``growth``, so
+    percentiles are reported with a relative error below ``growth - 1``
+    using a fixed, small array of counters regardless of sample count.
+    """
+    def __init__(self, min_ms: float = 0.001, max_ms: float = 600_000.0, growth: float = 1.08):
+        self.min_ms = min_ms
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self._bucket_count = int(math.ceil(math.log(max_ms / min_ms) / self._log_growth)) + 2
+        self._buckets = array("Q", bytes(8 * self._bucket_count))
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _bucket_index(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        index = int(math.log(value_ms / self.min_ms) / self._log_growth) + 1
+        return min(index, self._bucket_count - 1)
+
+    def _bucket_upper_bound(self, index: int) -> float:
+        return self.min_ms * self.growth ** index
+
+    def record(self, value_ms: float) -> None:
+        """Record one latency sample in milliseconds"""
+        self._buckets[self._bucket_index(value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def percentile(self, p: float) -> float:
+        """Get the latency at percentile ``p`` (0-100)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index, bucket in enumerate(self._buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(self._bucket_upper_bound(index), self.max_ms)
+        return self.max_ms
+
+    def reset(self) -> None:
+        """Drop all samples"""
+        for index in range(self._bucket_count):
+            self._buckets[index] = 0
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        """Get count, mean and tail percentiles"""
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms
+        }
+
+class LatencyRegistry:
+    """Latency histograms keyed by topic and listener name"""
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, topic: str, listener: str, value_ms: float) -> None:
+        """Record a listener invocation time"""
+        key = (topic, listener)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        histogram.record(value_ms)
+
+    def get(self, topic: str, listener: str) -> Optional[LatencyHistogram]:
+        """Get the histogram for a listener on a topic"""
+        return self._histograms.get((topic, listener))
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Get percentile summaries grouped by topic, then listener"""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (topic, listener), histogram in list(self._histograms.items()):
+            result.setdefault(topic, {})[listener] = histogram.snapshot()
+        return result
+
+    def reset(self) -> None:
+        """Drop all histograms"""
+        with self._lock:
+            self._histograms.clear()
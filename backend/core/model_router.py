@@ -0,0 +1,160 @@
+from typing import Dict, Any, Optional, List, Callable
+from collections import deque
+from dataclasses import dataclass
+import json
+import logging
+import os
+import time
+from .metrics import LatencyHistogram
+
+@dataclass
+class RoutePolicy:
+    """Models for one class of call, in order of preference.
+
+    A model is healthy while its error rate over the recent window stays
+    within ``max_error_rate`` and, once ``min_samples`` calls have been
+    seen, its p95 latency stays within ``max_p95_ms``.
+    """
+    models: List[str]
+    max_p95_ms: Optional[float] = None
+    max_error_rate: float = 0.25
+    min_samples: int = 10
+
+# Cheap, latency sensitive turns prefer the fast model; analysis prefers quality
+DEFAULT_POLICIES: Dict[str, RoutePolicy] = {
+    "chat": RoutePolicy(["gpt-3.5-turbo", "gpt-4-turbo-preview"], max_p95_ms=8000),
+    "summary": RoutePolicy(["gpt-4-turbo-preview", "gpt-3.5-turbo"]),
+    "analysis": RoutePolicy(["gpt-4-turbo-preview", "gpt-3.5-turbo"]),
+    "feature": RoutePolicy(["gpt-4-turbo-preview", "gpt-3.5-turbo"])
+}
+
+class ModelStats:
+    """Live latency and outcome statistics for one model"""
+    def __init__(self, window: int):
+        self.latency = LatencyHistogram()
+        self.outcomes: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": len(self.outcomes),
+            "error_rate": self.error_rate,
+            "p50_ms": self.latency.percentile(50),
+            "p95_ms": self.latency.percentile(95),
+            "consecutive_failures": self.consecutive_failures
+        }
+
+class ModelRouter:
+    """Picks a model per call class from a policy and live statistics.
+
+    Healthy models are tried in policy order, so the first one is used
+    until it degrades and the next takes over. A model that fails
+    ``failure_threshold`` times in a row is skipped for ``cooldown_s``.
+    When no model is healthy, the one with the lowest error rate goes first.
+    """
+    def __init__(
+        self,
+        policies: Optional[Dict[str, RoutePolicy]] = None,
+        window: int = 100,
+        failure_threshold: int = 3,
+        cooldown_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self._clock = clock
+        self._stats: Dict[str, ModelStats] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Dict[str, Any]], **kwargs) -> "ModelRouter":
+        """Build a router from ``{call_class: {"models": [...], ...}}``"""
+        return cls({name: RoutePolicy(**policy) for name, policy in config.items()}, **kwargs)
+
+    def _get_stats(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = ModelStats(self.window)
+        return stats
+
+    def is_healthy(self, model: str, policy: RoutePolicy) -> bool:
+        """Check a model against a policy's limits"""
+        stats = self._stats.get(model)
+        if stats is None:
+            return True
+        if stats.cooldown_until > self._clock():
+            return False
+        if stats.error_rate > policy.max_error_rate:
+            return False
+        if (
+            policy.max_p95_ms is not None
+            and stats.latency.count >= policy.min_samples
+            and stats.latency.percentile(95) > policy.max_p95_ms
+        ):
+            return False
+        return True
+
+    def candidates(self, call_class: str) -> List[str]:
+        """Models to try for a call, best first; empty for an unknown class"""
+        policy = self.policies.get(call_class)
+        if policy is None:
+            return []
+        healthy = [model for model in policy.models if self.is_healthy(model, policy)]
+        degraded = sorted(
+            (model for model in policy.models if model not in healthy),
+            key=lambda model: self._get_stats(model).error_rate
+        )
+        return healthy + degraded
+
+    def choose(self, call_class: str, default: Optional[str] = None) -> Optional[str]:
+        """Best model for a call class, or ``default`` for an unknown class"""
+        candidates = self.candidates(call_class)
+        return candidates[0] if candidates else default
+
+    def record(self, model: str, latency_ms: float, success: bool) -> None:
+        """Record the outcome of one call to a model"""
+        stats = self._get_stats(model)
+        stats.outcomes.append(success)
+        if success:
+            stats.latency.record(latency_ms)
+            stats.consecutive_failures = 0
+            return
+        stats.consecutive_failures += 1
+        if stats.consecutive_failures >= self.failure_threshold:
+            stats.cooldown_until = self._clock() + self.cooldown_s
+            stats.consecutive_failures = 0
+            self.logger.warning(f"Model {model} failing, skipping it for {self.cooldown_s}s")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the current choice per call class and statistics per model"""
+        return {
+            "routes": {call_class: self.candidates(call_class) for call_class in self.policies},
+            "models": {model: stats.snapshot() for model, stats in self._stats.items()}
+        }
+
+_default_router: Optional[ModelRouter] = None
+
+def get_model_router() -> ModelRouter:
+    """Get the process-wide router shared by every LLM service.
+
+    ``LLM_ROUTING_POLICY`` may name a JSON file of policies that replaces
+    the defaults.
+    """
+    global _default_router
+    if _default_router is None:
+        policy_path = os.getenv("LLM_ROUTING_POLICY")
+        if policy_path:
+            with open(policy_path) as f:
+                _default_router = ModelRouter.from_config(json.load(f))
+        else:
+            _default_router = ModelRouter()
+    return _default_router
@@ -0,0 +1,134 @@
+from typing import Dict, Any, Optional, List, Sequence, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import string
+import threading
+
+SCHEMA_INSTRUCTIONS = (
+    "You are a structured data generator.\n"
+    "Output must be valid JSON matching this schema:\n"
+    "{schema}\n\n"
+    "Only respond with the JSON, no other text."
+)
+
+def render_value(value: Any) -> str:
+    """Text for a template field; structured values are serialized the same way every time"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, default=str)
+
+class PromptTemplate:
+    """Chat messages with ``str.format`` fields, parsed once.
+
+    Messages without fields form a static prefix that is built once and is
+    byte-identical on every render, so providers can cache it; put the
+    instructions first and the variable content last.
+    """
+    def __init__(self, name: str, messages: Sequence[Tuple[str, str]]):
+        self.name = name
+        formatter = string.Formatter()
+        self._messages: List[Tuple[str, str, bool]] = []
+        self.fields = set()
+        for role, template in messages:
+            fields = {field for _, field, _, _ in formatter.parse(template) if field}
+            self.fields |= fields
+            # Static messages are formatted once, which resolves escaped braces
+            self._messages.append((role, template if fields else template.format(), bool(fields)))
+        prefix_length = 0
+        for _, _, has_fields in self._messages:
+            if has_fields:
+                break
+            prefix_length += 1
+        self.prefix: Tuple[Dict[str, str], ...] = tuple(
+            {"role": role, "content": template} for role, template, _ in self._messages[:prefix_length]
+        )
+        self.prefix_length = prefix_length
+
+    def render(self, **values: Any) -> List[Dict[str, str]]:
+        """Build the messages, serializing non-string values"""
+        missing = self.fields - set(values)
+        if missing:
+            raise KeyError(f"Prompt {self.name} is missing values for: {sorted(missing)}")
+        rendered = {key: render_value(value) for key, value in values.items()}
+        messages = [dict(message) for message in self.prefix]
+        for role, template, has_fields in self._messages[self.prefix_length:]:
+            messages.append({"role": role, "content": template.format(**rendered) if has_fields else template})
+        return messages
+
+class PromptRegistry:
+    """Named prompt templates plus a cache of rendered schema instructions.
+
+    Schemas are serialized once per schema object rather than on every
+    structured output call. The cache holds a reference to each schema, so
+    an entry can never be confused with a later object at the same address.
+    """
+    def __init__(self, max_schemas: int = 128):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._schemas: "OrderedDict[int, Tuple[Any, Dict[str, str], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_schemas = max_schemas
+        self.schema_hits = 0
+        self.schema_misses = 0
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        """Add a template, replacing any with the same name"""
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def render(self, template_name: str, /, **values: Any) -> List[Dict[str, str]]:
+        """Render a registered template"""
+        return self._templates[template_name].render(**values)
+
+    def _schema_entry(self, schema: Dict[str, Any]) -> Tuple[Any, Dict[str, str], str]:
+        key = id(schema)
+        with self._lock:
+            entry = self._schemas.get(key)
+            if entry is not None and entry[0] is schema:
+                self._schemas.move_to_end(key)
+                self.schema_hits += 1
+                return entry
+            self.schema_misses += 1
+            message = {
+                "role": "system",
+                "content": SCHEMA_INSTRUCTIONS.format(schema=json.dumps(schema, indent=2))
+            }
+            digest = hashlib.sha256(
+                json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+            ).hexdigest()
+            entry = (schema, message, digest)
+            self._schemas[key] = entry
+            if len(self._schemas) > self.max_schemas:
+                self._schemas.popitem(last=False)
+            return entry
+
+    def schema_message(self, schema: Dict[str, Any]) -> Dict[str, str]:
+        """System message asking for JSON matching ``schema``.
+
+        Schemas are treated as immutable; mutate a copy instead.
+        """
+        return dict(self._schema_entry(schema)[1])
+
+    def schema_digest(self, schema: Dict[str, Any]) -> str:
+        """Content hash of a schema, for cache keys"""
+        return self._schema_entry(schema)[2]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "templates": len(self._templates),
+            "schemas": len(self._schemas),
+            "schema_hits": self.schema_hits,
+            "schema_misses": self.schema_misses
+        }
+
+_default_registry: Optional[PromptRegistry] = None
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get the process-wide registry shared by agents and LLM services"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = PromptRegistry()
+    return _default_registry
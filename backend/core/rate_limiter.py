@@ -0,0 +1,166 @@
+from typing import Dict, Any, Optional, Callable
+import asyncio
+import logging
+import os
+import time
+
+DEFAULT_TOKENS_PER_MINUTE = 90000
+DEFAULT_REQUESTS_PER_MINUTE = 500
+
+class RateLimitExceeded(Exception):
+    """Raised for a request that could never fit within the per-minute limits"""
+    pass
+
+class TokenBucket:
+    """Bucket refilled continuously to ``capacity`` over one minute.
+
+    The level may go negative when actual usage exceeds what was reserved;
+    that debt is repaid by refills before anything else is granted.
+    """
+    def __init__(self, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self.level = float(capacity)
+        self._clock = clock
+        self.last_refill = clock()
+
+    def refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available, after refilling"""
+        self.refill()
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def reset(self) -> None:
+        self.level = float(self.capacity)
+        self.last_refill = self._clock()
+
+class RateLimiter:
+    """Token and request per-minute limiter for LLM calls.
+
+    ``acquire`` waits until both buckets have room instead of failing.
+    Callers are served in FIFO order: the caller at the head of the line
+    holds the lock while it sleeps, so a large request is never starved by
+    a stream of small ones. After a call, ``reconcile`` replaces the
+    estimate with the real ``usage.total_tokens``.
+    """
+    def __init__(
+        self,
+        tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+        requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiting = 0
+        self.granted = 0
+        self.waited = 0
+        self.total_wait_s = 0.0
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio.Lock binds to one loop; a new loop gets a new line
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _check_fits(self, tokens: int) -> None:
+        if tokens > self.tokens.capacity:
+            raise RateLimitExceeded(
+                f"Rate limit exceeded: request of {tokens} tokens exceeds "
+                f"{self.tokens.capacity:.0f} tokens per minute"
+            )
+
+    def _wait_time(self, tokens: int) -> float:
+        return max(self.tokens.wait_time(tokens), self.requests.wait_time(1))
+
+    def _take(self, tokens: int) -> None:
+        self.tokens.level -= tokens
+        self.requests.level -= 1
+        self.granted += 1
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Reserve capacity only if it is available now and nobody is waiting"""
+        self._check_fits(tokens)
+        if self._waiting or self._wait_time(tokens) > 0:
+            return False
+        self._take(tokens)
+        return True
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait for room for one request of ``tokens`` and reserve it.
+
+        Returns the seconds spent waiting.
+        """
+        self._check_fits(tokens)
+        if not self._waiting and self._wait_time(tokens) <= 0:
+            self._take(tokens)
+            return 0.0
+
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._get_lock():
+                while True:
+                    delay = self._wait_time(tokens)
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self._take(tokens)
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - start
+        self.waited += 1
+        self.total_wait_s += waited
+        return waited
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct a reservation once the real token usage is known"""
+        self.tokens.level = min(
+            self.tokens.capacity,
+            self.tokens.level + estimated_tokens - actual_tokens
+        )
+
+    def reset(self) -> None:
+        """Refill both buckets"""
+        self.tokens.reset()
+        self.requests.reset()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get remaining capacity and wait statistics"""
+        self.tokens.refill()
+        self.requests.refill()
+        return {
+            "remaining_tokens": self.tokens.level,
+            "remaining_requests": self.requests.level,
+            "tokens_per_minute": self.tokens.capacity,
+            "requests_per_minute": self.requests.capacity,
+            "waiting": self._waiting,
+            "granted": self.granted,
+            "waited": self.waited,
+            "total_wait_s": self.total_wait_s
+        }
+
+_default_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide limiter shared by every LLM service.
+
+    Limits come from ``LLM_TOKENS_PER_MINUTE`` and ``LLM_REQUESTS_PER_MINUTE``.
+    """
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = RateLimiter(
+            tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)),
+            requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE))
+        )
+    return _default_limiter
@@ -0,0 +1,276 @@
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Returned by memory lookups that miss, since None is a valid cached value
+_MISS = object()
+
+def make_cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    schema: Optional[Dict[str, Any]] = None,
+    temperature: Optional[float] = None
+) -> str:
+    """Content address of an LLM request"""
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "schema": schema, "temperature": temperature},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Two-tier cache of LLM responses keyed by request content.
+
+    An in-memory LRU sits in front of an optional SQLite table. Entries
+    expire after ``ttl_seconds``. The SQLite tier evicts least recently
+    used rows beyond ``max_disk_entries`` or ``max_disk_bytes`` of stored
+    JSON. Values must be JSON serializable; both tiers hold the serialized
+    form, so callers always get a fresh copy they are free to mutate.
+    Async callers use ``aget``/``aset`` so SQLite access stays off the
+    event loop; access times of disk hits are written with the next write.
+    """
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        clock: Callable[[], float] = time.time
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Guards the connection separately, so memory hits never wait on disk I/O
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._touched: Dict[str, float] = {}
+        if db_path:
+            self._conn = self._initialize_database(db_path)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _initialize_database(self, db_path: str) -> sqlite3.Connection:
+        """Open the SQLite tier and create its table"""
+        if db_path != ":memory:" and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses(last_access)"
+        )
+        conn.commit()
+        return conn
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return now + self.ttl_seconds if self.ttl_seconds is not None else None
+
+    def _remember(self, key: str, raw: str, expires_at: Optional[float]) -> None:
+        self._memory[key] = (raw, expires_at)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, key: str, now: float) -> Any:
+        """Look a key up in the memory tier, returning _MISS if absent or expired"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return _MISS
+            raw, expires_at = entry
+            if expires_at is None or expires_at > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(raw)
+            del self._memory[key]
+            return _MISS
+
+    def _get_disk(self, key: str, now: float) -> Optional[Any]:
+        """Look a key up in the SQLite tier, promoting hits to memory"""
+        row = None
+        with self._db_lock:
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] is None or row[1] > now:
+                        # Written with the next write instead of a commit per hit
+                        self._touched[key] = now
+                    else:
+                        self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                        self._conn.commit()
+                        row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            raw, expires_at = row
+            self._remember(key, raw, expires_at)
+            self.disk_hits += 1
+            return json.loads(raw)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss"""
+        now = self._clock()
+        value = self._get_memory(key, now)
+        if value is not _MISS:
+            return value
+        return self._get_disk(key, now)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Like get, but a SQLite lookup runs in a worker thread instead of on the event loop"""
+        now = self._clock()
+        value = self._get_memory(key, now)
+        if value is not _MISS:
+            return value
+        if self._conn is None:
+            return self._get_disk(key, now)
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    def _set_memory(self, key: str, value: Any, now: float) -> Tuple[str, Optional[float]]:
+        raw = json.dumps(value, default=str)
+        expires_at = self._expiry(now)
+        with self._lock:
+            self._remember(key, raw, expires_at)
+            self.writes += 1
+        return raw, expires_at
+
+    def _set_disk(self, key: str, raw: str, expires_at: Optional[float], now: float) -> None:
+        with self._db_lock:
+            if self._conn is None:
+                return
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, raw, len(raw), expires_at, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in both tiers"""
+        now = self._clock()
+        raw, expires_at = self._set_memory(key, value, now)
+        self._set_disk(key, raw, expires_at, now)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Like set, but the SQLite write runs in a worker thread instead of on the event loop"""
+        now = self._clock()
+        raw, expires_at = self._set_memory(key, value, now)
+        if self._conn is not None:
+            await asyncio.to_thread(self._set_disk, key, raw, expires_at, now)
+
+    def _flush_touched(self) -> None:
+        """Write the access times of disk hits since the last write"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_responses SET last_access = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then least recently used rows over the limits"""
+        cursor = self._conn.execute(
+            "DELETE FROM llm_responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        self.evictions += max(cursor.rowcount, 0)
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()
+        if count <= self.max_disk_entries and total_bytes <= self.max_disk_bytes:
+            return
+        excess_rows = max(0, count - self.max_disk_entries)
+        excess_bytes = total_bytes - self.max_disk_bytes
+        removed = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM llm_responses ORDER BY last_access"
+        ):
+            if excess_rows <= 0 and excess_bytes <= 0:
+                break
+            removed.append((key,))
+            excess_rows -= 1
+            excess_bytes -= size
+        self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", removed)
+        self.evictions += len(removed)
+
+    def clear(self) -> None:
+        """Drop every cached response"""
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            self._touched.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_responses")
+                self._conn.commit()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get hit, miss and size counters"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        metrics = {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory)
+        }
+        with self._db_lock:
+            if self._conn is not None:
+                metrics["disk_entries"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM llm_responses"
+                ).fetchone()[0]
+        return metrics
+
+    def close(self) -> None:
+        """Close the SQLite tier"""
+        with self._db_lock:
+            if self._conn is not None:
+                self._flush_touched()
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+_default_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache.
+
+    The cache is kept in memory only unless ``LLM_CACHE_DB_PATH`` names a
+    SQLite file for the disk tier.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache(os.getenv("LLM_CACHE_DB_PATH") or None)
+    return _default_cache
@@ -0,0 +1,212 @@
+from typing import Dict, Any, Optional, List, Callable, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+@dataclass(order=True)
+class ScheduledRetry:
+    """A retry waiting in the scheduler heap, ordered by due time"""
+    due: float
+    seq: int
+    key: str = field(compare=False)
+    callback: Callable[[], None] = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    loop: Optional[asyncio.AbstractEventLoop] = field(compare=False, default=None)
+
+class RetryScheduler:
+    """Heap-based scheduler that runs delayed retries without blocking callers.
+
+    A single daemon thread sleeps until the earliest due retry. Retries scheduled
+    from inside a running event loop are handed back to that loop, so the
+    re-publish happens on the thread that failed. Retries scheduled without a
+    running loop, or whose loop has stopped, never run on the daemon thread:
+    they wait until the owner calls ``run_deferred`` or ``run_pending``.
+    Attempt counts are kept in a bounded LRU that forgets keys after
+    ``attempt_ttl`` seconds.
+    """
+    def __init__(
+        self,
+        max_pending: int = 10000,
+        max_tracked_keys: int = 10000,
+        attempt_ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_pending = max_pending
+        self.max_tracked_keys = max_tracked_keys
+        self.attempt_ttl = attempt_ttl
+        self._clock = clock
+        self._heap: List[ScheduledRetry] = []
+        # Retries with no loop to run on, left for the owner's thread
+        self._deferred: List[ScheduledRetry] = []
+        self._seq = itertools.count()
+        self._attempts: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._stats = {
+            "scheduled": 0,
+            "executed": 0,
+            "rejected": 0,
+            "failed": 0
+        }
+
+    def attempts(self, key: str) -> int:
+        """Get the number of retries already made for a key"""
+        with self._cond:
+            self._expire_attempts()
+            entry = self._attempts.get(key)
+            return entry[0] if entry else 0
+
+    def record_attempt(self, key: str) -> int:
+        """Count another retry for a key and return the new total"""
+        with self._cond:
+            self._expire_attempts()
+            count = self._attempts.pop(key, (0, 0.0))[0] + 1
+            self._attempts[key] = (count, self._clock())
+            while len(self._attempts) > self.max_tracked_keys:
+                self._attempts.popitem(last=False)
+            return count
+
+    def forget(self, key: str) -> None:
+        """Drop retry bookkeeping for a key"""
+        if key in self._attempts:
+            with self._cond:
+                self._attempts.pop(key, None)
+
+    def _expire_attempts(self) -> None:
+        """Drop attempt counts that have not been touched within the TTL"""
+        cutoff = self._clock() - self.attempt_ttl
+        while self._attempts:
+            key, (count, last_seen) = next(iter(self._attempts.items()))
+            if last_seen >= cutoff:
+                break
+            self._attempts.popitem(last=False)
+
+    def schedule(self, key: str, callback: Callable[[], None], delay: float) -> bool:
+        """Schedule a callback to run after ``delay`` seconds.
+
+        Returns False when the scheduler is full and the retry was rejected.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        now = self._clock()
+        with self._cond:
+            if len(self._heap) + len(self._deferred) >= self.max_pending:
+                self._stats["rejected"] += 1
+                return False
+            retry = ScheduledRetry(now + delay, next(self._seq), key, callback, now, loop)
+            self._stats["scheduled"] += 1
+            if loop is None:
+                heapq.heappush(self._deferred, retry)
+                return True
+            heapq.heappush(self._heap, retry)
+            self._ensure_thread()
+            self._cond.notify()
+        return True
+
+    def _ensure_thread(self) -> None:
+        """Start the timer thread on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="event-retry-scheduler", daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _pop_due(heap: List[ScheduledRetry], now: float) -> List[ScheduledRetry]:
+        """Pop every retry due at or before ``now``"""
+        due = []
+        while heap and heap[0].due <= now:
+            due.append(heapq.heappop(heap))
+        return due
+
+    def _execute(self, retry: ScheduledRetry) -> None:
+        """Run a retry, on its originating event loop when that loop is still alive"""
+        self._stats["executed"] += 1
+        if retry.loop is not None and retry.loop.is_running():
+            retry.loop.call_soon_threadsafe(self._invoke, retry)
+        else:
+            self._invoke(retry)
+
+    def _invoke(self, retry: ScheduledRetry) -> None:
+        """Invoke a retry callback, logging failures"""
+        try:
+            retry.callback()
+        except Exception as e:
+            self._stats["failed"] += 1
+            self.logger.error(f"Retry for {retry.key} failed: {e}", exc_info=True)
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """Run every retry due at ``now`` on the calling thread"""
+        now = self._clock() if now is None else now
+        with self._cond:
+            due = sorted(self._pop_due(self._heap, now) + self._pop_due(self._deferred, now))
+        for retry in due:
+            self._execute(retry)
+        return len(due)
+
+    def run_deferred(self) -> int:
+        """Run the due retries that have no event loop on the calling thread"""
+        # Unlocked peek keeps the common nothing-due case cheap
+        if not self._deferred or self._deferred[0].due > self._clock():
+            return 0
+        with self._cond:
+            due = self._pop_due(self._deferred, self._clock())
+        for retry in due:
+            self._execute(retry)
+        return len(due)
+
+    def _run(self) -> None:
+        """Timer thread loop"""
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait_time = self._heap[0].due - self._clock()
+                    if wait_time <= 0:
+                        break
+                    self._cond.wait(timeout=wait_time)
+                if self._stopped:
+                    return
+                due = self._pop_due(self._heap, self._clock())
+            for retry in due:
+                if retry.loop.is_running():
+                    self._execute(retry)
+                    continue
+                with self._cond:
+                    heapq.heappush(self._deferred, retry)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get retry queue depth, age and counters"""
+        now = self._clock()
+        with self._cond:
+            oldest = min((r.enqueued_at for r in self._heap + self._deferred), default=None)
+            next_due = min((h[0].due for h in (self._heap, self._deferred) if h), default=None)
+            return {
+                "queue_depth": len(self._heap) + len(self._deferred),
+                "oldest_age_s": now - oldest if oldest is not None else 0.0,
+                "next_due_in_s": max(0.0, next_due - now) if next_due is not None else None,
+                "tracked_keys": len(self._attempts),
+                **self._stats
+            }
+
+    def shutdown(self) -> None:
+        """Stop the timer thread and drop pending retries"""
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            self._deferred.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
@@ -0,0 +1,84 @@
+from typing import Dict, Any, Optional, Callable, Generic, TypeVar
+from collections import OrderedDict
+import threading
+import time
+import uuid
+
+T = TypeVar("T")
+
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_SESSION_TTL_S = 3600.0
+
+class SessionStore(Generic[T]):
+    """Per-session state under generated ids, bounded in count and idle time.
+
+    Sessions exist only once ``create`` has made them; unknown ids are not
+    created on lookup. Only the ``max_sessions`` most recently used sessions
+    are kept, and a session unused for ``ttl_s`` seconds expires.
+    """
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        ttl_s: float = DEFAULT_SESSION_TTL_S,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._clock = clock
+        # Session id -> (last used, value), least recently used first
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def create(self, value: T) -> str:
+        """Store a new session and return its id"""
+        session_id = str(uuid.uuid4())
+        with self._lock:
+            self._expire()
+            self._sessions[session_id] = (self._clock(), value)
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        return session_id
+
+    def get(self, session_id: str) -> Optional[T]:
+        """Get a live session's value, marking it used, or None"""
+        with self._lock:
+            self._expire()
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (self._clock(), entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def close(self, session_id: str) -> bool:
+        """Forget a session; False when it did not exist"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self) -> None:
+        """Drop sessions idle for longer than the TTL; the oldest come first"""
+        cutoff = self._clock() - self.ttl_s
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if last_used > cutoff:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "created": self.created,
+                "evicted": self.evicted,
+                "expired": self.expired
+            }
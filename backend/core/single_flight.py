@@ -0,0 +1,79 @@
+from typing import Dict, Any, Optional, Callable, Awaitable, Hashable
+import asyncio
+import copy
+import logging
+
+class _Flight:
+    """One in-flight call and the number of callers awaiting it"""
+    __slots__ = ("task", "loop", "waiters")
+
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop):
+        self.task = task
+        self.loop = loop
+        self.waiters = 0
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key onto one shared task.
+
+    The first caller for a key starts the call; callers arriving while it
+    is in flight await the same task. A caller that is cancelled only
+    stops waiting, and the shared call is cancelled once no caller is left.
+    Callers other than the first get a deep copy of the result, so no
+    caller sees another's mutations.
+    """
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executed = 0
+        self.deduplicated = 0
+        self.cancelled = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` for ``key``, or join the call already in flight"""
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        leader = flight is None or flight.loop is not loop or flight.task.done()
+        if leader:
+            flight = _Flight(loop.create_task(fn()), loop)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.executed += 1
+        else:
+            self.deduplicated += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller has gone away, nobody needs the result
+                flight.task.cancel()
+                self.cancelled += 1
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        return len(self._flights)
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Get executed, saved and cancelled call counts"""
+        return {
+            "in_flight": len(self._flights),
+            "executed": self.executed,
+            "deduplicated": self.deduplicated,
+            "cancelled": self.cancelled
+        }
+
+_default_single_flight: Optional[SingleFlight] = None
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide group shared by every LLM service"""
+    global _default_single_flight
+    if _default_single_flight is None:
+        _default_single_flight = SingleFlight()
+    return _default_single_flight
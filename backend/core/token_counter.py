@@ -0,0 +1,167 @@
+from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+import hashlib
+import logging
+import re
+import threading
+
+try:
+    import tiktoken
+    import tiktoken.load
+except ImportError:  # pragma: no cover - tiktoken is optional
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Chat formatting overhead, as documented for the OpenAI chat models
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
+TOKENS_PER_REPLY = 3
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Heuristic pieces: words, digit groups (BPE splits numbers in threes),
+# single punctuation marks, and runs of newlines or indentation
+_HEURISTIC_PATTERN = re.compile(r"[^\W\d_]+|\d{1,3}|\n+|[ \t]{2,}|[^\w\s]|_")
+
+# Loaded encodings by name; None marks an encoding that could not be loaded
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+# Serializes loads, which swap out tiktoken's downloader while they run
+_load_lock = threading.Lock()
+
+class EncodingNotCachedError(Exception):
+    """Raised in place of the download tiktoken makes for a file missing from its cache"""
+    pass
+
+def _refuse_download(blobpath: str) -> bytes:
+    raise EncodingNotCachedError(f"{blobpath} is not in the tiktoken cache")
+
+def _get_cached_encoding(name: str) -> Any:
+    """``tiktoken.get_encoding``, failing instead of downloading on a cache miss"""
+    with _load_lock:
+        download = tiktoken.load.read_file
+        tiktoken.load.read_file = _refuse_download
+        try:
+            return tiktoken.get_encoding(name)
+        finally:
+            tiktoken.load.read_file = download
+
+def _load_encoding(model: Optional[str]) -> Optional[Any]:
+    """Load the tiktoken encoding for a model, or None when unavailable.
+
+    Only encodings already in tiktoken's local cache are loaded, so counting
+    never downloads on the event loop; deployments pre-seed the cache, e.g.
+    by calling ``tiktoken.get_encoding`` once at build time with
+    ``TIKTOKEN_CACHE_DIR`` set. Misses are remembered so the heuristic is
+    used without checking again on every call.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        name = tiktoken.encoding_name_for_model(model) if model else DEFAULT_ENCODING
+    except KeyError:
+        name = DEFAULT_ENCODING
+    with _encodings_lock:
+        if name in _encodings:
+            return _encodings[name]
+    encoding = None
+    # Loaded outside the lock so other models' counters are not held up
+    try:
+        encoding = _get_cached_encoding(name)
+    except EncodingNotCachedError:
+        logger.warning(f"Token encoding {name} is not in the tiktoken cache, using heuristic counts")
+    except Exception as e:
+        logger.warning(f"Token encoding {name} unavailable, using heuristic counts: {e}")
+    with _encodings_lock:
+        return _encodings.setdefault(name, encoding)
+
+def heuristic_token_count(text: str) -> int:
+    """Approximate BPE token count without an encoding.
+
+    Punctuation is counted per character, so JSON-heavy prompts are not
+    under-counted the way a characters-divided-by-four estimate does, while
+    common words count as one token each.
+    """
+    count = 0
+    for piece in _HEURISTIC_PATTERN.findall(text):
+        if piece[0].isalpha():
+            # Long words are split into several tokens
+            count += 1 + len(piece) // 10
+        else:
+            count += 1
+    return count
+
+class TokenCounter:
+    """Counts prompt tokens for one model.
+
+    Uses the model's tiktoken encoding when it can be loaded and the
+    heuristic otherwise. Counts are memoized by a hash of the text, so the
+    long system prompts and schemas sent with every request are only
+    encoded once.
+    """
+    def __init__(self, model: Optional[str] = None, max_cache_entries: int = 4096):
+        self.model = model
+        self.max_cache_entries = max_cache_entries
+        self._encoding = _load_encoding(model)
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the model's real encoding"""
+        return self._encoding is not None
+
+    def count_text(self, text: str) -> int:
+        """Count the tokens in a string"""
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            count = self._cache.get(key)
+            if count is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return count
+        if self._encoding is not None:
+            count = len(self._encoding.encode(text, disallowed_special=()))
+        else:
+            count = heuristic_token_count(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = count
+            if len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+        return count
+
+    def count_messages(self, messages: List[Dict[str, Any]]) -> int:
+        """Count the prompt tokens of chat messages, including formatting"""
+        total = TOKENS_PER_REPLY
+        for message in messages:
+            total += TOKENS_PER_MESSAGE
+            for key, value in message.items():
+                if isinstance(value, str):
+                    total += self.count_text(value)
+                if key == "name":
+                    total += TOKENS_PER_NAME
+        return total
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get cache statistics and whether counts are exact"""
+        return {
+            "exact": self.exact,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+_counters: Dict[Optional[str], TokenCounter] = {}
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """Get the shared counter for a model"""
+    counter = _counters.get(model)
+    if counter is None:
+        counter = _counters.setdefault(model, TokenCounter(model))
+    return counter
@@ -0,0 +1,169 @@
+from typing import Dict, Any, Optional, List, Tuple, Callable
+import threading
+
+SINGLE_LEVEL_WILDCARD = "*"
+MULTI_LEVEL_WILDCARD = "#"
+PARAMETER_SEGMENT = "{param}"
+
+# Topics remembered per cache; agent ids make the topic space open-ended
+MAX_CACHE_ENTRIES = 4096
+
+def is_wildcard_pattern(pattern: str) -> bool:
+    """Check whether a subscription pattern contains wildcard segments"""
+    return any(
+        part in (SINGLE_LEVEL_WILDCARD, MULTI_LEVEL_WILDCARD)
+        for part in pattern.split(".")
+    )
+
+class TrieNode:
+    """Node of a dot-separated topic trie"""
+    __slots__ = ("children", "terminal", "listeners")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        self.terminal = False
+        self.listeners: List[Callable] = []
+
+    def child(self, segment: str) -> "TrieNode":
+        node = self.children.get(segment)
+        if node is None:
+            node = self.children[segment] = TrieNode()
+        return node
+
+class TopicSchema:
+    """Valid topic structure compiled into a trie.
+
+    Built once from a nested event type definition such as
+    ``EventSystem.VALID_EVENT_TYPES``. Segments that hold an agent id are
+    stored as a parameter node that accepts any single segment. Lookups are
+    cached, so validating a topic seen before is one dict lookup; the cache
+    is cleared once it holds ``max_cache_entries`` topics.
+    """
+    def __init__(self, max_cache_entries: int = MAX_CACHE_ENTRIES):
+        self.root = TrieNode()
+        self.max_cache_entries = max_cache_entries
+        self._cache: Dict[str, bool] = {}
+
+    @classmethod
+    def from_event_types(cls, event_types: Dict[str, Dict[str, List[str]]]) -> "TopicSchema":
+        """Compile ``{"system": {group: [events]}, "agent": {"events": [events]}}``"""
+        schema = cls()
+        for category, groups in event_types.items():
+            for events in groups.values():
+                for event in events:
+                    if category == "agent":
+                        schema.add(f"agent.{PARAMETER_SEGMENT}.{event}")
+                    else:
+                        schema.add(f"{category}.{event}")
+        return schema
+
+    def add(self, topic: str) -> None:
+        """Register a valid topic, using PARAMETER_SEGMENT for free segments"""
+        node = self.root
+        for part in topic.split("."):
+            node = node.child(part)
+        node.terminal = True
+        self._cache.clear()
+
+    def is_valid(self, pattern: str) -> bool:
+        """Check whether a topic, or any topic a wildcard pattern covers, is valid"""
+        result = self._cache.get(pattern)
+        if result is None:
+            result = self._matches(self.root, pattern.split("."), 0)
+            if len(self._cache) >= self.max_cache_entries:
+                self._cache.clear()
+            self._cache[pattern] = result
+        return result
+
+    def _matches(self, node: TrieNode, parts: List[str], index: int) -> bool:
+        if index == len(parts):
+            return node.terminal
+        part = parts[index]
+        if part == MULTI_LEVEL_WILDCARD:
+            # Consume zero or more levels
+            if self._matches(node, parts, index + 1):
+                return True
+            return any(self._matches(child, parts, index) for child in node.children.values())
+        if part == SINGLE_LEVEL_WILDCARD:
+            return any(self._matches(child, parts, index + 1) for child in node.children.values())
+        child = node.children.get(part)
+        if child is not None and self._matches(child, parts, index + 1):
+            return True
+        param = node.children.get(PARAMETER_SEGMENT)
+        return param is not None and self._matches(param, parts, index + 1)
+
+class TopicRouter:
+    """Routes concrete topics to listeners subscribed with wildcard patterns.
+
+    ``*`` matches exactly one topic level and ``#`` matches zero or more.
+    The listener set resolved for each topic is cached until the
+    subscriptions change, so routing a publish is one dict lookup; the
+    cache is cleared once it holds ``max_cache_entries`` topics.
+    """
+    def __init__(self, max_cache_entries: int = MAX_CACHE_ENTRIES):
+        self.root = TrieNode()
+        self.max_cache_entries = max_cache_entries
+        self._cache: Dict[str, Tuple[Callable, ...]] = {}
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, pattern: str, listener: Callable) -> None:
+        """Subscribe a listener to a pattern"""
+        with self._lock:
+            node = self.root
+            for part in pattern.split("."):
+                node = node.child(part)
+            node.listeners.append(listener)
+            self._count += 1
+            self._cache = {}
+
+    def remove(self, pattern: str, listener: Callable) -> bool:
+        """Unsubscribe a listener from a pattern"""
+        with self._lock:
+            node = self.root
+            for part in pattern.split("."):
+                node = node.children.get(part)
+                if node is None:
+                    return False
+            try:
+                node.listeners.remove(listener)
+            except ValueError:
+                return False
+            self._count -= 1
+            self._cache = {}
+            return True
+
+    def match(self, topic: str) -> Tuple[Callable, ...]:
+        """Get the listeners whose patterns match a concrete topic"""
+        # Subscription changes swap in a new cache, so a result computed
+        # against old subscriptions only lands in the discarded one
+        cache = self._cache
+        listeners = cache.get(topic)
+        if listeners is None:
+            found: List[Callable] = []
+            self._collect(self.root, topic.split("."), 0, found)
+            # A listener reachable through several patterns is called once
+            listeners = tuple(dict.fromkeys(found))
+            if len(cache) >= self.max_cache_entries:
+                cache.clear()
+            cache[topic] = listeners
+        return listeners
+
+    def _collect(self, node: TrieNode, parts: List[str], index: int, found: List[Callable]) -> None:
+        multi = node.children.get(MULTI_LEVEL_WILDCARD)
+        if multi is not None:
+            # '#' may swallow any number of remaining levels
+            for skip in range(index, len(parts) + 1):
+                self._collect(multi, parts, skip, found)
+        if index == len(parts):
+            found.extend(node.listeners)
+            return
+        child = node.children.get(parts[index])
+        if child is not None:
+            self._collect(child, parts, index + 1, found)
+        single = node.children.get(SINGLE_LEVEL_WILDCARD)
+        if single is not None:
+            self._collect(single, parts, index + 1, found)
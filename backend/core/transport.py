@@ -0,0 +1,402 @@
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from datetime import date, datetime
+from uuid import UUID
+import asyncio
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+from pubsub import pub
+
+# magic, version, flags, topic length, body length
+FRAME_HEADER = struct.Struct("!2sBBHI")
+FRAME_MAGIC = b"EV"
+FRAME_VERSION = 1
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Frames waiting for the writer thread before sends start dropping
+DEFAULT_MAX_PENDING_FRAMES = 1024
+
+class TransportError(Exception):
+    """Raised for malformed frames or transport failures"""
+    pass
+
+# Key marking a JSON object that stands for a non-JSON value
+TYPE_TAG = "__transport_type__"
+
+class _EventEncoder(json.JSONEncoder):
+    """JSON plus the non-JSON types event payloads carry, tagged so they decode back"""
+    def default(self, value: Any) -> Any:
+        if isinstance(value, datetime):
+            return {TYPE_TAG: "datetime", "value": value.isoformat()}
+        if isinstance(value, date):
+            return {TYPE_TAG: "date", "value": value.isoformat()}
+        if isinstance(value, UUID):
+            return {TYPE_TAG: "uuid", "value": str(value)}
+        if isinstance(value, (set, frozenset)):
+            return {TYPE_TAG: "set", "value": list(value)}
+        raise TypeError(f"Object of type {type(value).__name__} cannot be sent between processes")
+
+_DECODERS: Dict[str, Callable[[Any], Any]] = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "uuid": UUID,
+    "set": set
+}
+
+def _decode_object(obj: Dict[str, Any]) -> Any:
+    kind = obj.get(TYPE_TAG)
+    if kind is None:
+        return obj
+    decoder = _DECODERS.get(kind)
+    if decoder is None:
+        raise TransportError(f"Unknown encoded type {kind!r}")
+    return decoder(obj["value"])
+
+def encode_frame(topic: str, message: Dict[str, Any]) -> bytes:
+    """Encode a topic and its pypubsub keyword arguments as one frame.
+
+    Besides JSON types, datetimes, dates, UUIDs and sets are sent and
+    decoded back to themselves; any other value raises TransportError
+    rather than arriving as a string.
+    """
+    topic_bytes = topic.encode("utf-8")
+    try:
+        body = json.dumps(message, cls=_EventEncoder, separators=(",", ":")).encode("utf-8")
+    except (TypeError, ValueError) as e:
+        raise TransportError(f"Event on {topic} cannot be encoded: {e}") from e
+    if len(body) > MAX_BODY_BYTES:
+        raise TransportError(f"Event body of {len(body)} bytes exceeds {MAX_BODY_BYTES}")
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0, len(topic_bytes), len(body)) + topic_bytes + body
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly ``size`` bytes, or None if the peer closed the connection"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+def read_frame(sock: socket.socket) -> Optional[bytes]:
+    """Read one raw frame from a socket, or None at end of stream"""
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    magic, version, _, topic_length, body_length = FRAME_HEADER.unpack(header)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise TransportError(f"Unsupported frame {magic!r} v{version}")
+    if body_length > MAX_BODY_BYTES:
+        raise TransportError(f"Frame body of {body_length} bytes exceeds {MAX_BODY_BYTES}")
+    rest = _recv_exact(sock, topic_length + body_length)
+    if rest is None:
+        return None
+    return header + rest
+
+def decode_frame(frame: bytes) -> Tuple[str, Dict[str, Any]]:
+    """Decode a raw frame into its topic and message keyword arguments"""
+    try:
+        _, _, _, topic_length, body_length = FRAME_HEADER.unpack_from(frame)
+        start = FRAME_HEADER.size
+        topic = frame[start:start + topic_length].decode("utf-8")
+        body = frame[start + topic_length:start + topic_length + body_length]
+        message = json.loads(body, object_hook=_decode_object)
+    except TransportError:
+        raise
+    except (struct.error, ValueError, TypeError, KeyError) as e:
+        raise TransportError(f"Undecodable frame: {e}") from e
+    if not isinstance(message, dict):
+        raise TransportError(f"Frame on {topic} does not hold keyword arguments")
+    return topic, message
+
+class EventTransport:
+    """Carries published events to other processes.
+
+    ``send`` is called after every local publish; events arriving from other
+    processes are handed to the ``deliver`` callback given to ``start``.
+    """
+    def start(self, deliver: Callable[[str, Dict[str, Any]], None]) -> None:
+        pass
+
+    def send(self, topic: str, message: Dict[str, Any]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {}
+
+class LocalTransport(EventTransport):
+    """In-process only: events stay within pypubsub"""
+    pass
+
+class UnixSocketTransport(EventTransport):
+    """Connects to an EventBroker over a Unix domain socket.
+
+    Incoming frames are read on a background thread and delivered on the
+    event loop that was running when the transport started, if any, so
+    coroutine handlers are scheduled on that loop. Outgoing frames are
+    queued and written by a writer thread, so publishing never blocks on
+    the socket; when a stalled broker lets ``max_pending_frames`` build up,
+    further sends are dropped.
+    """
+    def __init__(self, socket_path: str, max_pending_frames: int = DEFAULT_MAX_PENDING_FRAMES):
+        self.logger = logging.getLogger(__name__)
+        self.socket_path = socket_path
+        self._sock: Optional[socket.socket] = None
+        self._outbox: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_pending_frames)
+        self._reader: Optional[threading.Thread] = None
+        self._writer: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.send_dropped = 0
+
+    def start(self, deliver: Callable[[str, Dict[str, Any]], None]) -> None:
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._reader = threading.Thread(
+            target=self._read_loop, args=(deliver,), name="event-transport-reader", daemon=True
+        )
+        self._reader.start()
+        self._writer = threading.Thread(
+            target=self._write_loop, args=(sock,), name="event-transport-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _read_loop(self, deliver: Callable[[str, Dict[str, Any]], None]) -> None:
+        while not self._closed:
+            try:
+                frame = read_frame(self._sock)
+            except (OSError, TransportError) as e:
+                if not self._closed:
+                    self.logger.error(f"Event transport read failed: {e}")
+                return
+            if frame is None:
+                return
+            self.received += 1
+            # A bad frame is skipped; framing is intact, so later frames still decode
+            try:
+                topic, message = decode_frame(frame)
+            except TransportError as e:
+                self.dropped += 1
+                self.logger.error(f"Dropping undecodable event frame: {e}")
+                continue
+            if self._loop is not None and self._loop.is_running():
+                self._loop.call_soon_threadsafe(deliver, topic, message)
+                continue
+            try:
+                deliver(topic, message)
+            except Exception as e:
+                self.logger.error(f"Delivering {topic} from another process failed: {e}")
+
+    def _write_loop(self, sock: socket.socket) -> None:
+        while True:
+            frame = self._outbox.get()
+            if frame is None:
+                return
+            try:
+                sock.sendall(frame)
+            except OSError as e:
+                if not self._closed:
+                    self.logger.error(f"Event transport write failed: {e}")
+                return
+            self.sent += 1
+
+    def send(self, topic: str, message: Dict[str, Any]) -> None:
+        if self._sock is None or self._closed:
+            return
+        frame = encode_frame(topic, message)
+        try:
+            self._outbox.put_nowait(frame)
+        except queue.Full:
+            self.send_dropped += 1
+            self.logger.warning(
+                f"Dropping {topic} event: {self._outbox.maxsize} frames are waiting for the broker"
+            )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get frame counts and the broker socket path"""
+        return {
+            "socket_path": self.socket_path,
+            "connected": self._sock is not None,
+            "sent": self.sent,
+            "received": self.received,
+            "dropped": self.dropped,
+            "pending": self._outbox.qsize(),
+            "send_dropped": self.send_dropped
+        }
+
+    def close(self, timeout: float = 1.0) -> None:
+        """Stop the transport, first giving queued frames ``timeout`` seconds to go out"""
+        self._closed = True
+        if self._writer is not None:
+            try:
+                self._outbox.put_nowait(None)
+            except queue.Full:
+                pass
+            else:
+                self._writer.join(timeout)
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    """Relays every frame from one peer to all other peers"""
+    def handle(self) -> None:
+        broker: "EventBroker" = self.server.broker
+        lock = threading.Lock()
+        broker._add_peer(self.request, lock)
+        try:
+            while True:
+                frame = read_frame(self.request)
+                if frame is None:
+                    return
+                broker._relay(self.request, frame)
+        except (OSError, TransportError) as e:
+            broker.logger.debug(f"Broker peer disconnected: {e}")
+        finally:
+            broker._remove_peer(self.request)
+
+class _BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class EventBroker:
+    """Fans out event frames between processes connected over a Unix socket.
+
+    Frames are relayed as raw bytes without decoding.
+    """
+    def __init__(self, socket_path: str):
+        self.logger = logging.getLogger(__name__)
+        self.socket_path = socket_path
+        self._peers: Dict[socket.socket, threading.Lock] = {}
+        self._peers_lock = threading.Lock()
+        self._server: Optional[_BrokerServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.relayed = 0
+
+    def start(self) -> None:
+        """Start serving on a background thread"""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = _BrokerServer(self.socket_path, _BrokerHandler)
+        self._server.broker = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="event-broker", daemon=True
+        )
+        self._thread.start()
+
+    def _add_peer(self, sock: socket.socket, lock: threading.Lock) -> None:
+        with self._peers_lock:
+            self._peers[sock] = lock
+
+    def _remove_peer(self, sock: socket.socket) -> None:
+        with self._peers_lock:
+            self._peers.pop(sock, None)
+
+    def peer_count(self) -> int:
+        with self._peers_lock:
+            return len(self._peers)
+
+    def _relay(self, source: socket.socket, frame: bytes) -> None:
+        with self._peers_lock:
+            targets = [(sock, lock) for sock, lock in self._peers.items() if sock is not source]
+        for sock, lock in targets:
+            try:
+                with lock:
+                    sock.sendall(frame)
+            except OSError as e:
+                self.logger.warning(f"Dropping broker peer after send failure: {e}")
+                self._remove_peer(sock)
+        self.relayed += 1
+
+    def stop(self) -> None:
+        """Stop serving and remove the socket file"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+def deliver_to_pubsub(topic: str, message: Dict[str, Any]) -> None:
+    """Publish an event received from another process to local listeners"""
+    pub.sendMessage(topic, **message)
+
+_transport: Optional[EventTransport] = None
+
+def get_transport() -> EventTransport:
+    """Get the process-wide transport.
+
+    When ``EVENT_TRANSPORT_SOCKET`` is set, the process joins the broker at
+    that path; otherwise, or when the broker cannot be reached, events stay
+    in-process.
+    """
+    global _transport
+    if _transport is None:
+        socket_path = os.getenv("EVENT_TRANSPORT_SOCKET")
+        if socket_path:
+            try:
+                set_transport(UnixSocketTransport(socket_path))
+            except OSError as e:
+                logging.getLogger(__name__).warning(
+                    f"Event broker at {socket_path} unreachable ({e}), delivering events in-process only"
+                )
+                _transport = LocalTransport()
+        else:
+            _transport = LocalTransport()
+    return _transport
+
+def set_transport(transport: EventTransport) -> None:
+    """Replace the process-wide transport, starting it with pypubsub delivery"""
+    global _transport
+    if _transport is not None:
+        _transport.close()
+    transport.start(deliver_to_pubsub)
+    _transport = transport
+
+def run_agent_worker(
+    agent_factory: Callable[[], Any],
+    topics: List[str],
+    socket_path: str
+) -> None:
+    """Run an agent in this process, receiving its topics over the broker.
+
+    Intended as a ``multiprocessing.Process`` target so agents such as
+    FeatureAgent or ResearchAgent can run on their own core. Use the
+    ``spawn`` start method: forking a process with running dispatcher or
+    retry threads can inherit locks that are never released.
+    """
+    async def serve():
+        transport = UnixSocketTransport(socket_path)
+        agent = agent_factory()
+        agent.transport = transport
+        for topic in topics:
+            agent.subscribe(topic)
+        # Connect only once subscribed so no event reaches an empty topic
+        set_transport(transport)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
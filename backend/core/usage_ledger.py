@@ -0,0 +1,210 @@
+from typing import Dict, Any, Optional, List, Callable, Iterator, Sequence, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+import contextvars
+import threading
+import time
+
+# Fields usage can be grouped by
+GROUP_FIELDS = ("agent", "call_class", "model", "kind")
+
+@dataclass(frozen=True)
+class UsageScope:
+    """Who an LLM call is made for: the pipeline run and the agent handling it"""
+    correlation_id: Optional[str] = None
+    agent: Optional[str] = None
+
+_current_scope: contextvars.ContextVar[Optional[UsageScope]] = contextvars.ContextVar(
+    "usage_scope", default=None
+)
+
+def current_usage_scope() -> Optional[UsageScope]:
+    """Get the scope calls made now are charged to, if any"""
+    return _current_scope.get()
+
+@contextmanager
+def use_usage_scope(scope: Optional[UsageScope]) -> Iterator[Optional[UsageScope]]:
+    """Charge the block to an existing scope, e.g. one captured by another task"""
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+@contextmanager
+def usage_scope(correlation_id: Optional[str] = None, agent: Optional[str] = None) -> Iterator[UsageScope]:
+    """Charge calls made in the block to a run and agent; omitted fields are inherited"""
+    outer = _current_scope.get() or UsageScope()
+    scope = UsageScope(
+        correlation_id=correlation_id if correlation_id is not None else outer.correlation_id,
+        agent=agent if agent is not None else outer.agent
+    )
+    with use_usage_scope(scope):
+        yield scope
+
+@dataclass(slots=True)
+class UsageRecord:
+    """One LLM or embedding call"""
+    correlation_id: Optional[str]
+    agent: Optional[str]
+    call_class: Optional[str]
+    kind: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_ms: float
+    cache_hit: bool
+    success: bool
+    started_at: float
+
+class UsageLedger:
+    """Token usage and latency of every LLM call, kept per correlation id.
+
+    Calls are charged to the current usage scope. Only the ``max_runs``
+    most recently active runs are kept; calls made outside any run are
+    kept under the ``None`` correlation id.
+    """
+    def __init__(self, max_runs: int = 1000, clock: Callable[[], float] = time.time):
+        self.max_runs = max_runs
+        self._clock = clock
+        self._runs: "OrderedDict[Optional[str], List[UsageRecord]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.evicted_runs = 0
+
+    def record(
+        self,
+        kind: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_ms: float = 0.0,
+        cache_hit: bool = False,
+        success: bool = True,
+        call_class: Optional[str] = None
+    ) -> UsageRecord:
+        """Add a call made in the current scope"""
+        scope = _current_scope.get() or UsageScope()
+        entry = UsageRecord(
+            correlation_id=scope.correlation_id,
+            agent=scope.agent,
+            call_class=call_class,
+            kind=kind,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=latency_ms,
+            cache_hit=cache_hit,
+            success=success,
+            # Wall clock start, so spans of overlapping calls can be measured
+            started_at=self._clock() - latency_ms / 1000
+        )
+        with self._lock:
+            records = self._runs.get(entry.correlation_id)
+            if records is None:
+                records = self._runs[entry.correlation_id] = []
+            self._runs.move_to_end(entry.correlation_id)
+            records.append(entry)
+            self.recorded += 1
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+                self.evicted_runs += 1
+        return entry
+
+    def records(self, correlation_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Every call of a run, oldest first"""
+        with self._lock:
+            return [asdict(entry) for entry in self._runs.get(correlation_id, [])]
+
+    def runs(self) -> List[Optional[str]]:
+        """Correlation ids with recorded calls, least recently active first"""
+        with self._lock:
+            return list(self._runs)
+
+    def summary(
+        self,
+        correlation_id: Optional[str],
+        group_by: Sequence[str] = ()
+    ) -> Dict[str, Any]:
+        """Totals for a run, optionally broken down by ``group_by`` fields"""
+        for field in group_by:
+            if field not in GROUP_FIELDS:
+                raise ValueError(f"Cannot group usage by {field}; use one of {list(GROUP_FIELDS)}")
+        with self._lock:
+            records = list(self._runs.get(correlation_id, []))
+        result = {"correlation_id": correlation_id, **_totals(records)}
+        if group_by:
+            groups: Dict[Tuple[Any, ...], List[UsageRecord]] = {}
+            for entry in records:
+                groups.setdefault(tuple(getattr(entry, field) for field in group_by), []).append(entry)
+            result["groups"] = [
+                {**dict(zip(group_by, key)), **_totals(entries)}
+                for key, entries in sorted(groups.items(), key=lambda item: -_total_tokens(item[1]))
+            ]
+        return result
+
+    def top_runs(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Runs that used the most tokens, with their totals"""
+        with self._lock:
+            runs = [(correlation_id, list(records)) for correlation_id, records in self._runs.items()]
+        runs.sort(key=lambda run: -_total_tokens(run[1]))
+        return [{"correlation_id": correlation_id, **_totals(records)} for correlation_id, records in runs[:limit]]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": len(self._runs),
+                "records": sum(len(records) for records in self._runs.values()),
+                "recorded": self.recorded,
+                "evicted_runs": self.evicted_runs
+            }
+
+def _total_tokens(records: Sequence[UsageRecord]) -> int:
+    return sum(entry.prompt_tokens + entry.completion_tokens for entry in records)
+
+def _totals(records: Sequence[UsageRecord]) -> Dict[str, Any]:
+    """Aggregate usage of some calls.
+
+    ``latency_ms`` adds up every call, while ``wall_ms`` is the time from
+    the first call starting to the last one ending, so calls made in
+    parallel count once.
+    """
+    if not records:
+        return {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+            "cache_hits": 0, "errors": 0, "latency_ms": 0.0, "wall_ms": 0.0
+        }
+    prompt_tokens = sum(entry.prompt_tokens for entry in records)
+    completion_tokens = sum(entry.completion_tokens for entry in records)
+    start = min(entry.started_at for entry in records)
+    end = max(entry.started_at + entry.latency_ms / 1000 for entry in records)
+    return {
+        "calls": len(records),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "cache_hits": sum(1 for entry in records if entry.cache_hit),
+        "errors": sum(1 for entry in records if not entry.success),
+        "latency_ms": sum(entry.latency_ms for entry in records),
+        "wall_ms": (end - start) * 1000
+    }
+
+def response_tokens(response: Any) -> Tuple[int, int]:
+    """Prompt and completion tokens an API response reports, zero when it reports none"""
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if isinstance(prompt_tokens, int) and isinstance(completion_tokens, int):
+        return prompt_tokens, completion_tokens
+    total_tokens = getattr(usage, "total_tokens", None)
+    return (total_tokens if isinstance(total_tokens, int) else 0), 0
+
+_default_ledger: Optional[UsageLedger] = None
+
+def get_usage_ledger() -> UsageLedger:
+    """Get the process-wide ledger shared by every LLM service"""
+    global _default_ledger
+    if _default_ledger is None:
+        _default_ledger = UsageLedger()
+    return _default_ledger
@@ -1,32 +1,196 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncGenerator, Sequence
 from openai import AsyncOpenAI
 import json
 import asyncio
+import time
+from contextlib import aclosing
+from ..core.rate_limiter import RateLimiter, get_rate_limiter
+from ..core.token_counter import get_token_counter
+from ..core.response_cache import ResponseCache, get_response_cache, make_cache_key
+from ..core.single_flight import SingleFlight, get_single_flight
+from ..core.json_stream import StreamingJSONParser, iter_items
+from ..core.client_registry import get_client_registry
+from ..core.deadline import DeadlineExceeded, call_timeout
+from ..core.hedging import Hedger
+from ..core.model_router import ModelRouter, get_model_router
+from ..core.prompt_registry import PromptRegistry, get_prompt_registry
+from ..core.usage_ledger import UsageLedger, get_usage_ledger, response_tokens
 
 class LLMService:
-    def __init__(self, api_key=None):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key=None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        client: Optional[AsyncOpenAI] = None,
+        hedger: Optional[Hedger] = None,
+        router: Optional[ModelRouter] = None,
+        prompts: Optional[PromptRegistry] = None,
+        ledger: Optional[UsageLedger] = None
+    ):
+        self.api_key = api_key
+        # Pooled client shared with every other LLM service on the same loop
+        self._client = client
+        # Used for call classes the router has no policy for
         self.default_model = "gpt-4-turbo-preview"
         self.default_timeout = 60  # Increase timeout to 60 seconds
+        # Shared with every other LLM service so parallel agents stay within quota
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        # Identical requests are answered from the cache instead of the API
+        self.cache = cache or get_response_cache()
+        # Identical requests already in flight share one API call
+        self.single_flight = single_flight or get_single_flight()
+        # Slow calls get a backup request when hedging is enabled
+        self.hedger = hedger
+        # Picks the model for each call class and falls back when one degrades
+        self.router = router or get_model_router()
+        # Schema instructions are rendered once per schema
+        self.prompts = prompts or get_prompt_registry()
+        # Token usage and latency of every call, per pipeline run
+        self.ledger = ledger or get_usage_ledger()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The injected client, or the pooled one for the running loop"""
+        return self._client or get_client_registry().openai_client(self.api_key)
+
+    @client.setter
+    def client(self, client: Optional[AsyncOpenAI]) -> None:
+        self._client = client
+
+    def _reconcile_usage(self, estimated_tokens: int, response: Any) -> None:
+        """Replace a rate limit reservation with the tokens actually used"""
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if isinstance(total_tokens, int):
+            self.rate_limiter.reconcile(estimated_tokens, total_tokens)
+
+    def _models_for(self, call_class: str) -> List[str]:
+        """Models to try for a call class, best first"""
+        return self.router.candidates(call_class) or [self.default_model]
+
+    async def _create(self, models: List[str], call_class: Optional[str] = None, **kwargs) -> Any:
+        """Call the first model that succeeds, recording each outcome with the router and ledger"""
+        for index, model in enumerate(models):
+            start = time.monotonic()
+            try:
+                response = await self._create_with_model(call_class=call_class, model=model, **kwargs)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                latency_ms = (time.monotonic() - start) * 1000
+                self.router.record(model, latency_ms, success=False)
+                self.ledger.record("completion", model, latency_ms=latency_ms, success=False, call_class=call_class)
+                if index == len(models) - 1:
+                    raise
+                print(f"Model {model} failed ({str(e) or type(e).__name__}), falling back to {models[index + 1]}")
+                continue
+            latency_ms = (time.monotonic() - start) * 1000
+            self.router.record(model, latency_ms, success=True)
+            prompt_tokens, completion_tokens = response_tokens(response)
+            self.ledger.record(
+                "completion", model, prompt_tokens, completion_tokens, latency_ms, call_class=call_class
+            )
+            return response
+
+    async def _create_with_model(self, call_class: Optional[str] = None, **kwargs) -> Any:
+        """Call the chat completions API within the rate limit and the current deadline"""
+        estimated_tokens = get_token_counter(kwargs["model"]).count_messages(kwargs["messages"])
+        async with asyncio.timeout(call_timeout()):
+            await self.rate_limiter.acquire(estimated_tokens)
+        timeout = call_timeout(self.default_timeout)
+        reservations = 1
+
+        def reserve_backup() -> bool:
+            # A backup request needs quota of its own and never waits for it
+            nonlocal reservations
+            if not self.rate_limiter.try_acquire(estimated_tokens):
+                return False
+            reservations += 1
+            return True
 
-    async def chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> Dict[str, Any]:
-        """Get a chat completion from the LLM"""
         try:
-            async with asyncio.timeout(self.default_timeout):
-                response = await self.client.chat.completions.create(
-                    model=self.default_model,
-                    messages=messages,
-                    temperature=temperature
+            if self.hedger is None:
+                async with asyncio.timeout(timeout):
+                    response = await self.client.chat.completions.create(**kwargs)
+            else:
+                response = await self.hedger.run(
+                    lambda: self.client.chat.completions.create(**kwargs),
+                    can_hedge=reserve_backup,
+                    timeout=timeout,
+                    key=(kwargs["model"], call_class)
                 )
-                return {
-                    "status": "success",
-                    "content": response.choices[0].message.content
-                }
+        except BaseException:
+            # Nothing was consumed, hand every reservation back
+            for _ in range(reservations):
+                self.rate_limiter.reconcile(estimated_tokens, 0)
+            raise
+        self._reconcile_usage(estimated_tokens, response)
+        # The cancelled loser of a hedge never reports usage
+        for _ in range(reservations - 1):
+            self.rate_limiter.reconcile(estimated_tokens, 0)
+        return response
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        call_class: str = "chat"
+    ) -> Dict[str, Any]:
+        """Get a chat completion from the LLM, bypassing the cache if use_cache is False.
+
+        The model is chosen by the router for ``call_class``.
+        """
+        models = self._models_for(call_class)
+        key = make_cache_key(models[0], messages, None, temperature)
+        if not use_cache:
+            # A cache bypass wants its own response, not one shared with other callers
+            return await self._chat_completion(messages, temperature, None, models, call_class)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            self.ledger.record("completion", models[0], cache_hit=True, call_class=call_class)
+            return cached
+        return await self.single_flight.do(
+            key,
+            lambda: self._chat_completion(messages, temperature, key, models, call_class)
+        )
+
+    async def _chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        cache_key: Optional[str],
+        models: List[str],
+        call_class: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Call the API for a chat completion, caching a successful result under cache_key"""
+        try:
+            response = await self._create(
+                models,
+                call_class,
+                messages=messages,
+                temperature=temperature
+            )
+            result = {
+                "status": "success",
+                "content": response.choices[0].message.content
+            }
+            if cache_key is not None:
+                await self.cache.aset(cache_key, result)
+            return result
+        except DeadlineExceeded as e:
+            print(f"LLM request skipped: {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e)
+            }
         except asyncio.TimeoutError:
-            print(f"LLM request timed out after {self.default_timeout} seconds")
+            print("LLM request timed out")
             return {
                 "status": "error",
-                "error": f"Request timed out after {self.default_timeout} seconds"
+                "error": "Request timed out"
             }
         except Exception as e:
             print(f"Chat completion error: {str(e)}")
@@ -35,23 +199,85 @@ class LLMService:
                 "error": str(e)
             }
 
-    async def structured_output(self, messages: List[Dict[str, str]], output_schema: Dict[str, Any]) -> Dict[str, Any]:
-        """Get structured output from LLM following a schema"""
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        call_class: str = "chat"
+    ) -> AsyncGenerator[str, None]:
+        """Stream a chat completion, yielding text as it is generated.
+
+        Streams are not cached. A model that fails before sending any text
+        falls back to the router's next choice; after that, errors are
+        raised to the caller, who has already seen part of the reply.
+        """
+        models = self._models_for(call_class)
+        for index, model in enumerate(models):
+            start = time.monotonic()
+            sent = False
+            try:
+                async with aclosing(self._stream_response({
+                    "model": model,
+                    "messages": messages,
+                    "temperature": temperature
+                }, call_class)) as stream:
+                    async for text in stream:
+                        sent = True
+                        yield text
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                self.router.record(model, (time.monotonic() - start) * 1000, success=False)
+                if sent or index == len(models) - 1:
+                    raise
+                print(f"Model {model} failed ({str(e) or type(e).__name__}), falling back to {models[index + 1]}")
+                continue
+            self.router.record(model, (time.monotonic() - start) * 1000, success=True)
+            return
+
+    async def structured_output(
+        self,
+        messages: List[Dict[str, str]],
+        output_schema: Dict[str, Any],
+        use_cache: bool = True,
+        call_class: str = "analysis"
+    ) -> Dict[str, Any]:
+        """Get structured output from LLM following a schema, bypassing the cache if use_cache is False.
+
+        The model is chosen by the router for ``call_class``.
+        """
+        models = self._models_for(call_class)
+        key = make_cache_key(models[0], messages, self.prompts.schema_digest(output_schema), 0.7)
+        if not use_cache:
+            return await self._structured_output(messages, output_schema, None, models, call_class)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            self.ledger.record("completion", models[0], cache_hit=True, call_class=call_class)
+            return cached
+        return await self.single_flight.do(
+            key,
+            lambda: self._structured_output(messages, output_schema, key, models, call_class)
+        )
+
+    def _schema_message(self, output_schema: Dict[str, Any]) -> Dict[str, str]:
+        """System message asking for JSON matching the schema, rendered once per schema"""
+        return self.prompts.schema_message(output_schema)
+
+    async def _structured_output(
+        self,
+        messages: List[Dict[str, str]],
+        output_schema: Dict[str, Any],
+        cache_key: Optional[str],
+        models: List[str],
+        call_class: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Call the API for structured output, caching a successful result under cache_key"""
         try:
-            # Add schema to system message
-            schema_message = {
-                "role": "system",
-                "content": f"""You are a structured data generator.
-                Output must be valid JSON matching this schema:
-                {json.dumps(output_schema, indent=2)}
-                
-                Only respond with the JSON, no other text."""
-            }
-            
-            all_messages = [schema_message] + messages
+            all_messages = [self._schema_message(output_schema)] + messages
             
-            response = await self.client.chat.completions.create(
-                model=self.default_model,
+            response = await self._create(
+                models,
+                call_class,
                 messages=all_messages,
                 temperature=0.7,
                 response_format={"type": "json_object"}  # Force JSON response
@@ -61,10 +287,13 @@ class LLMService:
             try:
                 content = response.choices[0].message.content
                 parsed_data = json.loads(content)
-                return {
+                result = {
                     "status": "success",
                     "data": parsed_data
                 }
+                if cache_key is not None:
+                    await self.cache.aset(cache_key, result)
+                return result
             except json.JSONDecodeError as e:
                 print(f"JSON Parse Error: {str(e)}\nContent: {content}")
                 return {
@@ -77,4 +306,118 @@ class LLMService:
             return {
                 "status": "error",
                 "error": str(e)
-            } 
\ No newline at end of file
+            }
+
+    async def structured_output_stream(
+        self,
+        messages: List[Dict[str, str]],
+        output_schema: Dict[str, Any],
+        item_paths: Sequence[Sequence[str]],
+        use_cache: bool = True,
+        call_class: str = "analysis"
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream structured output, yielding array elements as soon as they close.
+
+        Yields ``{"type": "item", "path": ..., "data": ...}`` for each element
+        of the arrays named by ``item_paths``, then ``{"type": "complete",
+        "data": ...}`` with the whole document, or ``{"type": "error",
+        "error": ...}``. Results share the cache with structured_output.
+        A stream cannot switch models midway, so only the router's first
+        choice is used.
+        """
+        model = self._models_for(call_class)[0]
+        key = make_cache_key(model, messages, self.prompts.schema_digest(output_schema), 0.7)
+        if use_cache:
+            cached = await self.cache.aget(key)
+            if cached is not None and cached.get("status") == "success":
+                self.ledger.record("stream", model, cache_hit=True, call_class=call_class)
+                for path, element in iter_items(cached["data"], item_paths):
+                    yield {"type": "item", "path": path, "data": element}
+                yield {"type": "complete", "data": cached["data"]}
+                return
+
+        parser = StreamingJSONParser(item_paths)
+        start = time.monotonic()
+        try:
+            async for text in self._stream_response({
+                "model": model,
+                "messages": [self._schema_message(output_schema)] + messages,
+                "temperature": 0.7,
+                "response_format": {"type": "json_object"}
+            }, call_class):
+                for path, element in parser.feed(text):
+                    yield {"type": "item", "path": path, "data": element}
+            self.router.record(model, (time.monotonic() - start) * 1000, success=True)
+            data = parser.result()
+        except json.JSONDecodeError as e:
+            print(f"JSON Parse Error: {str(e)}")
+            yield {"type": "error", "error": f"Failed to parse JSON: {str(e)}"}
+            return
+        except Exception as e:
+            print(f"LLM Service Error: {str(e)}")
+            if not isinstance(e, DeadlineExceeded):
+                self.router.record(model, (time.monotonic() - start) * 1000, success=False)
+            yield {"type": "error", "error": str(e)}
+            return
+
+        if use_cache:
+            await self.cache.aset(key, {"status": "success", "data": data})
+        yield {"type": "complete", "data": data}
+
+    async def _stream_response(
+        self,
+        kwargs: Dict[str, Any],
+        call_class: Optional[str] = None
+    ) -> AsyncGenerator[str, None]:
+        """Stream completion text, reconciling the rate limit and ledger with the final usage"""
+        estimated_tokens = get_token_counter(kwargs["model"]).count_messages(kwargs["messages"])
+        async with asyncio.timeout(call_timeout()):
+            await self.rate_limiter.acquire(estimated_tokens)
+        usage = None
+        stream = None
+        success = True
+        start = time.monotonic()
+        try:
+            stream = await self.client.chat.completions.create(
+                **kwargs,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                # The usage chunk arrives last, with no choices
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            success = False
+            raise
+        finally:
+            # Closing an abandoned stream stops the connection delivering tokens nobody reads
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+            elif hasattr(stream, "close"):
+                await stream.close()
+            if usage is not None:
+                self._reconcile_usage(estimated_tokens, usage)
+                prompt_tokens, completion_tokens = response_tokens(usage)
+            else:
+                # Without a usage chunk, charge the prompt estimate, or
+                # nothing when the stream never opened
+                prompt_tokens, completion_tokens = (estimated_tokens if stream is not None else 0), 0
+                self.rate_limiter.reconcile(estimated_tokens, prompt_tokens)
+            self.ledger.record(
+                "stream", kwargs["model"], prompt_tokens, completion_tokens,
+                (time.monotonic() - start) * 1000, success=success, call_class=call_class
+            )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get cache, request deduplication, rate limiter, hedging, routing and usage statistics"""
+        return {
+            "cache": self.cache.get_metrics(),
+            "single_flight": self.single_flight.get_metrics(),
+            "rate_limiter": self.rate_limiter.get_metrics(),
+            "hedging": self.hedger.get_metrics() if self.hedger is not None else None,
+            "routing": self.router.get_metrics(),
+            "usage": self.ledger.get_metrics()
+        }
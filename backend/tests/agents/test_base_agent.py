@@ -5,6 +5,7 @@ from ...agents.base_agent import BaseAgent
 from pubsub import pub
 from typing import Dict, Any, List
 from ..base_test import BaseAgentTest
+from ...core.coalescing import BatchPerTick
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,16 @@ class TestAgent(BaseAgent):
     def execute_task(self, task: Dict[str, Any]) -> str:
         return f"Executed {task}"
 
+class AsyncTestAgent(BaseAgent):
+    """Test implementation of BaseAgent with a coroutine handler"""
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.handled_events: List[Dict[str, Any]] = []
+
+    async def handle_event(self, event: Dict[str, Any]) -> str:
+        self.handled_events.append(event)
+        return event["data"]["message"]
+
 class TestBaseAgent(BaseAgentTest):
     """Test cases for BaseAgent"""
 
@@ -75,4 +86,31 @@ class TestBaseAgent(BaseAgentTest):
             assert self.events_received[0]["data"]["message"] == "test"
             
         finally:
-            self.cleanup_subscriptions() 
\ No newline at end of file
+            self.cleanup_subscriptions()
+
+    @pytest.mark.asyncio
+    async def test_async_handler_publish_and_wait(self):
+        """Test coroutine handlers are awaited through publish_and_wait"""
+        agent = AsyncTestAgent("async_agent")
+        agent.subscribe("test_event")
+        
+        results = await agent.publish_and_wait("test_event", {"message": "test"})
+        
+        assert results == ["test"]
+        assert agent.handled_events[0]["data"]["message"] == "test"
+
+    def test_coalesced_subscription(self):
+        """Test coalesced subscriptions deliver a batch event"""
+        agent = TestAgent("test_agent")
+        agent.subscribe("test_event", coalesce=BatchPerTick(interval=10))
+        
+        agent.publish("test_event", {"message": "first"})
+        agent.publish("test_event", {"message": "second"})
+        assert agent.handled_events == []
+        
+        agent.flush_coalesced()
+        
+        assert len(agent.handled_events) == 1
+        batch = agent.handled_events[0]
+        assert batch["type"] == "test_event"
+        assert [e["data"]["message"] for e in batch["batch"]] == ["first", "second"]
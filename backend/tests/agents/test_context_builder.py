@@ -0,0 +1,80 @@
+import json
+from ...agents.context_builder import FeatureContextBuilder
+from ...agents.lead_agent import ProjectContext
+
+def make_context(feature_count: int) -> dict:
+    """ProjectContext for a project with ``feature_count`` features"""
+    features = [
+        {"name": f"Feature {i}", "description": f"Description of feature {i} " * 5, "dependencies": []}
+        for i in range(feature_count)
+    ]
+    context = ProjectContext(summary={
+        "title": "Tic Tac Toe Game",
+        "description": "Interactive game for learning React",
+        "goals": ["Learn state management"],
+        "key_features": ["Game board"]
+    })
+    context.analysis = {"core_features": features, "constraints": ["Runs in the browser"]}
+    for i, feature in enumerate(features):
+        context.features_status[feature["name"]] = "validated" if i % 2 else "assigned"
+        context.validation_feedback[feature["name"]] = [f"Feedback for feature {i}"]
+    return context.to_dict()
+
+def test_only_relevant_context_selected():
+    """Test the slice holds the summary, dependencies and the feature's own feedback"""
+    builder = FeatureContextBuilder()
+    feature = {"name": "Feature 3", "dependencies": ["feature 1", "Missing Feature"]}
+
+    result = builder.build(feature, make_context(10))
+
+    assert result["project"]["title"] == "Tic Tac Toe Game"
+    assert result["dependencies"] == [{
+        "name": "Feature 1",
+        "status": "validated",
+        "description": "Description of feature 1 " * 5
+    }]
+    assert result["validation_feedback"] == ["Feedback for feature 3"]
+    assert result["constraints"] == ["Runs in the browser"]
+    assert result["feature_counts"] == {"assigned": 5, "validated": 5}
+    assert "Feedback for feature 4" not in json.dumps(result)
+
+def test_dependencies_from_analysis_definition():
+    """Test a feature without its own dependency list uses its definition in the analysis"""
+    builder = FeatureContextBuilder()
+    context = make_context(5)
+    context["analysis"]["core_features"][3]["dependencies"] = ["Feature 1"]
+
+    result = builder.build({"name": "Feature 3"}, context)
+
+    assert [dependency["name"] for dependency in result["dependencies"]] == ["Feature 1"]
+    assert builder.build({"name": "Feature 3", "dependencies": []}, context).get("dependencies") is None
+
+def test_size_flat_as_project_grows():
+    """Test the slice does not grow with the number of features"""
+    builder = FeatureContextBuilder()
+    feature = {"name": "Feature 3", "dependencies": ["Feature 1"]}
+
+    small = builder.build(feature, make_context(10))
+    large = builder.build(feature, make_context(500))
+
+    assert len(json.dumps(large)) - len(json.dumps(small)) < 10
+
+def test_budget_respected():
+    """Test lower priority sections are trimmed to fit the token budget"""
+    builder = FeatureContextBuilder(max_tokens=60)
+    context = make_context(5)
+    context["original_summary"]["description"] = "A very long description. " * 100
+    feature = {"name": "Feature 3", "dependencies": ["Feature 1"]}
+
+    result = builder.build(feature, context)
+
+    assert builder.counter.count_text(json.dumps(result, separators=(",", ":"))) <= 60
+    assert result["project"]["title"] == "Tic Tac Toe Game"
+    assert result["project"]["description"].endswith("...")
+    assert "feature_counts" not in result
+
+def test_plain_context_passed_through():
+    """Test contexts that are not a ProjectContext are kept within the budget"""
+    builder = FeatureContextBuilder()
+    context = {"project_type": "game", "tech_stack": ["React", "TypeScript"]}
+    assert builder.build({"name": "Game Board"}, context) == context
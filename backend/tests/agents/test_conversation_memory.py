@@ -0,0 +1,95 @@
+import pytest
+import asyncio
+from unittest.mock import Mock, AsyncMock
+from ...agents.conversation_memory import ConversationMemory, TopicTracker
+from ...agents.project_consultant_agent import ProjectConsultantAgent, REQUIRED_TOPICS
+from ...services.llm_service import LLMService
+
+def test_topic_tracker_incremental():
+    """Test topics are tracked across messages with several keywords per topic"""
+    tracker = TopicTracker({"users": ("users", "customers"), "goals": ("goals", "objective")})
+    assert tracker.update("Our CUSTOMERS are small shops") == {"users"}
+    assert tracker.update("More users") == set()
+    assert not tracker.is_complete()
+    assert tracker.missing == {"goals"}
+    assert tracker.update("The main objective is speed") == {"goals"}
+    assert tracker.is_complete()
+
+@pytest.mark.asyncio
+async def test_window_stays_within_budget():
+    """Test old turns leave the window and are folded into the summary"""
+    folded = []
+
+    async def summarize(summary, messages):
+        folded.extend(messages)
+        return (summary + " " + " ".join(m["content"] for m in messages)).strip()
+
+    memory = ConversationMemory(summarize, max_window_tokens=40)
+    for turn in range(20):
+        memory.add("user", f"message number {turn} about the project")
+    await memory.wait_for_refresh()
+
+    assert memory.get_metrics()["window_tokens"] <= 40
+    assert len(memory.history) == 20
+    assert folded == memory.history[:len(folded)]
+    assert "message number 0" in memory.summary
+    prompt = memory.messages("Be helpful")
+    assert prompt[0] == {"role": "system", "content": "Be helpful"}
+    assert "message number 0" in prompt[1]["content"]
+    assert prompt[-1]["content"] == "message number 19 about the project"
+    assert len(prompt) < 20
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_messages():
+    """Test turns stay in the prompt until a summary covering them succeeds"""
+    summarize = AsyncMock(return_value=None)
+    memory = ConversationMemory(summarize, max_window_tokens=20, min_window_messages=1)
+    for turn in range(5):
+        memory.add("user", f"message number {turn}")
+    await memory.wait_for_refresh()
+
+    assert memory.summary == ""
+    assert [m["content"] for m in memory.window()] == [f"message number {turn}" for turn in range(5)]
+
+    summarize.return_value = "summary"
+    await memory.refresh()
+    assert memory.summary == "summary"
+    assert len(memory.window()) < 5
+
+@pytest.mark.asyncio
+async def test_consultant_prompt_is_bounded():
+    """Test the consultant sends the recent window and summary, not the whole history"""
+    llm = Mock(spec=LLMService)
+    llm.chat_completion = AsyncMock(return_value={"status": "success", "content": "Tell me more."})
+    agent = ProjectConsultantAgent(llm_service=llm, max_window_tokens=60)
+
+    for turn in range(30):
+        result = await agent.process_message(f"Some detail number {turn} about the app")
+        assert result["status"] == "consulting"
+        # Let the background summary refresh run, as a real API call would
+        await asyncio.sleep(0)
+    await agent.memory.wait_for_refresh()
+
+    consult_calls = [
+        call for call in llm.chat_completion.await_args_list
+        if call.args[0][0]["content"] == agent.system_prompt
+    ]
+    assert len(consult_calls) == 30
+    assert len(consult_calls[-1].args[0]) <= 12
+    assert len(agent.conversation_history) == 60
+
+@pytest.mark.asyncio
+async def test_consultant_ready_once_topics_covered():
+    """Test a summary is requested once every required topic has come up"""
+    llm = Mock(spec=LLMService)
+    llm.chat_completion = AsyncMock(return_value={"status": "success", "content": "Go on."})
+    llm.structured_output = AsyncMock(return_value={"status": "error", "error": "n/a"})
+    agent = ProjectConsultantAgent(llm_service=llm)
+
+    await agent.process_message("The problem is scheduling")
+    await agent.process_message("Our users are clinics")
+    assert not agent._is_ready_for_summary()
+    await agent.process_message("Goals: fewer no-shows. Features: reminders")
+
+    assert set(REQUIRED_TOPICS) == agent.topics.covered
+    llm.structured_output.assert_awaited_once()
@@ -2,7 +2,9 @@ import pytest
 import logging
 from unittest.mock import Mock, AsyncMock
 from ...agents.lead_agent import LeadAgent
+from ...agents.context_builder import FeatureContextBuilder
 from ...services.llm_service import LLMService
+from ...core.response_cache import ResponseCache
 from ...schemas.project_schemas import validate_project_summary
 from ...schemas.test_fixtures import TIC_TAC_TOE_SUMMARY
 from ..base_test import BaseAgentTest
@@ -58,4 +60,150 @@ class TestLeadAgent(BaseAgentTest):
             assert not self.events_received, "No features should be delegated"
             
         finally:
-            self.cleanup_subscriptions() 
\ No newline at end of file
+            self.cleanup_subscriptions() 
+    @pytest.mark.asyncio
+    async def test_streamed_features_delegated_before_analysis_completes(self, sample_project_summary):
+        """Test each feature is delegated as soon as it is streamed"""
+        self.subscribe_to_events(["feature_request"])
+        delegated_mid_stream = []
+
+        async def mock_stream():
+            chunks = [
+                '{"core_features": [{"name": "Game',
+                ' Board", "priority": "high"}',
+                ', {"name": "Win Detection", "priority": "high"}',
+                '], "success_metrics": ["Players finish a game"]}'
+            ]
+            for index, text in enumerate(chunks):
+                if index == 2:
+                    delegated_mid_stream.extend(self.events_received)
+                yield Mock(choices=[Mock(delta=Mock(content=text))], usage=None)
+
+        try:
+            llm = LLMService(api_key="sk-test", cache=ResponseCache())
+            llm.client = Mock()
+            llm.client.chat.completions.create = AsyncMock(return_value=mock_stream())
+
+            agent = LeadAgent(llm_service=llm, stream_features=True)
+            result = await agent.initialize_from_summary(sample_project_summary)
+
+            assert result == {"status": "features_delegated", "feature_count": 2}
+            assert [e["data"]["feature"]["name"] for e in delegated_mid_stream] == ["Game Board"]
+            assert [e["data"]["feature"]["name"] for e in self.events_received] == [
+                "Game Board", "Win Detection"
+            ]
+            assert agent.project_context.analysis["success_metrics"] == ["Players finish a game"]
+        finally:
+            self.cleanup_subscriptions()
+
+    @pytest.mark.asyncio
+    async def test_documentation_waits_for_streamed_delegation(self, sample_project_summary):
+        """Test features validated mid-stream do not trigger documentation before the analysis completes"""
+        agent = LeadAgent(llm_service=Mock(), stream_features=True)
+        agent._generate_documentation = AsyncMock()
+        validated_mid_stream = []
+
+        async def mock_stream(**kwargs):
+            yield {"type": "item", "data": {"name": "Game Board"}}
+            await agent.handle_event({"type": "validation_result", "data": {
+                "feature": {"name": "Game Board"}, "status": "valid"
+            }})
+            validated_mid_stream.append(agent._generate_documentation.await_count)
+            yield {"type": "item", "data": {"name": "Win Detection"}}
+            yield {"type": "complete", "data": {"core_features": []}}
+
+        agent.llm.structured_output_stream = mock_stream
+        await agent.initialize_from_summary(sample_project_summary)
+        assert validated_mid_stream == [0]
+
+        await agent.handle_event({"type": "validation_result", "data": {
+            "feature": {"name": "Win Detection"}, "status": "valid"
+        }})
+        agent._generate_documentation.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stream_error_cancels_delegated_features(self, sample_project_summary):
+        """Test features delegated before a stream error are reported and marked cancelled"""
+        agent = LeadAgent(llm_service=Mock(), stream_features=True)
+        agent._generate_documentation = AsyncMock()
+
+        async def mock_stream(**kwargs):
+            yield {"type": "item", "data": {"name": "Game Board"}}
+            yield {"type": "error", "error": "Connection reset"}
+
+        agent.llm.structured_output_stream = mock_stream
+        result = await agent.initialize_from_summary(sample_project_summary)
+
+        assert result["status"] == "analysis_failed"
+        assert result["feature_count"] == 1
+        assert result["cancelled_features"] == ["Game Board"]
+        assert agent.project_context.features_status == {"Game Board": "cancelled"}
+
+        # A late completion of a cancelled feature is ignored
+        await agent.handle_event({"type": "feature_completed", "data": {"feature": {"name": "Game Board"}}})
+        assert agent.project_context.features_status == {"Game Board": "cancelled"}
+        agent._generate_documentation.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_documentation_when_validation_finishes_before_stream(self, sample_project_summary):
+        """Test documentation is generated at the end of the stream if every feature was already validated"""
+        agent = LeadAgent(llm_service=Mock(), stream_features=True)
+        agent._generate_documentation = AsyncMock()
+
+        async def mock_stream(**kwargs):
+            yield {"type": "item", "data": {"name": "Game Board"}}
+            await agent.handle_event({"type": "validation_result", "data": {
+                "feature": {"name": "Game Board"}, "status": "valid"
+            }})
+            yield {"type": "complete", "data": {"core_features": [{"name": "Game Board"}]}}
+
+        agent.llm.structured_output_stream = mock_stream
+        result = await agent.initialize_from_summary(sample_project_summary)
+
+        assert result["status"] == "features_delegated"
+        agent._generate_documentation.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stream_closed_on_error_and_unnamed_items_skipped(self, sample_project_summary):
+        """Test the analysis stream is closed when delegation stops early and items without a name are skipped"""
+        agent = LeadAgent(llm_service=Mock(), stream_features=True)
+        closed = []
+
+        async def mock_stream(**kwargs):
+            try:
+                yield {"type": "item", "data": {"priority": "high"}}
+                yield {"type": "item", "data": {"name": "Game Board"}}
+                yield {"type": "error", "error": "Connection reset"}
+                yield {"type": "complete", "data": {}}
+            finally:
+                closed.append(True)
+
+        agent.llm.structured_output_stream = mock_stream
+        result = await agent.initialize_from_summary(sample_project_summary)
+
+        assert result["feature_count"] == 1
+        assert result["cancelled_features"] == ["Game Board"]
+        assert closed == [True]
+
+    @pytest.mark.asyncio
+    async def test_streamed_features_see_earlier_definitions(self, sample_project_summary):
+        """Test a streamed feature's context holds the definitions of the features it depends on"""
+        self.subscribe_to_events(["feature_request"])
+        agent = LeadAgent(llm_service=Mock(), stream_features=True)
+
+        async def mock_stream(**kwargs):
+            yield {"type": "item", "data": {"name": "Game Board", "description": "3x3 grid"}}
+            yield {"type": "item", "data": {"name": "Win Detection", "dependencies": ["Game Board"]}}
+            yield {"type": "complete", "data": {"core_features": []}}
+
+        try:
+            agent.llm.structured_output_stream = mock_stream
+            await agent.initialize_from_summary(sample_project_summary)
+
+            request = self.events_received[1]["data"]
+            relevant = FeatureContextBuilder().build(request["feature"], request["context"])
+            assert relevant["dependencies"] == [
+                {"name": "Game Board", "status": "assigned", "description": "3x3 grid"}
+            ]
+        finally:
+            self.cleanup_subscriptions()
@@ -88,4 +88,61 @@ class TestMemoryAgent(BaseAgentTest):
                 "Database file should exist"
             
         finally:
-            self.cleanup_subscriptions() 
\ No newline at end of file
+            self.cleanup_subscriptions() 
+    def test_search_similar_ranks_by_content(self, mock_settings_memory):
+        """Test the nearest stored research shares words with the query, not just a prefix"""
+        agent = MemoryAgent(mock_settings_memory)
+        for name, text in [
+            ("auth", "User authentication with OAuth and multi-factor login"),
+            ("dashboard", "User dashboard with sales charts"),
+            ("export", "Export reports to PDF and CSV files")
+        ]:
+            agent.store({"type": "research", "name": name, "text": text})
+
+        distances, indices = agent.search_similar("How should login and authentication work?", k=3)
+
+        assert indices[0][0] == 0
+        assert distances[0][0] < distances[0][1]
+
+    @pytest.mark.asyncio
+    async def test_embedding_service_path(self, mock_settings_memory):
+        """Test embed_many_async uses the embedding service when one is configured"""
+        class FakeEmbeddingService:
+            async def generate_embeddings(self, texts):
+                return [[float(len(text))] * mock_settings_memory.VECTOR_DIM for text in texts]
+
+        agent = MemoryAgent(mock_settings_memory, embedding_service=FakeEmbeddingService())
+        vectors = await agent.embed_many_async(["ab", "abc"])
+        agent.store({"type": "research", "name": "r", "text": "abc"}, embedding=vectors[1])
+
+        assert vectors.shape == (2, mock_settings_memory.VECTOR_DIM)
+        assert agent.vector_db.ntotal == 1
+        assert agent.search_similar("abc", k=1, embedding=vectors[1])[0][0][0] == 0
+
+    @pytest.mark.asyncio
+    async def test_embedding_dimension_mismatch(self, mock_settings_memory):
+        """Test vectors of another dimension than VECTOR_DIM are rejected with a clear error"""
+        class Ada002Service:
+            async def generate_embeddings(self, texts):
+                return [[0.0] * 1536 for _ in texts]
+
+        agent = MemoryAgent(mock_settings_memory, embedding_service=Ada002Service())
+        with pytest.raises(ValueError, match="VECTOR_DIM"):
+            await agent.embed_many_async(["abc"])
+
+    def test_warm_up_rebuilds_stored_vectors(self, mock_settings_memory):
+        """Test vectors stored before warm-up are re-embedded with the frozen weights"""
+        agent = MemoryAgent(mock_settings_memory)
+        texts = ["User authentication with OAuth", "Export reports to PDF"]
+        for index, text in enumerate(texts):
+            agent.store({"type": "research", "name": f"r{index}", "text": text})
+
+        agent.warm_up(texts + ["User profile settings", "User export history"])
+
+        stored = agent.vector_db.reconstruct_n(0, 2)
+        assert np.allclose(stored, agent.embed_many(texts))
+        with pytest.raises(RuntimeError):
+            agent.warm_up(["more"])
+        # Later stores use the same frozen weights
+        agent.store({"type": "research", "name": "r2", "text": texts[0]})
+        assert np.allclose(agent.vector_db.reconstruct(2), stored[0])
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import Mock
+from ...agents.project_consultant_agent import ProjectConsultantAgent
+from ...core.model_router import ModelRouter, RoutePolicy
+from ...core.rate_limiter import RateLimiter
+from ...core.response_cache import ResponseCache
+from ...services.llm_service import LLMService
+from ..load.stand_ins import FakeOpenAI
+
+def make_service(client, router=None):
+    return LLMService(
+        client=client,
+        rate_limiter=RateLimiter(),
+        cache=ResponseCache(),
+        router=router or ModelRouter({})
+    )
+
+@pytest.mark.asyncio
+async def test_stream_message_yields_tokens_then_commits_reply():
+    """Test the reply streams in pieces and joins the history once complete"""
+    client = FakeOpenAI(stream_chunk_chars=5)
+    agent = ProjectConsultantAgent(llm_service=make_service(client))
+
+    events = [event async for event in agent.stream_message("I want a todo app")]
+
+    tokens = [event["content"] for event in events if event["type"] == "token"]
+    assert len(tokens) > 1
+    assert events[-1]["type"] == "complete"
+    assert events[-1]["status"] == "consulting"
+    assert events[-1]["message"] == "".join(tokens)
+    assert agent.conversation_history[-1] == {"role": "assistant", "content": "".join(tokens)}
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_leaves_no_partial_reply():
+    """Test closing the stream early does not add the assistant turn"""
+    client = FakeOpenAI(stream_chunk_chars=5)
+    agent = ProjectConsultantAgent(llm_service=make_service(client))
+
+    stream = agent.stream_message("I want a todo app")
+    first = await stream.__anext__()
+    await stream.aclose()
+
+    assert first["type"] == "token"
+    assert [m["role"] for m in agent.conversation_history] == ["user"]
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_before_first_token():
+    """Test a model that fails before sending text falls back to the next one"""
+    client = FakeOpenAI()
+    failing = Mock(side_effect=RuntimeError("model unavailable"))
+    create = client.chat.completions.create
+
+    async def create_or_fail(**kwargs):
+        if kwargs["model"] == "gpt-4-turbo-preview":
+            failing()
+        return await create(**kwargs)
+
+    client.chat.completions.create = create_or_fail
+    router = ModelRouter({"chat": RoutePolicy(["gpt-4-turbo-preview", "gpt-3.5-turbo"])})
+    agent = ProjectConsultantAgent(llm_service=make_service(client, router))
+
+    events = [event async for event in agent.stream_message("I want a todo app")]
+
+    assert events[-1]["type"] == "complete"
+    assert failing.call_count == 1
+    assert router.get_metrics()["models"]["gpt-3.5-turbo"]["calls"] == 1
+
+@pytest.mark.asyncio
+async def test_stream_error_is_reported():
+    """Test a failure after the only model is tried ends the stream with an error"""
+    client = FakeOpenAI()
+
+    async def fail(**kwargs):
+        raise RuntimeError("model unavailable")
+
+    client.chat.completions.create = fail
+    agent = ProjectConsultantAgent(llm_service=make_service(client))
+
+    events = [event async for event in agent.stream_message("Hello")]
+
+    assert events == [{"type": "error", "message": "Error: model unavailable", "status": "error"}]
+    assert [m["role"] for m in agent.conversation_history] == ["user"]
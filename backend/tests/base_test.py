@@ -25,8 +25,9 @@ class BaseAgentTest:
         """Subscribe to multiple event topics."""
         for topic in topics:
             self.logger.debug(f"Subscribing to topic: {topic}")
-            # Create a stable reference to the callback
-            callback = lambda event, topic=topic: self.track_event(event)
+            # Create a stable reference to the callback. It takes only ``event``:
+            # pypubsub fixes a topic's arguments from its first listener
+            callback = lambda event: self.track_event(event)
             pub.subscribe(callback, topic)
             self._subscribed_topics.append((topic, callback))
     
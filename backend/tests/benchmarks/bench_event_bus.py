@@ -0,0 +1,317 @@
+"""Event bus micro-benchmarks.
+
+Measures EventSystem.publish and BaseAgent.publish throughput, per-publish
+latency percentiles and allocations across subscriber counts, filters,
+payload sizes and the retry path, using stand-in listeners.
+
+Run from the repository root::
+
+    python -m backend.tests.benchmarks.bench_event_bus --save-baseline
+    python -m backend.tests.benchmarks.bench_event_bus --compare
+
+``--compare`` exits non-zero when a scenario's throughput drops below the
+saved baseline by more than ``--tolerance``.
+"""
+from typing import Dict, Any, Optional, List, Callable, Tuple, Set
+from dataclasses import dataclass
+import argparse
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pubsub import pub
+from backend.core.event_system import EventSystem
+from backend.core.retry_scheduler import RetryScheduler
+from backend.agents.base_agent import BaseAgent
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Topics of their own, so listener signatures never clash with other pubsub users
+BENCH_AGENT_TOPIC = "bench_feature_request"
+
+# Builds a scenario and returns its publish function and teardown
+ScenarioSetup = Callable[[], Tuple[Callable[[int], None], Callable[[], None]]]
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    setup: ScenarioSetup
+
+def subscribed_listeners() -> Set[Tuple[str, Callable]]:
+    """Every ``(topic name, listener)`` pair currently subscribed with pypubsub"""
+    subscribed = set()
+    topics = [pub.getDefaultTopicMgr().getRootAllTopics()]
+    while topics:
+        topic = topics.pop()
+        for listener in topic.getListeners():
+            callable_ = listener.getCallable()
+            if callable_ is not None:
+                subscribed.add((topic.getName(), callable_))
+        topics.extend(topic.getSubtopics())
+    return subscribed
+
+def make_payload(size_bytes: int) -> Dict[str, Any]:
+    """Build a feature payload of roughly ``size_bytes`` when serialized"""
+    return {
+        "name": "Authentication",
+        "description": "x" * max(0, size_bytes - 64),
+        "priority": "high"
+    }
+
+def event_system_scenario(
+    subscribers: int = 1,
+    payload_bytes: int = 128,
+    filtered: bool = False
+) -> ScenarioSetup:
+    """EventSystem.publish to ``subscribers`` listeners on one agent topic"""
+    def setup():
+        retry_scheduler = RetryScheduler()
+        event_system = EventSystem(retry_scheduler=retry_scheduler)
+        # Distinct functions, since pypubsub subscribes each listener once
+        listeners = []
+        for index in range(subscribers):
+            def listener(data=None):
+                pass
+            listener.__qualname__ = f"listener_{index}"
+            listeners.append(listener)
+            filter_fn = (lambda data, i=index: i % 2 == 0) if filtered else None
+            event_system.subscribe("feature_request", listener, "bench_agent", filter_fn=filter_fn)
+        payload = make_payload(payload_bytes)
+
+        def publish(i: int):
+            event_system.publish(
+                event_type="feature_request",
+                source_agent="lead_agent",
+                target_agent="bench_agent",
+                payload=payload,
+                correlation_id="bench"
+            )
+
+        def teardown():
+            retry_scheduler.shutdown()
+        return publish, teardown
+    return setup
+
+def retry_path_scenario() -> ScenarioSetup:
+    """EventSystem.publish failing delivery and scheduling a retry"""
+    def setup():
+        # Never let retries come due while measuring
+        retry_scheduler = RetryScheduler(max_pending=1_000_000, clock=lambda: 0.0)
+        event_system = EventSystem(retry_scheduler=retry_scheduler)
+
+        def conflicting_listener(event):
+            pass
+        # The topic expects ``event=``, so publishing ``data=`` to it fails
+        pub.subscribe(conflicting_listener, "agent.bench_retry_agent.feature_request")
+        payload = make_payload(128)
+
+        def publish(i: int):
+            event_system.publish(
+                event_type="feature_request",
+                source_agent="lead_agent",
+                target_agent="bench_retry_agent",
+                payload=payload,
+                correlation_id=f"bench-{i}"
+            )
+
+        def teardown():
+            retry_scheduler.shutdown()
+        return publish, teardown
+    return setup
+
+class BenchAgent(BaseAgent):
+    """Agent with a no-op handler"""
+    def __init__(self, name: str):
+        super().__init__(name)
+
+    def handle_event(self, event):
+        pass
+
+def base_agent_scenario(subscribers: int = 1, payload_bytes: int = 128) -> ScenarioSetup:
+    """BaseAgent.publish to ``subscribers`` agents"""
+    def setup():
+        agents = [BenchAgent(f"BenchAgent{index}") for index in range(subscribers)]
+        for agent in agents:
+            agent.subscribe(BENCH_AGENT_TOPIC)
+        publisher = BenchAgent("BenchPublisher")
+        payload = make_payload(payload_bytes)
+
+        def publish(i: int):
+            publisher.publish(BENCH_AGENT_TOPIC, payload)
+
+        def teardown():
+            # Agents must outlive the run, since pypubsub holds them weakly
+            agents.clear()
+        return publish, teardown
+    return setup
+
+SCENARIOS: List[Scenario] = [
+    Scenario("event_system.subscribers_1", "1 listener, 128 B payload", event_system_scenario(1)),
+    Scenario("event_system.subscribers_10", "10 listeners", event_system_scenario(10)),
+    Scenario("event_system.subscribers_50", "50 listeners", event_system_scenario(50)),
+    Scenario("event_system.filtered_10", "10 listeners behind filter_fn", event_system_scenario(10, filtered=True)),
+    Scenario("event_system.payload_64kb", "1 listener, 64 KB payload", event_system_scenario(1, payload_bytes=64 * 1024)),
+    Scenario("event_system.retry_path", "Failed delivery scheduling a retry", retry_path_scenario()),
+    Scenario("base_agent.subscribers_1", "1 agent", base_agent_scenario(1)),
+    Scenario("base_agent.subscribers_10", "10 agents", base_agent_scenario(10)),
+]
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def run_scenario(scenario: Scenario, iterations: int, warmup: int) -> Dict[str, float]:
+    """Run one scenario and report throughput, latency and allocations"""
+    # Only the scenario's own listeners are removed afterwards, so
+    # listeners other code subscribed in this process keep working
+    before = subscribed_listeners()
+    # Agents announce themselves with print, which would swamp the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        publish, teardown = scenario.setup()
+    added = subscribed_listeners() - before
+    try:
+        for i in range(warmup):
+            publish(i)
+
+        latencies_us = []
+        clock = time.perf_counter
+        started = clock()
+        for i in range(iterations):
+            begin = clock()
+            publish(i)
+            latencies_us.append((clock() - begin) * 1_000_000)
+        elapsed = clock() - started
+
+        # Allocations are traced in a separate pass so tracing overhead
+        # does not distort the timings above
+        alloc_iterations = min(iterations, 500)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for i in range(alloc_iterations):
+            publish(iterations + i)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocated_bytes = sum(
+            stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0
+        )
+    finally:
+        for topic, listener in added:
+            pub.unsubscribe(listener, topic)
+        teardown()
+
+    latencies_us.sort()
+    return {
+        "iterations": iterations,
+        "throughput_per_s": iterations / elapsed if elapsed else 0.0,
+        "mean_us": sum(latencies_us) / len(latencies_us),
+        "p50_us": _percentile(latencies_us, 50),
+        "p95_us": _percentile(latencies_us, 95),
+        "p99_us": _percentile(latencies_us, 99),
+        "max_us": latencies_us[-1],
+        "retained_bytes_per_publish": allocated_bytes / alloc_iterations,
+        "peak_traced_kb": peak / 1024
+    }
+
+def run_suite(
+    iterations: int = 5000,
+    warmup: int = 200,
+    only: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Run the selected scenarios with event system logging silenced"""
+    results = {}
+    logging.disable(logging.CRITICAL)
+    try:
+        for scenario in SCENARIOS:
+            if only and not any(name in scenario.name for name in only):
+                continue
+            results[scenario.name] = run_scenario(scenario, iterations, warmup)
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "results": results
+    }
+
+def save_baseline(report: Dict[str, Any], path: str) -> None:
+    """Write a report as the JSON baseline"""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.2
+) -> List[str]:
+    """Get the scenarios whose throughput regressed beyond ``tolerance``"""
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        floor = previous["throughput_per_s"] * (1 - tolerance)
+        if result["throughput_per_s"] < floor:
+            regressions.append(
+                f"{name}: {result['throughput_per_s']:.0f}/s vs baseline "
+                f"{previous['throughput_per_s']:.0f}/s"
+            )
+    return regressions
+
+def format_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Render a report as a table, with throughput change against a baseline"""
+    lines = [
+        f"{'scenario':32} {'ops/s':>10} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'B/op':>9} {'vs base':>8}"
+    ]
+    for name, result in report["results"].items():
+        change = ""
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous and previous["throughput_per_s"]:
+            ratio = result["throughput_per_s"] / previous["throughput_per_s"] - 1
+            change = f"{ratio:+.0%}"
+        lines.append(
+            f"{name:32} {result['throughput_per_s']:>10.0f} {result['p50_us']:>9.1f} "
+            f"{result['p95_us']:>9.1f} {result['p99_us']:>9.1f} "
+            f"{result['retained_bytes_per_publish']:>9.0f} {change:>8}"
+        )
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--only", nargs="*", help="Run scenarios whose name contains any of these")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE_PATH, metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE_PATH, metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.iterations, args.warmup, args.only)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(format_report(report, baseline))
+
+    if args.save_baseline:
+        save_baseline(report, args.save_baseline)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
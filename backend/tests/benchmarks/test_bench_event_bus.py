@@ -0,0 +1,51 @@
+import pytest
+import json
+from pubsub import pub
+from backend.tests.benchmarks.bench_event_bus import (
+    SCENARIOS, run_suite, save_baseline, compare_to_baseline, main, subscribed_listeners
+)
+
+def test_suite_smoke():
+    """Test every scenario runs and reports throughput, latency and allocations"""
+    report = run_suite(iterations=20, warmup=2)
+
+    assert set(report["results"]) == {scenario.name for scenario in SCENARIOS}
+    for result in report["results"].values():
+        assert result["iterations"] == 20
+        assert result["throughput_per_s"] > 0
+        assert 0 < result["p50_us"] <= result["p95_us"] <= result["p99_us"] <= result["max_us"]
+        assert result["retained_bytes_per_publish"] >= 0
+
+def test_baseline_round_trip(tmp_path):
+    """Test a saved baseline is compared against later runs"""
+    path = tmp_path / "baseline.json"
+    report = run_suite(iterations=10, warmup=1, only=["subscribers_1"])
+    save_baseline(report, str(path))
+
+    baseline = json.loads(path.read_text())
+    assert compare_to_baseline(report, baseline) == []
+
+    slower = json.loads(json.dumps(report))
+    for result in slower["results"].values():
+        result["throughput_per_s"] /= 2
+    assert len(compare_to_baseline(slower, baseline)) == len(report["results"])
+
+def test_cli_exit_code(tmp_path):
+    """Test the CLI saves a baseline and passes when compared to itself"""
+    path = str(tmp_path / "baseline.json")
+    assert main(["--iterations", "10", "--warmup", "1", "--only", "retry_path", "--save-baseline", path]) == 0
+    assert main(["--iterations", "10", "--warmup", "1", "--only", "retry_path", "--compare", path, "--tolerance", "0.99"]) == 0
+
+def test_teardown_keeps_other_listeners():
+    """Test scenarios remove only the listeners they subscribed"""
+    received = []
+    def outside_listener(event):
+        received.append(event)
+    pub.subscribe(outside_listener, "bench_outside_topic")
+    before = subscribed_listeners()
+
+    run_suite(iterations=5, warmup=1)
+
+    assert subscribed_listeners() == before
+    pub.sendMessage("bench_outside_topic", event="still subscribed")
+    assert received == ["still subscribed"]
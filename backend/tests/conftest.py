@@ -6,6 +6,7 @@ from ..agents.lead_agent import LeadAgent
 from ..agents.research_agent import ResearchAgent
 from ..agents.feature_agent import FeatureAgent
 from ..agents.validation_agent import ValidationAgent
+from ..core import response_cache
 from pubsub import pub
 from config.settings import Settings  # Import Settings
 import logging
@@ -71,6 +72,14 @@ def agent_system(test_settings):
     }
     return agents 
 
+@pytest.fixture(autouse=True)
+def memory_response_cache(monkeypatch):
+    """Give every test a fresh in-memory process-wide response cache"""
+    monkeypatch.delenv("LLM_CACHE_DB_PATH", raising=False)
+    cache = response_cache.ResponseCache()
+    monkeypatch.setattr(response_cache, "_default_cache", cache)
+    yield cache
+
 @pytest.fixture(autouse=True)
 def clean_pubsub():
     """Clean up pubsub after each test"""
@@ -0,0 +1,66 @@
+import pytest
+import asyncio
+from backend.core.client_registry import ClientRegistry, http2_available
+from backend.services.llm_service import LLMService
+
+@pytest.mark.asyncio
+async def test_one_client_per_api_key():
+    """Test clients are shared per API key"""
+    registry = ClientRegistry()
+    first = registry.openai_client("sk-one")
+    assert registry.openai_client("sk-one") is first
+    assert registry.openai_client("sk-two") is not first
+    assert registry.get_metrics()["clients"] == 2
+
+    await registry.aclose()
+    assert registry.get_metrics()["clients"] == 0
+    assert registry.openai_client("sk-one") is not first
+    await registry.aclose()
+
+def test_pool_configuration():
+    """Test connection limits are applied and HTTP/2 needs h2"""
+    registry = ClientRegistry(max_connections=5, max_keepalive_connections=2, keepalive_expiry=10)
+    metrics = registry.get_metrics()
+    assert metrics["max_connections"] == 5
+    assert metrics["max_keepalive_connections"] == 2
+    assert metrics["keepalive_expiry"] == 10
+    assert metrics["http2"] == http2_available()
+    assert ClientRegistry(http2=False).http2 is False
+
+@pytest.mark.asyncio
+async def test_services_share_the_pooled_client():
+    """Test LLM services built independently use the same client"""
+    assert LLMService(api_key="sk-shared").client is LLMService(api_key="sk-shared").client
+
+def test_one_client_per_event_loop():
+    """Test each loop gets its own clients, closed when the loop shuts down"""
+    registry = ClientRegistry()
+    service = LLMService(api_key="sk-loop")
+
+    async def get_client():
+        assert service.client is service.client
+        return registry.openai_client("sk-loop"), service.client
+
+    first, first_pooled = asyncio.run(get_client())
+    second, second_pooled = asyncio.run(get_client())
+
+    assert first is not second
+    assert first_pooled is not second_pooled
+    assert first.is_closed() and second.is_closed()
+    assert registry.get_metrics()["clients"] == 0
+
+def test_clients_of_closed_loops_are_dropped():
+    """Test clients of a loop closed without shutting down are forgotten"""
+    registry = ClientRegistry()
+    loop = asyncio.new_event_loop()
+
+    async def get_client():
+        return registry.openai_client("sk-loop")
+
+    stale = loop.run_until_complete(get_client())
+    loop.close()
+    assert registry.get_metrics()["clients"] == 1
+
+    fresh = registry.openai_client("sk-loop")
+    assert fresh is not stale
+    assert registry.get_metrics()["clients"] == 1
@@ -0,0 +1,69 @@
+import pytest
+import asyncio
+import threading
+from backend.core.coalescing import Coalescer, BatchPerTick, LatestByKey
+
+@pytest.mark.asyncio
+async def test_batch_per_tick():
+    """Test events in one interval are delivered as a single batch"""
+    batches = []
+    coalescer = Coalescer(BatchPerTick(interval=0.05), batches.append)
+    
+    for i in range(5):
+        coalescer.add(i)
+    assert batches == []
+    
+    await asyncio.sleep(0.1)
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert coalescer.get_metrics() == {"received": 5, "delivered_batches": 1, "pending": 0}
+
+@pytest.mark.asyncio
+async def test_latest_by_key():
+    """Test only the latest event per key is delivered"""
+    batches = []
+    coalescer = Coalescer(LatestByKey(lambda e: e["name"], interval=0.05), batches.append)
+    
+    coalescer.add({"name": "a", "status": "draft"})
+    coalescer.add({"name": "b", "status": "draft"})
+    coalescer.add({"name": "a", "status": "validated"})
+    
+    await asyncio.sleep(0.1)
+    assert batches == [[{"name": "b", "status": "draft"}, {"name": "a", "status": "validated"}]]
+
+def test_max_batch_flushes_early():
+    """Test reaching max_batch flushes without waiting for the interval"""
+    batches = []
+    coalescer = Coalescer(BatchPerTick(interval=10, max_batch=3), batches.append)
+    
+    for i in range(7):
+        coalescer.add(i)
+    
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+    coalescer.flush()
+    assert batches[-1] == [6]
+
+def test_flushes_on_the_adding_thread_without_loop():
+    """Test without a running loop a due window flushes on the next add and close delivers the rest"""
+    now = [0.0]
+    batches = []
+    threads = []
+    def deliver(events):
+        batches.append(events)
+        threads.append(threading.current_thread())
+    coalescer = Coalescer(BatchPerTick(interval=1.0), deliver, clock=lambda: now[0])
+
+    coalescer.add(1)
+    now[0] = 0.5
+    coalescer.add(2)
+    assert batches == []
+
+    now[0] = 1.0
+    coalescer.add(3)
+    assert batches == [[1, 2, 3]]
+
+    now[0] = 5.0
+    coalescer.add(4)
+    assert batches == [[1, 2, 3]]
+    coalescer.close()
+    assert batches == [[1, 2, 3], [4]]
+    assert threads == [threading.main_thread()] * 2
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from backend.core.deadline import (
+    Deadline, DeadlineExceeded, deadline_budget, current_deadline, call_timeout
+)
+from backend.core.dispatcher import AsyncDispatcher
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_call_timeout_shrinks_with_budget():
+    """Test per-call timeouts are capped by what is left of the budget"""
+    clock = FakeClock()
+    assert call_timeout(60) == 60
+    with deadline_budget(30, clock) as deadline:
+        assert call_timeout(60) == 30
+        assert call_timeout(10) == 10
+        clock.now = 25
+        assert call_timeout(60) == 5
+        assert call_timeout() == 5
+        clock.now = 30
+        assert deadline.expired
+        with pytest.raises(DeadlineExceeded):
+            call_timeout(60)
+    assert current_deadline() is None
+
+def test_nested_budget_keeps_tighter_deadline():
+    """Test a nested budget cannot extend its enclosing one"""
+    clock = FakeClock()
+    with deadline_budget(10, clock) as outer:
+        with deadline_budget(100, clock) as inner:
+            assert inner is outer
+        with deadline_budget(5, clock) as inner:
+            assert inner.expires_at == 5
+        with deadline_budget(None) as inner:
+            assert inner is outer
+
+def test_deadline_exceeded_is_a_timeout():
+    """Test existing timeout handling also catches spent budgets"""
+    assert issubclass(DeadlineExceeded, asyncio.TimeoutError)
+    with pytest.raises(DeadlineExceeded):
+        Deadline(-1).timeout()
+
+@pytest.mark.asyncio
+async def test_dispatched_handlers_inherit_deadline():
+    """Test async handlers run under the deadline of the publisher"""
+    dispatcher = AsyncDispatcher()
+    seen = []
+
+    async def handler():
+        seen.append(current_deadline())
+
+    with deadline_budget(30) as deadline:
+        with dispatcher.collect() as pending:
+            dispatcher.submit("topic", handler, {})
+    dispatcher.submit("topic", handler, {})
+    await dispatcher.wait_for(pending)
+    await dispatcher.drain()
+
+    assert seen == [deadline, None]
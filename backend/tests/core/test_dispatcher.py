@@ -0,0 +1,70 @@
+import pytest
+import asyncio
+from backend.core.dispatcher import AsyncDispatcher, DispatchQueueFull
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = AsyncDispatcher(max_queue_size=10, max_workers=4)
+    yield dispatcher
+    dispatcher.shutdown()
+
+@pytest.mark.asyncio
+async def test_handlers_run_concurrently(dispatcher):
+    """Test handlers on one topic run in parallel up to the worker limit"""
+    running = []
+    peak = []
+    
+    async def handler(data=None):
+        running.append(data)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.remove(data)
+        return data
+    
+    with dispatcher.collect() as pending:
+        for i in range(4):
+            dispatcher.submit("agent.test.test_event", handler, {"data": i})
+    
+    results = await dispatcher.wait_for(pending)
+    assert results == [0, 1, 2, 3]
+    assert max(peak) == 4
+
+@pytest.mark.asyncio
+async def test_bounded_queue(dispatcher):
+    """Test a full topic queue rejects new handlers"""
+    async def handler(data=None):
+        await asyncio.sleep(1)
+    
+    with pytest.raises(DispatchQueueFull):
+        for i in range(20):
+            dispatcher.submit("agent.test.test_event", handler, {"data": i})
+
+@pytest.mark.asyncio
+async def test_handler_errors_reported(dispatcher):
+    """Test handler exceptions are passed to the error callback"""
+    errors = []
+    
+    async def failing_handler(data=None):
+        raise ValueError("boom")
+    
+    with dispatcher.collect() as pending:
+        dispatcher.submit(
+            "agent.test.test_event",
+            failing_handler,
+            {"data": None},
+            on_error=lambda handler, error: errors.append(error)
+        )
+    
+    results = await dispatcher.wait_for(pending)
+    assert isinstance(results[0], ValueError)
+    assert len(errors) == 1
+
+def test_runs_synchronously_without_loop(dispatcher):
+    """Test coroutine handlers still run when no event loop is running"""
+    received = []
+    
+    async def handler(data=None):
+        received.append(data)
+    
+    assert dispatcher.submit("agent.test.test_event", handler, {"data": 1}) is None
+    assert received == [1]
@@ -0,0 +1,83 @@
+import pytest
+import asyncio
+from backend.core.embedding_batcher import EmbeddingBatcher
+
+class FakeEmbedder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("embedding service down")
+        return [[float(len(text)), 1.0] for text in texts]
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_request():
+    """Test texts from concurrent callers are sent as one batch"""
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_wait_ms=5)
+    
+    results = await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "ccc"]))
+    
+    assert results == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    assert embedder.batches == [["a", "bb", "ccc"]]
+
+@pytest.mark.asyncio
+async def test_batch_size_limit():
+    """Test batches never exceed the model's batch limit"""
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait_ms=50)
+    
+    results = await batcher.embed_many(["a", "bb", "ccc", "dddd", "eeeee"])
+    
+    assert [vector[0] for vector in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert [len(batch) for batch in embedder.batches] == [2, 2, 1]
+
+@pytest.mark.asyncio
+async def test_cached_and_duplicate_texts_not_resent():
+    """Test cached texts skip the request and duplicates are sent once"""
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder)
+    await batcher.embed("known")
+    
+    results = await asyncio.gather(batcher.embed("known"), batcher.embed("new"), batcher.embed("new"))
+    
+    assert results == [[5.0, 1.0], [3.0, 1.0], [3.0, 1.0]]
+    assert embedder.batches == [["known"], ["new"]]
+    metrics = batcher.get_metrics()
+    assert metrics["cache_hits"] == 1
+    assert metrics["coalesced"] == 1
+
+@pytest.mark.asyncio
+async def test_returned_vectors_are_copies():
+    """Test callers cannot modify cached vectors"""
+    batcher = EmbeddingBatcher(FakeEmbedder())
+    vector = await batcher.embed("text")
+    vector.append(99.0)
+    
+    assert await batcher.embed("text") == [4.0, 1.0]
+
+@pytest.mark.asyncio
+async def test_failed_batch_reaches_every_caller():
+    """Test a failed request raises for each caller and caches nothing"""
+    embedder = FakeEmbedder(fail=True)
+    batcher = EmbeddingBatcher(embedder)
+    
+    results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.get_metrics()["cached"] == 0
+
+@pytest.mark.asyncio
+async def test_misses_are_the_texts_sent():
+    """Test only texts not cached or pending for another caller are reported as misses"""
+    batcher = EmbeddingBatcher(FakeEmbedder())
+    await batcher.embed("known")
+
+    vectors, misses = await batcher.embed_many_with_misses(["known", "new", "new"])
+
+    assert vectors == [[5.0, 1.0], [3.0, 1.0], [3.0, 1.0]]
+    assert misses == ["new"]
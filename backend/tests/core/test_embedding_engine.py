@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+from backend.core.embedding_engine import HashedNgramEmbedder
+
+TEXTS = [
+    "User authentication with OAuth and multi-factor login",
+    "Sales dashboard with charts and date filters",
+    "Export reports to PDF and CSV files"
+]
+
+def test_vectors_are_unit_length():
+    """Test embeddings are L2 normalized and empty texts are zero"""
+    vectors = HashedNgramEmbedder(dim=256).embed_many(TEXTS + ["", "!!!"])
+
+    assert vectors.shape == (5, 256)
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert not vectors[3:].any()
+
+def test_batch_matches_single_texts():
+    """Test embedding a batch gives the same vectors as one text at a time"""
+    embedder = HashedNgramEmbedder(dim=256)
+    batch = embedder.embed_many(TEXTS)
+
+    for text, vector in zip(TEXTS, batch):
+        assert np.allclose(embedder.embed(text), vector)
+
+def test_hashes_are_stable_across_instances():
+    """Test vectors do not depend on the process or instance"""
+    assert np.array_equal(HashedNgramEmbedder(dim=128).embed_many(TEXTS), HashedNgramEmbedder(dim=128).embed_many(TEXTS))
+
+def test_similarity_follows_shared_words_not_prefixes():
+    """Test the nearest text shares words with the query, wherever they appear"""
+    embedder = HashedNgramEmbedder(dim=768)
+    stored = embedder.embed_many(TEXTS, update=True)
+    # Shares its first characters with the authentication text but is about exports
+    query = embedder.embed("User wants CSV export of PDF reports")
+
+    assert int(np.argmax(stored @ query)) == 2
+
+def test_character_ngrams_match_word_variants():
+    """Test inflected words still land close together"""
+    embedder = HashedNgramEmbedder(dim=768)
+    stored = embedder.embed_many(["filtering search results", "billing invoices"])
+
+    assert int(np.argmax(stored @ embedder.embed("filters"))) == 0
+
+def test_idf_downweights_common_terms():
+    """Test words seen in every stored text count for less once observed"""
+    embedder = HashedNgramEmbedder(dim=768, char_ngrams=(3, 3), word_bigrams=False)
+    before = embedder.embed("feature login")
+    embedder.observe([f"feature number {i}" for i in range(20)])
+    after = embedder.embed("feature login")
+    feature_only = embedder.embed("feature") > 0
+
+    assert after[feature_only].sum() < before[feature_only].sum()
+    assert embedder.get_metrics()["documents"] == 20
+
+def test_invalid_configuration():
+    """Test bad dimensions and n-gram ranges are rejected"""
+    with pytest.raises(ValueError):
+        HashedNgramEmbedder(dim=0)
+    with pytest.raises(ValueError):
+        HashedNgramEmbedder(char_ngrams=(4, 3))
+
+def test_frozen_weights_do_not_change():
+    """Test a frozen embedder refuses to learn and keeps making identical vectors"""
+    embedder = HashedNgramEmbedder(dim=256)
+    embedder.observe(TEXTS)
+    embedder.freeze()
+    before = embedder.embed(TEXTS[0])
+
+    with pytest.raises(RuntimeError):
+        embedder.observe(["more text"])
+    with pytest.raises(RuntimeError):
+        embedder.embed_many(["more text"], update=True)
+    assert np.array_equal(embedder.embed(TEXTS[0]), before)
+    assert embedder.get_metrics()["frozen"]
@@ -0,0 +1,152 @@
+import pytest
+import os
+import time
+from datetime import datetime, timedelta
+from backend.core.event_log import EventLog, EventLogClosedError
+from backend.core.event_system import EventSystem
+
+@pytest.fixture
+def log_dir(tmp_path):
+    return str(tmp_path / "events")
+
+def _append(log, count, correlation_id="run_1", start=None):
+    start = start or datetime(2025, 1, 1)
+    for i in range(count):
+        log.append(
+            topic="agent.test.test_event",
+            data={"i": i},
+            timestamp=start + timedelta(seconds=i),
+            correlation_id=correlation_id
+        )
+
+def test_replay_survives_reopen(log_dir):
+    """Test events are readable after the log is closed and reopened"""
+    log = EventLog(log_dir)
+    _append(log, 5)
+    log.close()
+    
+    reopened = EventLog(log_dir)
+    records = list(reopened.replay())
+    assert [r["data"]["i"] for r in records] == [0, 1, 2, 3, 4]
+    assert records[0]["correlation_id"] == "run_1"
+    assert records[0]["timestamp"] == datetime(2025, 1, 1)
+    reopened.close()
+
+def test_replay_filters(log_dir):
+    """Test replay by correlation id and time window"""
+    log = EventLog(log_dir, segment_max_bytes=256)
+    _append(log, 10, correlation_id="run_1")
+    _append(log, 10, correlation_id="run_2", start=datetime(2025, 1, 1, 0, 0, 30))
+    
+    assert len(list(log.replay(correlation_id="run_2"))) == 10
+    window = list(log.replay(
+        start_time=datetime(2025, 1, 1, 0, 0, 3),
+        end_time=datetime(2025, 1, 1, 0, 0, 5)
+    ))
+    assert [r["data"]["i"] for r in window] == [3, 4, 5]
+    assert log.get_metrics()["segments"] > 1
+    log.close()
+
+def test_out_of_order_appends_stay_in_time_window(log_dir):
+    """Test a record appended after later-stamped ones is still found by a time window"""
+    log = EventLog(log_dir, segment_max_bytes=256)
+    start = datetime(2025, 1, 1)
+    # A deferred record completes after newer events were already logged
+    for seconds in (5, 6, 7, 1):
+        log.append("agent.test.test_event", {"s": seconds}, start + timedelta(seconds=seconds))
+    _append(log, 3, start=start + timedelta(seconds=20))
+
+    window = list(log.replay(start_time=start, end_time=start + timedelta(seconds=2)))
+    assert [r["data"]["s"] for r in window] == [1]
+    log.close()
+
+    reopened = EventLog(log_dir)
+    assert [r["data"]["s"] for r in reopened.replay(end_time=start + timedelta(seconds=2))] == [1]
+    reopened.close()
+
+def test_closed_log_rejects_access(log_dir):
+    """Test appending to or replaying a closed log raises a clear error"""
+    log = EventLog(log_dir)
+    log.close()
+
+    with pytest.raises(EventLogClosedError):
+        _append(log, 1)
+    with pytest.raises(EventLogClosedError):
+        list(log.replay())
+
+def test_torn_tail_is_truncated(log_dir):
+    """Test a partially written frame is dropped on reopen"""
+    log = EventLog(log_dir)
+    _append(log, 3)
+    log.close()
+    
+    segment = os.path.join(log_dir, sorted(os.listdir(log_dir))[0])
+    with open(segment, "ab") as f:
+        f.write(b"\x10\x00\x00")
+    
+    reopened = EventLog(log_dir)
+    assert len(list(reopened.replay())) == 3
+    _append(reopened, 1)
+    assert len(list(reopened.replay())) == 4
+    reopened.close()
+
+def test_retention_and_compaction(log_dir):
+    """Test retention drops old segments and compaction merges small ones"""
+    log = EventLog(log_dir, segment_max_bytes=200, max_segments=4)
+    _append(log, 30)
+    assert log.get_metrics()["segments"] <= 4
+    
+    log.segment_max_bytes = 10_000
+    before = [r["data"]["i"] for r in log.replay()]
+    removed = log.compact()
+    
+    assert removed > 0
+    assert log.get_metrics()["segments"] == 2
+    assert [r["data"]["i"] for r in log.replay()] == before
+    log.close()
+
+def test_replay_survives_concurrent_compaction(log_dir):
+    """Test a replay started before compaction still yields every record of its snapshot"""
+    log = EventLog(log_dir, segment_max_bytes=200)
+    _append(log, 30)
+    log.segment_max_bytes = 10_000
+    
+    replay = log.replay()
+    first = next(replay)
+    assert log.compact() > 0
+    
+    assert [first["data"]["i"]] + [r["data"]["i"] for r in replay] == list(range(30))
+    log.close()
+
+def test_unsynced_records_are_synced_without_further_writes(log_dir):
+    """Test records are fsynced after the interval even when appends stop"""
+    log = EventLog(log_dir, fsync_every=100, fsync_interval=0.05)
+    _append(log, 3)
+    assert log.get_metrics()["unsynced_records"] == 3
+    
+    deadline = time.monotonic() + 2.0
+    while log.get_metrics()["unsynced_records"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log.get_metrics()["unsynced_records"] == 0
+    log.close()
+    assert not log._syncer.is_alive()
+
+def test_event_system_replay(log_dir):
+    """Test published events are written to the log with their correlation id"""
+    log = EventLog(log_dir)
+    event_system = EventSystem(event_log=log)
+    
+    for run in ("run_1", "run_2"):
+        event_system.publish(
+            event_type="test_event",
+            source_agent="source",
+            target_agent="test_agent",
+            payload={"run": run},
+            correlation_id=run
+        )
+    
+    replayed = list(event_system.replay_events(correlation_id="run_2"))
+    assert len(replayed) == 1
+    assert replayed[0].topic == "agent.test_agent.test_event"
+    assert replayed[0].data == {"run": "run_2"}
+    log.close()
@@ -1,8 +1,11 @@
 import pytest
+from pubsub import pub
 from datetime import datetime
 from unittest.mock import Mock
 import time
-from backend.core.event_system import EventSystem, EventMessage
+import asyncio
+from backend.core.event_system import EventSystem, EventMessage, EventStore
+from backend.core.retry_scheduler import RetryScheduler
 from unittest.mock import patch
 
 @pytest.fixture
@@ -61,7 +64,30 @@ def test_retry_logic(event_system, monkeypatch):
         correlation_id="test_123"
     )
     
+    # The retry is scheduled rather than slept through
+    assert mock_pub.call_count == 1
+    assert event_system.get_metrics()["retry_queue"]["queue_depth"] == 1
+    
+    event_system._retry_scheduler.run_pending(now=time.monotonic() + 60)
+    
     assert mock_pub.call_count == 2
+    assert event_system._retry_scheduler.attempts("test_123:test_event") == 0
+
+def test_retry_without_loop_runs_on_next_publish(monkeypatch):
+    """Test a retry scheduled with no running loop is re-published by the next publish"""
+    now = [0.0]
+    event_system = EventSystem(retry_scheduler=RetryScheduler(clock=lambda: now[0]))
+    mock_pub = Mock(side_effect=[Exception("Test error"), None, None])
+    monkeypatch.setattr("pubsub.pub.sendMessage", mock_pub)
+    
+    event_system.publish("test_event", "source", "test_agent", {"n": 1}, "first")
+    assert mock_pub.call_count == 1
+    
+    now[0] = 60.0
+    event_system.publish("test_event", "source", "test_agent", {"n": 2}, "second")
+    
+    assert [c.kwargs["data"] for c in mock_pub.call_args_list] == [{"n": 1}, {"n": 1}, {"n": 2}]
+    assert event_system.get_metrics()["retry_queue"]["queue_depth"] == 0
 
 def test_error_handling(event_system):
     """Test error event generation"""
@@ -135,26 +161,44 @@ async def test_retry_with_jitter():
     event_system = EventSystem()
     delays = []
     
-    def track_delay(delay):
+    def track_delay(key, callback, delay):
         delays.append(delay)
+        return True
     
-    # Mock time.sleep to track delays
-    with patch('time.sleep', side_effect=track_delay):
-        event_system._handle_publish_error(
-            EventMessage(
-                type="test",
-                source_agent="test",
-                target_agent="test",
-                timestamp=datetime.now(),
-                payload={},
-                correlation_id="test"
-            )
-        )
+    event = EventMessage(
+        type="test",
+        source_agent="test",
+        target_agent="test",
+        timestamp=datetime.now(),
+        payload={},
+        correlation_id="test"
+    )
+    
+    # Track delays of consecutive failures without waiting for them
+    with patch.object(event_system._retry_scheduler, 'schedule', side_effect=track_delay):
+        for _ in range(EventSystem.MAX_RETRIES):
+            event_system._handle_publish_error(event)
     
     # Verify delays increase with jitter
-    assert len(delays) > 0
+    assert len(delays) == EventSystem.MAX_RETRIES
     for i in range(1, len(delays)):
-        assert delays[i] > delays[i-1] 
+        assert delays[i] > delays[i-1]
+
+def test_retry_does_not_block(event_system, monkeypatch):
+    """Test a failing publish returns without sleeping through the backoff"""
+    monkeypatch.setattr("pubsub.pub.sendMessage", Mock(side_effect=Exception("Test error")))
+    
+    start = time.perf_counter()
+    event_system.publish(
+        event_type="test_event",
+        source_agent="source",
+        target_agent="test_agent",
+        payload={"test": "data"},
+        correlation_id="test_123"
+    )
+    
+    assert time.perf_counter() - start < 0.5
+    event_system._retry_scheduler.shutdown()
 
 @pytest.mark.asyncio
 async def test_event_history():
@@ -239,4 +283,208 @@ async def test_event_metrics():
     assert metrics["total_events"] == 3
     assert metrics["avg_processing_time"] > 0
     assert "agent.test.test_event" in metrics["events_by_topic"]
-    assert metrics["events_by_topic"]["agent.test.test_event"] == 3 
\ No newline at end of file
+    assert metrics["events_by_topic"]["agent.test.test_event"] == 3 
+@pytest.mark.asyncio
+async def test_async_handler_publish_and_wait():
+    """Test coroutine handlers are scheduled and awaited by publish_and_wait"""
+    event_system = EventSystem()
+    received = []
+    
+    async def handler(data=None):
+        await asyncio.sleep(0.01)
+        received.append(data)
+        return data["test"]
+    
+    event_system.subscribe("test_event", handler, "test_agent")
+    
+    results = await event_system.publish_and_wait(
+        event_type="test_event",
+        source_agent="source",
+        target_agent="test_agent",
+        payload={"test": "data"},
+        correlation_id="test_123"
+    )
+    
+    assert results == ["data"]
+    assert received == [{"test": "data"}]
+
+@pytest.mark.asyncio
+async def test_async_handlers_run_concurrently():
+    """Test repeated publishes to an async handler fan out in parallel"""
+    event_system = EventSystem()
+    
+    async def handler(data=None):
+        await asyncio.sleep(0.1)
+    
+    event_system.subscribe("test_event", handler, "test_agent")
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        event_system.publish_and_wait(
+            event_type="test_event",
+            source_agent="source",
+            target_agent="test_agent",
+            payload={"test": i},
+            correlation_id=f"test_{i}"
+        )
+        for i in range(10)
+    ])
+    
+    assert time.perf_counter() - start < 0.5
+
+def test_event_store_eviction_updates_counters():
+    """Test counters follow appends and evictions"""
+    store = EventStore(max_size=3)
+    for i in range(5):
+        store.store_event("agent.a.test" if i % 2 else "agent.b.test", {"i": i})
+    
+    assert store.count() == 3
+    assert store.count_by_topic() == {"agent.a.test": 1, "agent.b.test": 2}
+    assert [e.data["i"] for e in store.get_events()] == [2, 3, 4]
+    expected_avg = sum(e.processing_time_ms for e in store.get_events()) / 3
+    assert store.average_processing_time() == pytest.approx(expected_avg)
+
+def test_event_store_range_query():
+    """Test prefix and time range queries return events in order"""
+    store = EventStore()
+    for i in range(6):
+        store.store_event(f"agent.{'ab'[i % 2]}.test", {"i": i})
+    
+    events = store.get_events()
+    start, end = events[1].timestamp, events[4].timestamp
+    
+    in_range = [e.data["i"] for e in store.query("agent.", start, end)]
+    expected = [e.data["i"] for e in events if start <= e.timestamp <= end]
+    assert in_range == expected
+    assert {1, 2, 3, 4} <= set(in_range)
+    assert [e.data["i"] for e in store.query("agent.")] == [0, 1, 2, 3, 4, 5]
+    assert [e.data["i"] for e in store.query("agent.b")] == [1, 3, 5]
+    assert store.query("system.") == []
+
+@pytest.mark.asyncio
+async def test_listener_latency_metrics():
+    """Test listener invocations are timed per topic and reported"""
+    event_system = EventSystem()
+    metric_events = []
+    
+    def slow_handler(data=None):
+        time.sleep(0.02)
+    
+    async def async_handler(data=None):
+        await asyncio.sleep(0.01)
+    
+    event_system.subscribe("test_event", slow_handler, "test_agent")
+    event_system.subscribe("test_event", async_handler, "test_agent")
+    event_system.subscribe("system.performance_metric", lambda data=None: metric_events.append(data))
+    
+    await event_system.publish_and_wait(
+        event_type="test_event",
+        source_agent="source",
+        target_agent="test_agent",
+        payload={"test": "data"},
+        correlation_id="test_123"
+    )
+    
+    latency = event_system.get_metrics()["listener_latency"]["agent.test_agent.test_event"]
+    slow_stats = next(v for k, v in latency.items() if k.endswith("slow_handler"))
+    async_stats = next(v for k, v in latency.items() if k.endswith("async_handler"))
+    assert slow_stats["count"] == 1
+    assert slow_stats["max_ms"] >= 20
+    assert async_stats["max_ms"] >= 10
+    
+    # Processing time covers the synchronous listeners of the publish
+    history = event_system.get_event_history(topic_filter="agent.test_agent")
+    assert history[0]["processing_time_ms"] >= 20
+    
+    event_system.emit_performance_metrics()
+    assert metric_events[0]["metric"] == "listener_latency"
+    assert "agent.test_agent.test_event" in metric_events[0]["listener_latency"]
+
+def test_wildcard_subscriptions():
+    """Test wildcard patterns receive events from every matching topic"""
+    event_system = EventSystem()
+    completed = []
+    everything = []
+    
+    event_system.subscribe("agent.*.feature_completed", lambda data=None: completed.append(data))
+    event_system.subscribe("#", lambda data=None: everything.append(data), "monitor")
+    
+    for agent in ("lead_agent", "feature_agent"):
+        event_system.publish(
+            event_type="feature_completed",
+            source_agent="source",
+            target_agent=agent,
+            payload={"agent": agent},
+            correlation_id="test_123"
+        )
+    event_system.publish(
+        event_type="test_event",
+        source_agent="source",
+        target_agent="lead_agent",
+        payload={"agent": "lead_agent"},
+        correlation_id="test_123"
+    )
+    
+    assert [e["agent"] for e in completed] == ["lead_agent", "feature_agent"]
+    assert len(everything) == 3
+    
+    event_system.unsubscribe_all("monitor")
+    event_system.publish(
+        event_type="test_event",
+        source_agent="source",
+        target_agent="lead_agent",
+        payload={},
+        correlation_id="test_123"
+    )
+    assert len(everything) == 3
+
+def test_wildcard_listeners_get_the_full_message():
+    """Test a # listener receives the same message arguments as a direct listener"""
+    event_system = EventSystem()
+    direct, wildcard = [], []
+    
+    def direct_listener(data=None, correlation_id=None, timestamp=None):
+        direct.append({"data": data, "correlation_id": correlation_id, "timestamp": timestamp})
+    
+    def wildcard_listener(**kwargs):
+        wildcard.append(kwargs)
+    
+    pub.subscribe(direct_listener, "route_kwargs_event")
+    event_system._router.add("#", wildcard_listener)
+    sent_at = datetime(2025, 1, 1)
+    pub.sendMessage("route_kwargs_event", data={"n": 1}, correlation_id="run_1", timestamp=sent_at)
+    
+    assert wildcard == direct == [{"data": {"n": 1}, "correlation_id": "run_1", "timestamp": sent_at}]
+    pub.unsubscribe(direct_listener, "route_kwargs_event")
+
+def test_invalid_wildcard_pattern():
+    """Test patterns that cannot match a valid topic are rejected"""
+    event_system = EventSystem()
+    with pytest.raises(ValueError):
+        event_system.subscribe("agent.*.unknown_event", lambda data=None: None)
+
+@pytest.mark.asyncio
+async def test_coalesced_subscription():
+    """Test coalescing subscriptions receive one list per flush"""
+    from backend.core.coalescing import LatestByKey
+    event_system = EventSystem()
+    batches = []
+    
+    event_system.subscribe(
+        "test_event",
+        lambda data=None: batches.append(data),
+        "test_agent",
+        coalesce=LatestByKey(lambda data: data["feature"], interval=0.05)
+    )
+    
+    for status in ("assigned", "completed", "validated"):
+        event_system.publish(
+            event_type="test_event",
+            source_agent="source",
+            target_agent="test_agent",
+            payload={"feature": "Game Board", "status": status},
+            correlation_id="test_123"
+        )
+    
+    await asyncio.sleep(0.1)
+    assert batches == [[{"feature": "Game Board", "status": "validated"}]]
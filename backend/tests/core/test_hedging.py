@@ -0,0 +1,175 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+from backend.core.hedging import Hedger
+from backend.core.model_router import ModelRouter
+from backend.core.rate_limiter import RateLimiter
+from backend.core.response_cache import ResponseCache
+from backend.services.llm_service import LLMService
+
+def warmed_hedger(latency_ms: float = 10, **kwargs) -> Hedger:
+    hedger = Hedger(min_samples=5, min_delay_s=0.001, **kwargs)
+    for _ in range(5):
+        hedger.latency.record(latency_ms)
+    return hedger
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_samples():
+    """Test calls are not hedged until latency has been observed"""
+    hedger = Hedger(min_samples=5)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    assert await hedger.run(call) == "ok"
+    assert len(calls) == 1
+    assert hedger.get_metrics()["hedge_delay_ms"] is None
+
+@pytest.mark.asyncio
+async def test_slow_call_hedged_and_loser_cancelled():
+    """Test a call past the tail latency gets a backup and the slower one is cancelled"""
+    hedger = warmed_hedger()
+    attempts = []
+
+    async def call():
+        attempt = len(attempts)
+        attempts.append("started")
+        try:
+            await asyncio.sleep(1 if attempt == 0 else 0.001)
+        except asyncio.CancelledError:
+            attempts[attempt] = "cancelled"
+            raise
+        return attempt
+
+    assert await hedger.run(call) == 1
+    await asyncio.sleep(0)
+    assert attempts == ["cancelled", "started"]
+    metrics = hedger.get_metrics()
+    assert metrics["hedged"] == 1
+    assert metrics["hedge_wins"] == 1
+
+@pytest.mark.asyncio
+async def test_backup_refused():
+    """Test can_hedge can veto the backup request"""
+    hedger = warmed_hedger()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    assert await hedger.run(call, can_hedge=lambda: False) == "ok"
+    assert len(calls) == 1
+    assert hedger.hedged == 0
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_back_to_backup():
+    """Test a failure only wins once no other attempt is running"""
+    hedger = warmed_hedger()
+    attempts = []
+
+    async def call():
+        attempt = len(attempts)
+        attempts.append(attempt)
+        if attempt == 0:
+            await asyncio.sleep(0.02)
+            raise RuntimeError("primary failed")
+        await asyncio.sleep(0.05)
+        return "backup"
+
+    assert await hedger.run(call) == "backup"
+
+    attempts.clear()
+    async def always_fails():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        await hedger.run(always_fails)
+    assert hedger.failures == 1
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_every_attempt():
+    """Test the overall timeout cancels the primary and the backup"""
+    hedger = warmed_hedger()
+    cancelled = []
+
+    async def call():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        await hedger.run(call, timeout=0.05)
+    await asyncio.sleep(0)
+    assert len(cancelled) == 2
+
+@pytest.mark.asyncio
+async def test_latency_tracked_per_key():
+    """Test one key's samples do not enable hedging for another"""
+    hedger = Hedger(min_samples=2, min_delay_s=0.001)
+    for _ in range(2):
+        hedger.histogram(("gpt-4", "analysis")).record(10)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    assert await hedger.run(call, key=("gpt-3.5-turbo", "chat")) == "ok"
+    assert len(calls) == 1
+    assert hedger.hedge_delay(("gpt-4", "analysis")) is not None
+    assert hedger.hedge_delay(("gpt-3.5-turbo", "chat")) is None
+    metrics = hedger.get_metrics()["keys"]
+    assert metrics["gpt-3.5-turbo/chat"]["latency"]["count"] == 1
+    assert metrics["gpt-4/analysis"]["hedge_delay_ms"] is not None
+
+def hedged_service(create) -> LLMService:
+    hedger = Hedger(min_samples=5, min_delay_s=0.001)
+    for _ in range(5):
+        hedger.histogram(("gpt-4-turbo-preview", "chat")).record(10)
+    service = LLMService(
+        api_key="test_key",
+        # A frozen clock, so the bucket only moves by reservations
+        rate_limiter=RateLimiter(tokens_per_minute=10000, clock=lambda: 0.0),
+        cache=ResponseCache(),
+        router=ModelRouter({}),
+        hedger=hedger
+    )
+    service.client = Mock()
+    service.client.chat.completions.create = create
+    return service
+
+@pytest.mark.asyncio
+async def test_service_returns_reservations_of_cancelled_and_failed_calls():
+    """Test the hedge loser's and a failed call's quota go back to the limiter"""
+    attempts = []
+
+    async def create(**kwargs):
+        attempt = len(attempts)
+        attempts.append(attempt)
+        await asyncio.sleep(1 if attempt == 0 else 0.001)
+        return Mock(choices=[Mock(message=Mock(content="Hi"))], usage=Mock(total_tokens=0))
+
+    service = hedged_service(create)
+    result = await service.chat_completion([{"role": "user", "content": "Hi"}], use_cache=False)
+
+    assert result["content"] == "Hi"
+    assert len(attempts) == 2
+    assert service.rate_limiter.tokens.level == 10000
+
+    async def fail(**kwargs):
+        raise RuntimeError("API down")
+
+    service.client.chat.completions.create = fail
+    result = await service.chat_completion([{"role": "user", "content": "Hi"}], use_cache=False)
+
+    assert result["status"] == "error"
+    assert service.rate_limiter.tokens.level == 10000
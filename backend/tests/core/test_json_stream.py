@@ -0,0 +1,58 @@
+import json
+from backend.core.json_stream import StreamingJSONParser, iter_items
+
+DOCUMENT = {
+    "core_features": [
+        {"name": "Game Board", "requirements": ["Grid", "Click {cells}"], "meta": {"a": [1, 2]}},
+        {"name": "Win \"Detection\"", "requirements": []}
+    ],
+    "success_metrics": ["fast", "fun"],
+    "scores": [1, -2.5e3, True, None]
+}
+
+def feed_in_chunks(parser, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+def test_elements_emitted_whole_for_any_chunking():
+    """Test every watched element is emitted once, in order, whatever the chunk size"""
+    text = json.dumps(DOCUMENT, indent=2)
+    paths = [("core_features",), ("success_metrics",), ("scores",)]
+    for size in (1, 3, 7, len(text)):
+        parser = StreamingJSONParser(paths)
+        items = feed_in_chunks(parser, text, size)
+        assert items == iter_items(DOCUMENT, paths)
+        assert parser.done
+        assert parser.result() == DOCUMENT
+
+def test_element_emitted_when_it_closes():
+    """Test an element is emitted by the chunk that closes it, before the document ends"""
+    parser = StreamingJSONParser([("core_features",)])
+    assert parser.feed('{"core_features": [{"name": "A", "tags": ["x"]') == []
+    assert parser.feed('}, {"name"') == [(("core_features",), {"name": "A", "tags": ["x"]})]
+    assert parser.feed(': "B"}]') == [(("core_features",), {"name": "B"})]
+    assert not parser.done
+    parser.feed("}")
+    assert parser.done
+
+def test_unwatched_arrays_ignored():
+    """Test arrays outside the watched paths are not emitted"""
+    parser = StreamingJSONParser([("core_features",)])
+    assert parser.feed('{"other": [1, 2], "nested": {"core_features": [3]}}') == []
+
+def test_nested_path():
+    """Test arrays inside objects are watched by their full key path"""
+    parser = StreamingJSONParser([("analysis", "risks")])
+    items = parser.feed('{"analysis": {"risks": ["scope", "time"]}}')
+    assert items == [(("analysis", "risks"), "scope"), (("analysis", "risks"), "time")]
+
+def test_keys_and_elements_spanning_chunks():
+    """Test keys and elements split over many chunks, including empty ones, decode whole"""
+    parser = StreamingJSONParser([("core_features",)])
+    items = []
+    for chunk in ['{"core_', '', 'features": [{"na', 'me": "Game', ' Board"', '}', ', 7]}']:
+        items.extend(parser.feed(chunk))
+    assert items == [(("core_features",), {"name": "Game Board"}), (("core_features",), 7)]
+    assert parser.result() == {"core_features": [{"name": "Game Board"}, 7]}
@@ -4,6 +4,10 @@ import openai
 from datetime import datetime
 from backend.core.llm_service import LLMService, LLMResponse
 from backend.core.event_system import EventSystem
+from backend.core.rate_limiter import RateLimiter
+from backend.core.usage_ledger import UsageLedger
+import time
+import asyncio
 
 @pytest.fixture
 def event_system():
@@ -49,16 +53,41 @@ async def test_chat_completion_success(llm_service):
 
 @pytest.mark.asyncio
 async def test_rate_limiting(llm_service):
-    """Test rate limiting functionality"""
-    llm_service.token_bucket = 0  # Deplete token bucket
+    """Test requests larger than the per-minute budget are rejected"""
+    llm_service.rate_limiter = RateLimiter(tokens_per_minute=100)
     
     with pytest.raises(Exception) as exc_info:
         await llm_service.generate_chat_completion([
-            {"role": "user", "content": "Hello" * 1000}  # Large message
+            {"role": "user", "content": "Hello " * 200}  # More tokens than one minute allows
         ])
     
     assert "Rate limit exceeded" in str(exc_info.value)
 
+@pytest.mark.asyncio
+async def test_rate_limiting_waits_for_tokens(event_system):
+    """Test a depleted bucket delays the request instead of failing it"""
+    limiter = RateLimiter(tokens_per_minute=6000)
+    with patch.dict('os.environ', {'OPENAI_API_KEY': 'test_key'}):
+        service = LLMService(event_system, rate_limiter=limiter)
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content="ok", function_call=None))]
+    mock_response.model = "gpt-3.5-turbo"
+    mock_response.usage = Mock(total_tokens=30)
+    mock_response.id = "test_id"
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(return_value=mock_response)
+    service.token_bucket = 0
+    
+    start = time.monotonic()
+    response = await service.generate_chat_completion([
+        {"role": "user", "content": "Hello" * 8}  # About 0.1s of refill
+    ])
+    
+    assert response.content == "ok"
+    assert time.monotonic() - start >= 0.09
+    # The estimate was replaced by the 30 tokens actually used
+    assert service.token_bucket <= -10
+
 @pytest.mark.asyncio
 async def test_api_error_handling(llm_service):
     """Test API error handling"""
@@ -118,7 +147,25 @@ async def test_embeddings_generation(llm_service):
     embeddings = await llm_service.generate_embeddings(["test text"])
     
     assert len(embeddings) == 1
-    assert embeddings[0] == [0.1, 0.2, 0.3] 
+    assert embeddings[0] == [0.1, 0.2, 0.3]
+
+@pytest.mark.asyncio
+async def test_embeddings_batched_across_callers(llm_service):
+    """Test concurrent single-text embedding calls share one request"""
+    async def create(model, input):
+        return Mock(data=[Mock(embedding=[float(len(text))]) for text in input])
+    
+    mock_client = Mock()
+    mock_client.embeddings.create = AsyncMock(side_effect=create)
+    llm_service.client = mock_client
+    
+    results = await asyncio.gather(*(
+        llm_service.generate_embeddings([text]) for text in ["a", "bb", "ccc"]
+    ))
+    
+    assert results == [[[1.0]], [[2.0]], [[3.0]]]
+    assert mock_client.embeddings.create.await_count == 1
+    assert llm_service.get_embedding_metrics()["text-embedding-ada-002"]["texts_sent"] == 3
 
 def test_invalid_environment(event_system):
     """Test invalid environment raises error"""
@@ -126,6 +173,26 @@ def test_invalid_environment(event_system):
         LLMService(event_system, environment="invalid")
     assert "Environment must be one of" in str(exc_info.value)
 
+@pytest.mark.asyncio
+async def test_embeddings_charge_only_cache_misses(event_system):
+    """Test cached texts are not charged and a call answered from the cache is a hit"""
+    ledger = UsageLedger()
+    with patch.dict('os.environ', {'OPENAI_API_KEY': 'test_key'}):
+        service = LLMService(event_system, ledger=ledger)
+    async def create(model, input):
+        return Mock(data=[Mock(embedding=[float(len(text))]) for text in input])
+    service.client = Mock()
+    service.client.embeddings.create = AsyncMock(side_effect=create)
+
+    await service.generate_embeddings(["cached text"])
+    await service.generate_embeddings(["cached text", "new text"])
+    await service.generate_embeddings(["cached text", "new text"])
+
+    first, partial, full = ledger.records(None)
+    assert partial["prompt_tokens"] == first["prompt_tokens"] > 0
+    assert not partial["cache_hit"]
+    assert (full["prompt_tokens"], full["cache_hit"]) == (0, True)
+
 @pytest.mark.asyncio
 async def test_invalid_embedding_model(llm_service):
     """Test invalid embedding model raises error"""
@@ -155,6 +222,20 @@ async def test_max_tokens_validation(llm_service):
         )
     assert "exceeds model limit" in str(exc_info.value)
 
+@pytest.mark.asyncio
+async def test_prompt_size_validation(llm_service):
+    """Test prompts that leave no room for max_tokens are rejected before sending"""
+    llm_service.client = Mock()
+    llm_service.client.chat.completions.create = AsyncMock()
+    
+    with pytest.raises(ValueError) as exc_info:
+        await llm_service.generate_chat_completion(
+            messages=[{"role": "user", "content": "word " * 3000}],
+            max_tokens=2000
+        )
+    assert "exceeds model limit" in str(exc_info.value)
+    llm_service.client.chat.completions.create.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_function_calling(llm_service):
     """Test function calling support"""
@@ -220,4 +301,27 @@ async def test_streaming_response(llm_service):
     ):
         collected_text += chunk
     
-    assert collected_text == "Hello World" 
\ No newline at end of file
+    assert collected_text == "Hello World" 
+@pytest.mark.asyncio
+async def test_streaming_returns_unused_reservation(event_system):
+    """Test a finished stream replaces its max_tokens reservation with the tokens counted"""
+    limiter = RateLimiter(tokens_per_minute=10000, clock=lambda: 0.0)
+    ledger = UsageLedger()
+    with patch.dict('os.environ', {'OPENAI_API_KEY': 'test_key'}):
+        service = LLMService(event_system, rate_limiter=limiter, ledger=ledger)
+    async def mock_stream():
+        yield Mock(choices=[Mock(delta=Mock(content="Hello"))])
+        yield Mock(choices=[Mock(delta=Mock(content=" World"))])
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(return_value=mock_stream())
+
+    async for _ in await service.generate_chat_completion(
+        messages=[{"role": "user", "content": "Say hello"}],
+        max_tokens=500,
+        stream=True
+    ):
+        pass
+
+    record = ledger.records(None)[0]
+    assert record["completion_tokens"] == 2
+    assert limiter.tokens.level == 10000 - record["prompt_tokens"] - record["completion_tokens"]
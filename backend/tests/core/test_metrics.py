@@ -0,0 +1,37 @@
+import pytest
+from backend.core.metrics import LatencyHistogram, LatencyRegistry
+
+def test_histogram_percentiles():
+    """Test percentiles stay within the bucket growth factor"""
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(float(value))
+    
+    assert histogram.count == 1000
+    assert histogram.max_ms == 1000.0
+    assert histogram.percentile(50) == pytest.approx(500, rel=0.08)
+    assert histogram.percentile(99) == pytest.approx(990, rel=0.08)
+    assert histogram.percentile(100) == 1000.0
+
+def test_histogram_empty_and_reset():
+    """Test empty histograms report zeros"""
+    histogram = LatencyHistogram()
+    assert histogram.snapshot()["p95_ms"] == 0.0
+    
+    histogram.record(5.0)
+    histogram.reset()
+    assert histogram.snapshot() == {
+        "count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0
+    }
+
+def test_registry_groups_by_topic():
+    """Test registry snapshots are grouped by topic and listener"""
+    registry = LatencyRegistry()
+    registry.record("agent.a.test", "handler", 2.0)
+    registry.record("agent.a.test", "handler", 4.0)
+    registry.record("agent.b.test", "other", 1.0)
+    
+    snapshot = registry.snapshot()
+    assert snapshot["agent.a.test"]["handler"]["count"] == 2
+    assert snapshot["agent.a.test"]["handler"]["max_ms"] == 4.0
+    assert set(snapshot) == {"agent.a.test", "agent.b.test"}
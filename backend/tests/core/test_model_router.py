@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from backend.core.model_router import ModelRouter, RoutePolicy
+from backend.core.rate_limiter import RateLimiter
+from backend.core.response_cache import ResponseCache
+from backend.core.single_flight import SingleFlight
+from backend.services.llm_service import LLMService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_router(**kwargs) -> ModelRouter:
+    return ModelRouter({
+        "chat": RoutePolicy(["fast", "strong"], max_p95_ms=1000, min_samples=5),
+        "analysis": RoutePolicy(["strong", "fast"])
+    }, **kwargs)
+
+def test_policy_order_per_call_class():
+    """Test each call class gets its preferred model"""
+    router = make_router()
+    assert router.choose("chat") == "fast"
+    assert router.choose("analysis") == "strong"
+    assert router.choose("unknown") is None
+    assert router.choose("unknown", "default") == "default"
+
+def test_slow_model_loses_its_place():
+    """Test a model whose p95 exceeds the policy falls behind the next one"""
+    router = make_router()
+    for _ in range(5):
+        router.record("fast", 3000, success=True)
+    assert router.candidates("chat") == ["strong", "fast"]
+    # The same model is still fine for a class without a latency limit
+    assert router.choose("analysis") == "strong"
+
+def test_failing_model_cools_down():
+    """Test consecutive failures skip a model until the cooldown ends"""
+    clock = FakeClock()
+    router = make_router(failure_threshold=2, cooldown_s=30, window=20, clock=clock)
+    for _ in range(10):
+        router.record("strong", 100, success=True)
+    router.record("strong", 100, success=False)
+    assert router.choose("analysis") == "strong"
+    router.record("strong", 100, success=False)
+    assert router.choose("analysis") == "fast"
+    clock.now = 31
+    assert router.choose("analysis") == "strong"
+
+def test_from_config():
+    """Test policies can be declared as plain data"""
+    router = ModelRouter.from_config({"chat": {"models": ["a", "b"], "max_error_rate": 0.1}})
+    assert router.candidates("chat") == ["a", "b"]
+    assert router.policies["chat"].max_error_rate == 0.1
+
+@pytest.mark.asyncio
+async def test_llm_service_falls_back_to_next_model():
+    """Test a failed call is retried on the next model for its class"""
+    router = make_router()
+    service = LLMService(
+        api_key="test_key",
+        rate_limiter=RateLimiter(),
+        cache=ResponseCache(),
+        single_flight=SingleFlight(),
+        router=router
+    )
+    response = Mock()
+    response.choices = [Mock(message=Mock(content="Hi"))]
+    response.usage = Mock(total_tokens=10)
+
+    async def create(**kwargs):
+        if kwargs["model"] == "fast":
+            raise Exception("overloaded")
+        return response
+
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(side_effect=create)
+
+    result = await service.chat_completion([{"role": "user", "content": "Hello"}], call_class="chat")
+
+    assert result == {"status": "success", "content": "Hi"}
+    models = [call.kwargs["model"] for call in service.client.chat.completions.create.await_args_list]
+    assert models == ["fast", "strong"]
+    metrics = router.get_metrics()["models"]
+    assert metrics["fast"]["error_rate"] == 1.0
+    assert metrics["strong"]["calls"] == 1
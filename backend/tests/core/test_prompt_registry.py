@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from backend.core.prompt_registry import PromptTemplate, PromptRegistry
+from backend.core.rate_limiter import RateLimiter
+from backend.core.model_router import ModelRouter
+from backend.services.llm_service import LLMService
+
+def test_static_prefix_is_shared_across_renders():
+    """Test instructions render byte-identically ahead of the variable content"""
+    template = PromptTemplate("test.analysis", [
+        ("system", "Analyze the feature."),
+        ("user", "Feature: {feature}")
+    ])
+    first = template.render(feature={"name": "Login", "priority": "high"})
+    second = template.render(feature={"priority": "low", "name": "Search"})
+
+    assert template.prefix_length == 1
+    assert first[0] == second[0] == {"role": "system", "content": "Analyze the feature."}
+    assert first[1]["content"] == 'Feature: {"name": "Login", "priority": "high"}'
+    assert second[1]["content"] == 'Feature: {"name": "Search", "priority": "low"}'
+
+def test_render_does_not_share_prefix_dicts():
+    """Test callers can mutate rendered messages without affecting the template"""
+    template = PromptTemplate("test.mutate", [("system", "Static"), ("user", "{text}")])
+    template.render(text="a")[0]["content"] = "changed"
+
+    assert template.render(text="b")[0]["content"] == "Static"
+
+def test_escaped_braces_in_static_messages():
+    """Test doubled braces in static messages render as literal braces"""
+    template = PromptTemplate("test.braces", [("system", "Reply with {{}} when empty"), ("user", "{text}")])
+
+    assert template.render(text="hi")[0]["content"] == "Reply with {} when empty"
+
+def test_missing_values_raise():
+    """Test rendering without every field fails before formatting"""
+    template = PromptTemplate("test.missing", [("user", "{summary} and {transcript}")])
+
+    with pytest.raises(KeyError, match="transcript"):
+        template.render(summary="x")
+
+def test_registry_renders_by_name():
+    """Test templates can be looked up and rendered by name"""
+    registry = PromptRegistry()
+    template = registry.register(PromptTemplate("test.named", [("user", "Hello {name}")]))
+
+    assert registry.get("test.named") is template
+    assert registry.render("test.named", name="Ada") == [{"role": "user", "content": "Hello Ada"}]
+    assert registry.get_metrics()["templates"] == 1
+
+def test_schema_message_is_cached():
+    """Test a schema is serialized once and digests depend on content only"""
+    registry = PromptRegistry()
+    schema = {"type": "object", "properties": {"name": {"type": "string"}}}
+
+    first = registry.schema_message(schema)
+    second = registry.schema_message(schema)
+
+    assert first == second
+    assert '"name"' in first["content"]
+    assert registry.get_metrics()["schema_misses"] == 1
+    assert registry.get_metrics()["schema_hits"] == 1
+    assert registry.schema_digest(schema) == registry.schema_digest(
+        {"properties": {"name": {"type": "string"}}, "type": "object"}
+    )
+    assert registry.schema_digest(schema) != registry.schema_digest({"type": "array"})
+
+def test_schema_cache_is_bounded():
+    """Test the least recently used schemas are dropped over the limit"""
+    registry = PromptRegistry(max_schemas=2)
+    schemas = [{"type": "object", "title": str(index)} for index in range(3)]
+    for schema in schemas:
+        registry.schema_message(schema)
+
+    assert registry.get_metrics()["schemas"] == 2
+    registry.schema_message(schemas[0])
+    assert registry.get_metrics()["schema_misses"] == 4
+
+@pytest.mark.asyncio
+async def test_structured_output_sends_schema_first():
+    """Test the LLM service puts the cached schema message ahead of the prompt"""
+    registry = PromptRegistry()
+    service = LLMService(
+        api_key="test_key",
+        rate_limiter=RateLimiter(),
+        router=ModelRouter({}),
+        prompts=registry
+    )
+    response = Mock()
+    response.choices = [Mock(message=Mock(content='{"name": "Login"}'))]
+    response.usage = Mock(total_tokens=20)
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(return_value=response)
+    schema = {"type": "object"}
+
+    await service.structured_output([{"role": "user", "content": "Define login"}], schema, use_cache=False)
+    await service.structured_output([{"role": "user", "content": "Define search"}], schema, use_cache=False)
+
+    calls = service.client.chat.completions.create.await_args_list
+    assert calls[0].kwargs["messages"][0] == calls[1].kwargs["messages"][0] == registry.schema_message(schema)
+    assert calls[1].kwargs["messages"][1]["content"] == "Define search"
+    assert registry.get_metrics()["schema_hits"] >= 1
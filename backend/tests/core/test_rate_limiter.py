@@ -0,0 +1,86 @@
+import pytest
+import asyncio
+import time
+from backend.core.rate_limiter import RateLimiter, RateLimitExceeded
+
+@pytest.mark.asyncio
+async def test_acquire_immediately_with_capacity():
+    """Test requests within capacity are granted without waiting"""
+    limiter = RateLimiter(tokens_per_minute=6000, requests_per_minute=60)
+    
+    waited = await limiter.acquire(100)
+    
+    assert waited == 0.0
+    metrics = limiter.get_metrics()
+    assert metrics["granted"] == 1
+    assert metrics["remaining_tokens"] == pytest.approx(5900, abs=5)
+    assert metrics["remaining_requests"] == pytest.approx(59, abs=0.1)
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_refill():
+    """Test a depleted bucket waits for refill instead of failing"""
+    limiter = RateLimiter(tokens_per_minute=6000)
+    limiter.tokens.level = 0
+    
+    start = time.monotonic()
+    await limiter.acquire(10)
+    
+    assert time.monotonic() - start >= 0.09
+    assert limiter.get_metrics()["waited"] == 1
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_limit():
+    """Test the request bucket limits calls regardless of token counts"""
+    limiter = RateLimiter(tokens_per_minute=100000, requests_per_minute=600)
+    limiter.requests.level = 0
+    
+    start = time.monotonic()
+    await limiter.acquire(1)
+    
+    assert time.monotonic() - start >= 0.09
+
+@pytest.mark.asyncio
+async def test_waiters_served_in_fifo_order():
+    """Test a large waiting request is not overtaken by later small ones"""
+    limiter = RateLimiter(tokens_per_minute=6000)
+    limiter.tokens.level = 0
+    order = []
+    
+    async def request(name, tokens):
+        await limiter.acquire(tokens)
+        order.append(name)
+    
+    large = asyncio.create_task(request("large", 20))
+    await asyncio.sleep(0)
+    small = [asyncio.create_task(request(f"small{i}", 1)) for i in range(3)]
+    await asyncio.gather(large, *small)
+    
+    assert order == ["large", "small0", "small1", "small2"]
+
+@pytest.mark.asyncio
+async def test_oversized_request_rejected():
+    """Test a request that can never fit raises instead of waiting forever"""
+    limiter = RateLimiter(tokens_per_minute=1000)
+    
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(1001)
+
+def test_reconcile_with_actual_usage():
+    """Test reservations are corrected by the real token usage"""
+    limiter = RateLimiter(tokens_per_minute=6000)
+    assert limiter.try_acquire(100)
+    
+    limiter.reconcile(100, 400)
+    assert limiter.tokens.level == pytest.approx(5600, abs=5)
+    
+    limiter.reconcile(400, 0)
+    assert limiter.tokens.level <= 6000
+
+def test_try_acquire_does_not_wait():
+    """Test try_acquire reports unavailable capacity instead of waiting"""
+    limiter = RateLimiter(tokens_per_minute=6000)
+    limiter.tokens.level = 0
+    
+    assert not limiter.try_acquire(50)
+    limiter.reset()
+    assert limiter.try_acquire(50)
@@ -0,0 +1,170 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from backend.core.response_cache import ResponseCache, make_cache_key, get_response_cache
+from backend.core.rate_limiter import RateLimiter
+from backend.core.model_router import ModelRouter
+from backend.services.llm_service import LLMService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_key_is_content_addressed():
+    """Test keys depend on model, messages, schema and temperature only"""
+    messages = [{"role": "user", "content": "Define login"}]
+    key = make_cache_key("gpt-4", messages, {"type": "object"}, 0.7)
+    
+    assert key == make_cache_key("gpt-4", [dict(messages[0])], {"type": "object"}, 0.7)
+    assert key != make_cache_key("gpt-4", messages, {"type": "object"}, 0.2)
+    assert key != make_cache_key("gpt-4", messages, None, 0.7)
+    assert key != make_cache_key("gpt-3.5-turbo", messages, {"type": "object"}, 0.7)
+
+def test_memory_tier_hits_and_misses():
+    """Test hit and miss counters and copy-on-read values"""
+    cache = ResponseCache()
+    assert cache.get("k") is None
+    
+    cache.set("k", {"status": "success", "data": {"features": []}})
+    value = cache.get("k")
+    value["data"]["features"].append("mutated")
+    
+    assert cache.get("k") == {"status": "success", "data": {"features": []}}
+    metrics = cache.get_metrics()
+    assert metrics["memory_hits"] == 2
+    assert metrics["misses"] == 1
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test responses persist in SQLite across cache instances"""
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path)
+    cache.set("k", {"status": "success", "content": "hello"})
+    cache.close()
+    
+    reopened = ResponseCache(path)
+    assert reopened.get("k") == {"status": "success", "content": "hello"}
+    assert reopened.get_metrics()["disk_hits"] == 1
+    assert reopened.get("k") == {"status": "success", "content": "hello"}
+    assert reopened.get_metrics()["memory_hits"] == 1
+
+def test_ttl_expiry(tmp_path):
+    """Test expired entries are misses in both tiers"""
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60, clock=clock)
+    cache.set("k", {"content": "old"})
+    
+    clock.now += 61
+    
+    assert cache.get("k") is None
+    assert cache.get_metrics()["disk_entries"] == 0
+
+def test_size_based_eviction(tmp_path):
+    """Test the disk tier evicts least recently used entries over its limits"""
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_memory_entries=1, max_disk_entries=2, clock=clock)
+    for key in ("a", "b"):
+        cache.set(key, {"content": key})
+        clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", {"content": "c"})
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == {"content": "a"}
+    assert cache.get_metrics()["evictions"] == 1
+
+def test_byte_limit_eviction(tmp_path):
+    """Test the disk tier stays within its byte budget"""
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_memory_entries=1, max_disk_bytes=100)
+    for key in range(5):
+        cache.set(str(key), {"content": "x" * 40})
+    
+    assert cache.get_metrics()["disk_entries"] == 1
+
+def test_default_cache_is_memory_only(memory_response_cache):
+    """Test the process-wide cache writes no file unless a path is configured"""
+    cache = get_response_cache()
+
+    assert cache is memory_response_cache
+    assert cache.db_path is None
+    assert "disk_entries" not in cache.get_metrics()
+
+def test_disk_hits_batch_access_times(tmp_path):
+    """Test disk hits are not committed one by one but still order eviction"""
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_memory_entries=1, clock=clock)
+    cache.set("a", {"content": "a"})
+    cache.set("b", {"content": "b"})
+    clock.now += 1
+    cache.get("a")
+
+    assert cache._touched == {"a": clock.now}
+    cache.set("c", {"content": "c"})
+    assert cache._touched == {}
+    row = cache._conn.execute("SELECT last_access FROM llm_responses WHERE key = 'a'").fetchone()
+    assert row[0] == clock.now
+
+@pytest.mark.asyncio
+async def test_async_access_uses_disk_tier(tmp_path):
+    """Test aget and aset reach the SQLite tier from a worker thread"""
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path)
+    await cache.aset("k", {"content": "hello"})
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert await reopened.aget("k") == {"content": "hello"}
+    assert await reopened.aget("missing") is None
+    metrics = reopened.get_metrics()
+    assert (metrics["disk_hits"], metrics["misses"]) == (1, 1)
+
+@pytest.fixture
+def service():
+    # No routing policies, so every call goes to the default model without fallback
+    service = LLMService(
+        api_key="test_key",
+        rate_limiter=RateLimiter(),
+        cache=ResponseCache(),
+        router=ModelRouter({})
+    )
+    response = Mock()
+    response.choices = [Mock(message=Mock(content='{"features": ["login"]}'))]
+    response.usage = Mock(total_tokens=20)
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(return_value=response)
+    return service
+
+@pytest.mark.asyncio
+async def test_structured_output_is_cached(service):
+    """Test identical structured_output calls reach the API once"""
+    messages = [{"role": "user", "content": "Analyze login"}]
+    schema = {"type": "object"}
+    
+    first = await service.structured_output(messages, schema)
+    second = await service.structured_output(messages, schema)
+    
+    assert first == second == {"status": "success", "data": {"features": ["login"]}}
+    assert service.client.chat.completions.create.await_count == 1
+
+@pytest.mark.asyncio
+async def test_cache_bypass(service):
+    """Test use_cache=False always calls the API"""
+    messages = [{"role": "user", "content": "Hello"}]
+    
+    await service.chat_completion(messages)
+    await service.chat_completion(messages, use_cache=False)
+    await service.chat_completion(messages)
+    
+    assert service.client.chat.completions.create.await_count == 2
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(service):
+    """Test failed calls are retried rather than served from the cache"""
+    service.client.chat.completions.create = AsyncMock(side_effect=Exception("boom"))
+    messages = [{"role": "user", "content": "Hello"}]
+    
+    assert (await service.chat_completion(messages))["status"] == "error"
+    assert (await service.chat_completion(messages))["status"] == "error"
+    assert service.client.chat.completions.create.await_count == 2
@@ -0,0 +1,91 @@
+import pytest
+import asyncio
+import threading
+import time
+from backend.core.retry_scheduler import RetryScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def scheduler(clock):
+    scheduler = RetryScheduler(max_pending=2, max_tracked_keys=2, attempt_ttl=10.0, clock=clock)
+    yield scheduler
+    scheduler.shutdown()
+
+def test_runs_retries_in_due_order(scheduler, clock):
+    """Test due retries run earliest first and later ones wait"""
+    calls = []
+    scheduler.schedule("b", lambda: calls.append("b"), 2.0)
+    scheduler.schedule("a", lambda: calls.append("a"), 1.0)
+    
+    assert scheduler.run_pending(now=1.5) == 1
+    assert calls == ["a"]
+    
+    assert scheduler.run_pending(now=2.5) == 1
+    assert calls == ["a", "b"]
+
+def test_rejects_when_full(scheduler):
+    """Test scheduling beyond max_pending is rejected"""
+    assert scheduler.schedule("a", lambda: None, 5.0)
+    assert scheduler.schedule("b", lambda: None, 5.0)
+    assert not scheduler.schedule("c", lambda: None, 5.0)
+    assert scheduler.get_metrics()["rejected"] == 1
+
+def test_attempt_bookkeeping_is_bounded(scheduler, clock):
+    """Test attempt counts are capped in size and expire"""
+    scheduler.record_attempt("a")
+    scheduler.record_attempt("b")
+    scheduler.record_attempt("c")
+    
+    assert scheduler.attempts("a") == 0
+    assert scheduler.attempts("c") == 1
+    
+    clock.now = 11.0
+    assert scheduler.attempts("c") == 0
+    assert scheduler.get_metrics()["tracked_keys"] == 0
+
+def test_queue_metrics(scheduler, clock):
+    """Test queue depth and age metrics"""
+    scheduler.schedule("a", lambda: None, 5.0)
+    clock.now = 3.0
+    
+    metrics = scheduler.get_metrics()
+    assert metrics["queue_depth"] == 1
+    assert metrics["oldest_age_s"] == 3.0
+    assert metrics["next_due_in_s"] == 2.0
+
+@pytest.mark.asyncio
+async def test_timer_thread_hands_retries_to_the_loop():
+    """Test the background thread runs loop retries on that loop once due"""
+    scheduler = RetryScheduler()
+    calls = []
+    scheduler.schedule("a", lambda: calls.append(threading.current_thread()), 0.05)
+    
+    deadline = time.monotonic() + 2.0
+    while not calls and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    
+    scheduler.shutdown()
+    assert calls == [threading.current_thread()]
+
+def test_retries_without_loop_run_on_the_owner_thread(scheduler, clock):
+    """Test retries scheduled with no loop wait for run_deferred instead of the timer thread"""
+    calls = []
+    scheduler.schedule("a", lambda: calls.append(threading.current_thread()), 1.0)
+    
+    assert scheduler.run_deferred() == 0
+    clock.now = 1.0
+    time.sleep(0.05)
+    assert calls == []
+    
+    assert scheduler.run_deferred() == 1
+    assert calls == [threading.current_thread()]
@@ -0,0 +1,52 @@
+from backend.core.session_store import SessionStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_unknown_sessions_are_not_created():
+    """Test only ids handed out by create resolve"""
+    store = SessionStore()
+    session_id = store.create("state")
+
+    assert store.get(session_id) == "state"
+    assert store.get("made-up") is None
+    assert len(store) == 1
+
+def test_least_recently_used_evicted():
+    """Test the oldest unused session is dropped past max_sessions"""
+    store = SessionStore(max_sessions=2)
+    first = store.create("a")
+    second = store.create("b")
+    store.get(first)
+    store.create("c")
+
+    assert store.get(first) == "a"
+    assert store.get(second) is None
+    assert store.get_metrics()["evicted"] == 1
+
+def test_idle_sessions_expire():
+    """Test a session unused for the TTL is gone while a used one lives on"""
+    clock = FakeClock()
+    store = SessionStore(ttl_s=60, clock=clock)
+    idle = store.create("idle")
+    active = store.create("active")
+    clock.now += 40
+    store.get(active)
+    clock.now += 40
+
+    assert store.get(idle) is None
+    assert store.get(active) == "active"
+    assert store.get_metrics()["expired"] == 1
+
+def test_close():
+    """Test closed sessions are forgotten"""
+    store = SessionStore()
+    session_id = store.create("state")
+
+    assert store.close(session_id)
+    assert not store.close(session_id)
+    assert store.get(session_id) is None
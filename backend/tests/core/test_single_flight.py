@@ -0,0 +1,140 @@
+import pytest
+import asyncio
+from unittest.mock import Mock
+from backend.core.single_flight import SingleFlight
+from backend.core.rate_limiter import RateLimiter
+from backend.core.response_cache import ResponseCache
+from backend.core.model_router import ModelRouter
+from backend.services.llm_service import LLMService
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test identical concurrent calls run once and all get the result"""
+    flight = SingleFlight()
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"features": ["login"]}
+    
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+    
+    assert calls == 1
+    assert all(result == {"features": ["login"]} for result in results)
+    # Followers get copies, not the leader's object
+    assert len({id(result) for result in results}) == 5
+    assert flight.get_metrics() == {"in_flight": 0, "executed": 1, "deduplicated": 4, "cancelled": 0}
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    """Test calls with different keys are not collapsed"""
+    flight = SingleFlight()
+    
+    async def fetch(value):
+        await asyncio.sleep(0.01)
+        return value
+    
+    results = await asyncio.gather(flight.do("a", lambda: fetch(1)), flight.do("b", lambda: fetch(2)))
+    
+    assert results == [1, 2]
+    assert flight.executed == 2
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    """Test a failed shared call raises in every waiter"""
+    flight = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+    
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_shared_call():
+    """Test the shared call survives while any waiter remains"""
+    flight = SingleFlight()
+    finished = asyncio.Event()
+    
+    async def fetch():
+        await asyncio.sleep(0.05)
+        finished.set()
+        return "done"
+    
+    first = asyncio.create_task(flight.do("key", fetch))
+    second = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    
+    assert await second == "done"
+    assert finished.is_set()
+    assert flight.cancelled == 0
+
+@pytest.mark.asyncio
+async def test_shared_call_cancelled_when_all_waiters_leave():
+    """Test the shared call is cancelled once every waiter is gone"""
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+    
+    async def fetch():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    waiters = [asyncio.create_task(flight.do("key", fetch)) for _ in range(2)]
+    await started.wait()
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+    
+    assert cancelled.is_set()
+    assert flight.get_metrics()["cancelled"] == 1
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_llm_service_deduplicates_identical_requests():
+    """Test concurrent identical structured_output calls make one API call"""
+    service = LLMService(
+        api_key="test_key",
+        rate_limiter=RateLimiter(),
+        cache=ResponseCache(),
+        single_flight=SingleFlight(),
+        router=ModelRouter({})
+    )
+    response = Mock()
+    response.choices = [Mock(message=Mock(content='{"name": "Login"}'))]
+    response.usage = Mock(total_tokens=20)
+    
+    async def create(**kwargs):
+        await asyncio.sleep(0.05)
+        return response
+    
+    service.client = Mock()
+    service.client.chat.completions.create = Mock(side_effect=create)
+    messages = [{"role": "user", "content": "Analyze login"}]
+    
+    results = await asyncio.gather(*(
+        service.structured_output(messages, {"type": "object"}) for _ in range(3)
+    ))
+    
+    assert all(result == {"status": "success", "data": {"name": "Login"}} for result in results)
+    assert service.client.chat.completions.create.call_count == 1
+    assert service.get_metrics()["single_flight"]["deduplicated"] == 2
+    
+    # Callers bypassing the cache each get their own response
+    await asyncio.gather(*(
+        service.structured_output(messages, {"type": "object"}, use_cache=False) for _ in range(3)
+    ))
+    
+    assert service.client.chat.completions.create.call_count == 4
+    assert service.get_metrics()["single_flight"]["deduplicated"] == 2
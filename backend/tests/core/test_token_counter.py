@@ -0,0 +1,79 @@
+import pytest
+import json
+from backend.core import token_counter
+from backend.core.token_counter import TokenCounter, heuristic_token_count, get_token_counter
+
+def test_heuristic_counts_json_punctuation():
+    """Test JSON-heavy text counts more tokens than prose of the same length"""
+    prose = "The user can sign in with their email address and a password they choose"
+    data = json.dumps({"a": [1, 2, 3], "b": {"c": None, "d": "e"}, "f": [{"g": 1}]})
+    
+    assert heuristic_token_count(prose) == 14
+    assert heuristic_token_count(data) > len(data) // 4
+
+def test_heuristic_splits_numbers_and_long_words():
+    """Test digit groups and long words count as several tokens"""
+    assert heuristic_token_count("123456789") == 3
+    assert heuristic_token_count("internationalization") == 3
+    assert heuristic_token_count("") == 0
+
+def test_counts_are_memoized():
+    """Test repeated text is counted once"""
+    counter = TokenCounter()
+    text = "Analyze the following feature and its dependencies"
+    
+    first = counter.count_text(text)
+    second = counter.count_text(text)
+    
+    assert first == second > 0
+    assert counter.get_metrics()["hits"] == 1
+    assert counter.get_metrics()["misses"] == 1
+
+def test_cache_is_bounded():
+    """Test the memo cache evicts the least recently used entries"""
+    counter = TokenCounter(max_cache_entries=2)
+    for text in ("one", "two", "three"):
+        counter.count_text(text)
+    
+    assert counter.get_metrics()["cached"] == 2
+
+def test_count_messages_includes_formatting():
+    """Test message overhead is added on top of content tokens"""
+    counter = TokenCounter()
+    messages = [
+        {"role": "system", "content": "You are helpful"},
+        {"role": "user", "content": "Hello", "name": "alice"}
+    ]
+    content = sum(counter.count_text(value) for m in messages for value in m.values())
+    
+    assert counter.count_messages(messages) == content + 2 * 3 + 1 + 3
+
+def test_shared_counter_per_model():
+    """Test counters are shared per model"""
+    assert get_token_counter("gpt-4-turbo-preview") is get_token_counter("gpt-4-turbo-preview")
+
+def test_encodings_load_only_from_local_cache(monkeypatch, tmp_path):
+    """Test an encoding missing from the tiktoken cache falls back to the heuristic without fetching it"""
+    tiktoken = pytest.importorskip("tiktoken")
+    import tiktoken.load
+    url = "https://openaipublic.blob.core.windows.net/encodings/test.tiktoken"
+    downloads = []
+    def download(blobpath):
+        downloads.append(blobpath)
+        return b"bpe"
+    monkeypatch.setattr(tiktoken.load, "read_file", download)
+    # Stands in for an encoding whose file tiktoken reads through its cache
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: tiktoken.load.read_file_cached(url) and object())
+    monkeypatch.setattr(token_counter, "_encodings", {})
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+
+    assert token_counter._load_encoding("gpt-4") is None
+    assert not TokenCounter("gpt-4").exact
+    assert downloads == []
+    assert tiktoken.load.read_file is download
+
+    # Once tiktoken has cached the file it is loaded
+    tiktoken.load.read_file_cached(url)
+    monkeypatch.setattr(token_counter, "_encodings", {})
+    assert token_counter._load_encoding("gpt-4") is not None
+    assert downloads == [url]
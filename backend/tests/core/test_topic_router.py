@@ -0,0 +1,83 @@
+import pytest
+from backend.core.topic_router import TopicRouter, TopicSchema, is_wildcard_pattern, PARAMETER_SEGMENT
+from backend.core.event_system import EventSystem
+
+@pytest.fixture
+def schema():
+    return TopicSchema.from_event_types({
+        "system": {"state_changes": ["initialized", "error"]},
+        "agent": {"events": ["feature_completed", "test_event"]}
+    })
+
+def test_schema_validation(schema):
+    """Test concrete topics and patterns are checked against the schema"""
+    assert schema.is_valid("system.error")
+    assert schema.is_valid("agent.lead_agent.feature_completed")
+    assert schema.is_valid("agent.*.feature_completed")
+    assert schema.is_valid("agent.#")
+    assert schema.is_valid("#")
+    assert not schema.is_valid("system")
+    assert not schema.is_valid("agent.lead_agent.unknown")
+    assert not schema.is_valid("invalid.event")
+
+def test_router_wildcards():
+    """Test single and multi-level wildcard matching"""
+    router = TopicRouter()
+    single, multi, everything = object(), object(), object()
+    router.add("agent.*.feature_completed", single)
+    router.add("agent.#", multi)
+    router.add("#", everything)
+    
+    assert set(router.match("agent.lead.feature_completed")) == {single, multi, everything}
+    assert set(router.match("agent.lead.test_event")) == {multi, everything}
+    assert set(router.match("agent")) == {multi, everything}
+    assert router.match("system.error") == (everything,)
+
+def test_router_cache_invalidation():
+    """Test cached listener sets follow subscription changes"""
+    router = TopicRouter()
+    listener = object()
+    assert router.match("agent.a.test_event") == ()
+    
+    router.add("agent.*.test_event", listener)
+    assert router.match("agent.a.test_event") == (listener,)
+    
+    assert router.remove("agent.*.test_event", listener)
+    assert router.match("agent.a.test_event") == ()
+    assert len(router) == 0
+
+def test_is_wildcard_pattern():
+    """Test wildcard detection"""
+    assert is_wildcard_pattern("agent.*.test")
+    assert is_wildcard_pattern("#")
+    assert not is_wildcard_pattern("agent.a.test")
+
+def test_caches_are_bounded(schema):
+    """Test the router and schema caches are cleared instead of growing past their limit"""
+    router = TopicRouter(max_cache_entries=3)
+    listener = object()
+    router.add("agent.*.test_event", listener)
+    for index in range(10):
+        assert router.match(f"agent.a{index}.test_event") == (listener,)
+        assert len(router._cache) <= 3
+
+    bounded = TopicSchema(max_cache_entries=3)
+    bounded.add(f"agent.{PARAMETER_SEGMENT}.test_event")
+    for index in range(10):
+        assert bounded.is_valid(f"agent.a{index}.test_event")
+        assert len(bounded._cache) <= 3
+
+def test_schema_per_event_system_class():
+    """Test a subclass with its own event types gets its own schema"""
+    class CustomEventSystem(EventSystem):
+        VALID_EVENT_TYPES = {
+            **EventSystem.VALID_EVENT_TYPES,
+            "agent": {"events": EventSystem.VALID_EVENT_TYPES["agent"]["events"] + ["custom_event"]}
+        }
+
+    custom = CustomEventSystem()
+    base = EventSystem()
+
+    assert custom._validate_event_type("agent.a.custom_event")
+    assert not base._validate_event_type("agent.a.custom_event")
+    assert CustomEventSystem._topic_schema is not EventSystem._topic_schema
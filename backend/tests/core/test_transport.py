@@ -0,0 +1,194 @@
+import pytest
+import multiprocessing
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, date
+from backend.core import transport as transport_module
+from backend.core.transport import (
+    EventBroker, UnixSocketTransport, LocalTransport, TransportError,
+    encode_frame, decode_frame, read_frame, run_agent_worker, get_transport
+)
+from backend.core.event_system import EventSystem
+from backend.agents.base_agent import BaseAgent
+
+class EchoAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("EchoAgent")
+
+    def handle_event(self, event):
+        self.publish("feature_defined", {"echo": event["data"]["name"], "pid": multiprocessing.current_process().pid})
+
+class RecordingTransport:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, topic, message):
+        self.sent.append((topic, message))
+
+    def get_metrics(self):
+        return {"sent": len(self.sent)}
+
+@pytest.fixture
+def broker(tmp_path):
+    broker = EventBroker(str(tmp_path / "bus.sock"))
+    broker.start()
+    yield broker
+    broker.stop()
+
+def connect(broker, received):
+    transport = UnixSocketTransport(broker.socket_path)
+    transport.start(lambda topic, message: received.put((topic, message)))
+    return transport
+
+def wait_for_peers(broker, count, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while broker.peer_count() < count:
+        assert time.monotonic() < deadline, "peers did not connect"
+        time.sleep(0.01)
+
+def test_frame_round_trip():
+    """Test frames decode to the topic and message they encode"""
+    message = {"event": {"type": "feature_request", "data": {"name": "Login", "tags": ["auth"]}}}
+    frame = encode_frame("feature_request", message)
+
+    assert frame[:2] == b"EV"
+    assert decode_frame(frame) == ("feature_request", message)
+
+def test_payload_types_round_trip_and_unknown_types_rejected():
+    """Test datetimes, dates, UUIDs and sets decode to themselves and other objects fail to encode"""
+    message = {"data": {
+        "at": datetime(2024, 1, 2, 3, 4, 5), "on": date(2024, 1, 2),
+        "id": uuid.UUID(int=1), "tags": {"auth"}
+    }}
+    assert decode_frame(encode_frame("t", message)) == ("t", message)
+
+    with pytest.raises(TransportError):
+        encode_frame("t", {"data": object()})
+
+def test_read_frame_rejects_bad_magic():
+    """Test malformed frames are rejected"""
+    left, right = socket.socketpair()
+    try:
+        left.sendall(b"XX" + encode_frame("t", {})[2:])
+        with pytest.raises(TransportError):
+            read_frame(right)
+    finally:
+        left.close()
+        right.close()
+
+def test_broker_fans_out_to_other_peers(broker):
+    """Test the broker relays frames to every peer except the sender"""
+    sender_inbox, first_inbox, second_inbox = queue.Queue(), queue.Queue(), queue.Queue()
+    sender = connect(broker, sender_inbox)
+    first = connect(broker, first_inbox)
+    second = connect(broker, second_inbox)
+    wait_for_peers(broker, 3)
+
+    sender.send("research_request", {"event": {"query": "auth"}})
+
+    assert first_inbox.get(timeout=2) == ("research_request", {"event": {"query": "auth"}})
+    assert second_inbox.get(timeout=2) == ("research_request", {"event": {"query": "auth"}})
+    time.sleep(0.05)
+    assert sender_inbox.empty()
+    assert sender.get_metrics()["sent"] == 1
+
+    for transport in (sender, first, second):
+        transport.close()
+
+def test_bad_frame_does_not_stop_the_reader():
+    """Test an undecodable frame is dropped and the frames after it still arrive"""
+    left, right = socket.socketpair()
+    received = queue.Queue()
+    transport = UnixSocketTransport("unused")
+    transport._sock = right
+    reader = threading.Thread(
+        target=transport._read_loop, args=(lambda topic, message: received.put((topic, message)),), daemon=True
+    )
+    reader.start()
+    try:
+        # Well framed, but the body is not valid JSON
+        left.sendall(encode_frame("t", {"x": 1}).replace(b'{"x":1}', b'{"x":1]'))
+        left.sendall(encode_frame("t", {"x": 2}))
+
+        assert received.get(timeout=2) == ("t", {"x": 2})
+        assert transport.get_metrics()["dropped"] == 1
+    finally:
+        transport.close()
+        left.close()
+
+def test_send_does_not_block_on_a_stalled_broker(tmp_path):
+    """Test sends return at once and drop past the queue bound when the broker stops reading"""
+    path = str(tmp_path / "stalled.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    transport = UnixSocketTransport(path, max_pending_frames=4)
+    transport.start(lambda topic, message: None)
+    peer, _ = server.accept()
+    try:
+        payload = {"blob": "x" * 256 * 1024}
+        started = time.monotonic()
+        for _ in range(64):
+            transport.send("feature_request", payload)
+        assert time.monotonic() - started < 2.0
+
+        metrics = transport.get_metrics()
+        assert metrics["send_dropped"] > 0
+        assert metrics["sent"] + metrics["pending"] + metrics["send_dropped"] <= 64
+
+        started = time.monotonic()
+        transport.close()
+        assert time.monotonic() - started < 2.0
+    finally:
+        peer.close()
+        server.close()
+
+def test_unreachable_broker_falls_back_to_local(monkeypatch, tmp_path):
+    """Test a missing broker socket leaves the process with in-process delivery"""
+    monkeypatch.setattr(transport_module, "_transport", None)
+    monkeypatch.setenv("EVENT_TRANSPORT_SOCKET", str(tmp_path / "missing.sock"))
+
+    assert isinstance(get_transport(), LocalTransport)
+
+def test_event_system_forwards_published_events():
+    """Test EventSystem sends published events through its transport"""
+    transport = RecordingTransport()
+    event_system = EventSystem(transport=transport)
+
+    event_system.publish(
+        event_type="system.status",
+        source_agent="test",
+        target_agent="system",
+        payload={"status": "ok"},
+        correlation_id="corr-1"
+    )
+
+    assert transport.sent == [("system.status", {"data": {"status": "ok"}})]
+    assert event_system.get_metrics()["transport"] == {"sent": 1}
+
+def test_agent_in_worker_process(broker):
+    """Test an agent in a separate process receives and answers events"""
+    inbox = queue.Queue()
+    parent = connect(broker, inbox)
+    context = multiprocessing.get_context("spawn")
+    worker = context.Process(
+        target=run_agent_worker,
+        args=(EchoAgent, ["feature_request"], broker.socket_path),
+        daemon=True
+    )
+    worker.start()
+    try:
+        wait_for_peers(broker, 2)
+        parent.send("feature_request", {"event": {"type": "feature_request", "data": {"name": "Login"}}})
+
+        topic, message = inbox.get(timeout=5)
+        assert topic == "feature_defined"
+        assert message["event"]["data"]["echo"] == "Login"
+        assert message["event"]["data"]["pid"] == worker.pid
+    finally:
+        worker.terminate()
+        worker.join(timeout=5)
+        parent.close()
@@ -0,0 +1,141 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from backend.core.dispatcher import AsyncDispatcher
+from backend.core.model_router import ModelRouter
+from backend.core.rate_limiter import RateLimiter
+from backend.core.response_cache import ResponseCache
+from backend.core.usage_ledger import UsageLedger, usage_scope, current_usage_scope
+from backend.services.llm_service import LLMService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_calls_are_charged_to_the_current_scope():
+    """Test records carry the correlation id and agent of the enclosing scope"""
+    ledger = UsageLedger()
+    with usage_scope("prd-1", agent="LeadAgent"):
+        ledger.record("completion", "gpt-4", 100, 20, call_class="analysis")
+        with usage_scope(agent="FeatureAgent"):
+            ledger.record("completion", "gpt-4", 50, 10, call_class="feature")
+    ledger.record("completion", "gpt-4", 5, 5)
+
+    records = ledger.records("prd-1")
+    assert [(r["agent"], r["call_class"]) for r in records] == [
+        ("LeadAgent", "analysis"), ("FeatureAgent", "feature")
+    ]
+    assert ledger.runs() == ["prd-1", None]
+    assert current_usage_scope() is None
+
+def test_summary_groups_and_wall_time():
+    """Test totals per group, with overlapping calls counted once in wall time"""
+    clock = FakeClock()
+    ledger = UsageLedger(clock=clock)
+    with usage_scope("prd-1"):
+        # Two feature calls of 1s each running side by side, then a 2s analysis call
+        ledger.record("completion", "gpt-4", 100, 50, latency_ms=1000, call_class="feature")
+        ledger.record("completion", "gpt-4", 100, 50, latency_ms=1000, call_class="feature")
+        clock.now += 2
+        ledger.record("completion", "gpt-3.5-turbo", 10, 0, latency_ms=2000, cache_hit=True, call_class="analysis")
+        ledger.record("completion", "gpt-4", latency_ms=500, success=False, call_class="analysis")
+
+    summary = ledger.summary("prd-1", group_by=["call_class"])
+
+    assert summary["calls"] == 4
+    assert summary["total_tokens"] == 310
+    assert summary["cache_hits"] == 1
+    assert summary["errors"] == 1
+    feature, analysis = summary["groups"]
+    assert feature["call_class"] == "feature"
+    assert feature["total_tokens"] == 300
+    assert feature["latency_ms"] == 2000
+    assert feature["wall_ms"] == 1000
+    assert analysis["calls"] == 2
+    assert analysis["wall_ms"] == 2000
+
+def test_summary_rejects_unknown_fields():
+    """Test grouping by a field records do not have fails"""
+    with pytest.raises(ValueError):
+        UsageLedger().summary("prd-1", group_by=["prompt"])
+
+def test_oldest_runs_are_evicted():
+    """Test only the most recently active runs are kept"""
+    ledger = UsageLedger(max_runs=2)
+    for correlation_id in ("a", "b", "a", "c"):
+        with usage_scope(correlation_id):
+            ledger.record("completion", "gpt-4", 1, 1)
+
+    assert ledger.runs() == ["a", "c"]
+    assert ledger.get_metrics()["evicted_runs"] == 1
+    assert ledger.top_runs(1)[0] == {**ledger.summary("a"), "correlation_id": "a"}
+
+@pytest.mark.asyncio
+async def test_dispatched_handlers_inherit_scope():
+    """Test async handlers are charged to the run that published the event"""
+    dispatcher = AsyncDispatcher()
+    seen = []
+
+    async def handler():
+        seen.append(current_usage_scope())
+
+    with usage_scope("prd-1", agent="FeatureAgent") as scope:
+        with dispatcher.collect() as pending:
+            dispatcher.submit("topic", handler, {})
+    dispatcher.submit("topic", handler, {})
+    await dispatcher.wait_for(pending)
+    await dispatcher.drain()
+
+    assert seen == [scope, None]
+
+@pytest.mark.asyncio
+async def test_llm_service_records_calls_and_cache_hits():
+    """Test API calls are recorded with their usage and cache hits at no cost"""
+    ledger = UsageLedger()
+    service = LLMService(
+        api_key="test_key",
+        rate_limiter=RateLimiter(),
+        cache=ResponseCache(),
+        router=ModelRouter({}),
+        ledger=ledger
+    )
+    response = Mock()
+    response.choices = [Mock(message=Mock(content="Hello"))]
+    response.usage = Mock(prompt_tokens=12, completion_tokens=3, total_tokens=15)
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(return_value=response)
+    messages = [{"role": "user", "content": "Hi"}]
+
+    with usage_scope("session-1", agent="ProjectConsultantAgent"):
+        await service.chat_completion(messages)
+        await service.chat_completion(messages)
+
+    first, second = ledger.records("session-1")
+    assert (first["prompt_tokens"], first["completion_tokens"], first["cache_hit"]) == (12, 3, False)
+    assert first["call_class"] == "chat"
+    assert first["agent"] == "ProjectConsultantAgent"
+    assert (second["prompt_tokens"], second["cache_hit"]) == (0, True)
+
+@pytest.mark.asyncio
+async def test_failed_stream_open_returns_reservation():
+    """Test a stream whose request fails hands its token reservation back"""
+    limiter = RateLimiter(tokens_per_minute=10000, clock=lambda: 0.0)
+    ledger = UsageLedger()
+    service = LLMService(
+        api_key="test_key",
+        rate_limiter=limiter,
+        cache=ResponseCache(),
+        router=ModelRouter({}),
+        ledger=ledger
+    )
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(side_effect=RuntimeError("rate limited"))
+
+    with pytest.raises(RuntimeError):
+        async for _ in service.chat_completion_stream([{"role": "user", "content": "Hi"}]):
+            pass
+
+    assert limiter.tokens.level == 10000
+    assert ledger.records(None)[-1]["success"] is False
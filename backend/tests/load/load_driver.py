@@ -0,0 +1,251 @@
+"""Offline load driver for the agent pipeline.
+
+Runs projects through LeadAgent, FeatureAgent and ResearchAgent against
+the offline stand-ins, so no API quota is used, and reports throughput,
+stage latencies and error counts.
+
+Run from the repository root, with ``backend`` on the path::
+
+    PYTHONPATH=backend python -m backend.tests.load.load_driver --projects 50 --features 8 --concurrency 10
+    PYTHONPATH=backend python -m backend.tests.load.load_driver --llm-median-ms 800 --llm-p95-ms 4000 --error-rate 0.02
+
+``--recordings`` replays completions captured with ``RecordingOpenAI``.
+"""
+from typing import Dict, Any, Optional, List
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+import uuid
+from pubsub import pub
+from backend.agents.base_agent import BaseAgent
+from backend.agents.lead_agent import LeadAgent
+from backend.agents.feature_agent import FeatureAgent
+from backend.agents.research_agent import ResearchAgent
+from backend.core.hedging import Hedger
+from backend.core.model_router import ModelRouter
+from backend.core.rate_limiter import RateLimiter
+from backend.core.response_cache import ResponseCache
+from backend.core.single_flight import SingleFlight
+from backend.services.llm_service import LLMService
+from backend.tests.load.stand_ins import (
+    FakeOpenAI, FakeTavilyClient, LatencyModel, ErrorInjector, ReplayStore
+)
+
+PIPELINE_TOPICS = ["feature_request", "feature_defined", "research_request", "research_complete"]
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class PipelineProbe(BaseAgent):
+    """Sends each defined feature to research and records when research completes"""
+    def __init__(self):
+        super().__init__("PipelineProbe")
+        self.research_started: Dict[str, float] = {}
+        self.research_ms: List[float] = []
+        self.feature_errors = 0
+        self.research_errors = 0
+        self.done = asyncio.Event()
+        self.expected: Optional[int] = None
+        self.subscribe("feature_defined")
+        self.subscribe("research_complete")
+
+    def log(self, message: str):
+        pass
+
+    def handle_event(self, event):
+        data = event["data"]
+        if event["type"] == "feature_defined":
+            # FeatureAgent publishes feature_defined twice; the outer event carries the context
+            if "data" not in data:
+                return
+            feature = data["data"]["feature"]
+            if feature.get("status") != "success":
+                self.feature_errors += 1
+            task_id = str(uuid.uuid4())
+            self.research_started[task_id] = time.monotonic()
+            self.publish("research_request", {
+                "task_id": task_id,
+                "query": f"Best practices for {feature.get('data', {}).get('name', 'feature')}"
+            })
+        elif event["type"] == "research_complete":
+            # ResearchAgent also publishes research_complete twice per task
+            started = self.research_started.pop(data.get("task_id"), None)
+            if started is None:
+                return
+            self.research_ms.append((time.monotonic() - started) * 1000)
+            if "error" in data.get("results", {}):
+                self.research_errors += 1
+            self._check_done()
+
+    def expect(self, features: int) -> None:
+        self.expected = features
+        self._check_done()
+
+    def _check_done(self) -> None:
+        if self.expected is not None and len(self.research_ms) >= self.expected:
+            self.done.set()
+
+def make_summary(index: int) -> Dict[str, Any]:
+    return {
+        "title": f"Load test project {index}",
+        "description": f"Synthetic project {index} for offline load testing",
+        "target_users": ["Testers"],
+        "goals": ["Measure pipeline throughput"],
+        "key_features": ["Feature analysis", "Research"]
+    }
+
+async def run_load(
+    projects: int = 20,
+    features_per_project: int = 5,
+    concurrency: int = 10,
+    llm_latency: Optional[LatencyModel] = None,
+    search_latency: Optional[LatencyModel] = None,
+    error_rate: float = 0.0,
+    store: Optional[ReplayStore] = None,
+    stream_features: bool = False,
+    hedge: bool = False,
+    tokens_per_minute: int = 10_000_000,
+    requests_per_minute: int = 100_000,
+    timeout_s: float = 300.0,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Drive ``projects`` through the pipeline and measure it"""
+    llm_client = FakeOpenAI(
+        store=store,
+        latency=llm_latency or LatencyModel(50, 200, seed=seed),
+        errors=ErrorInjector(error_rate, seed=seed),
+        features_per_project=features_per_project
+    )
+    tavily = FakeTavilyClient(
+        latency=search_latency or LatencyModel(30, 120, seed=seed + 1),
+        errors=ErrorInjector(error_rate, seed=seed + 1)
+    )
+    llm = LLMService(
+        client=llm_client,
+        rate_limiter=RateLimiter(tokens_per_minute, requests_per_minute),
+        cache=ResponseCache(),
+        single_flight=SingleFlight(),
+        hedger=Hedger() if hedge else None,
+        router=ModelRouter()
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        probe = PipelineProbe()
+        feature_agent = FeatureAgent(llm_service=llm)
+        feature_agent.subscribe("feature_request")
+        research_agent = ResearchAgent(tavily_client=tavily)
+        research_agent.subscribe("research_request")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        lead_ms: List[float] = []
+        results: List[Dict[str, Any]] = []
+
+        async def run_project(index: int) -> None:
+            async with semaphore:
+                lead = LeadAgent(llm_service=llm, stream_features=stream_features)
+                started = time.monotonic()
+                results.append(await lead.initialize_from_summary(make_summary(index)))
+                lead_ms.append((time.monotonic() - started) * 1000)
+
+        start = time.monotonic()
+        try:
+            await asyncio.gather(*(run_project(index) for index in range(projects)))
+            delegated = sum(r.get("feature_count", 0) for r in results if r.get("status") == "features_delegated")
+            probe.expect(delegated)
+            timed_out = False
+            try:
+                await asyncio.wait_for(probe.done.wait(), timeout_s)
+            except asyncio.TimeoutError:
+                timed_out = True
+            wall_s = time.monotonic() - start
+        finally:
+            for topic in PIPELINE_TOPICS:
+                pub.unsubAll(topic)
+
+    completed = len(probe.research_ms)
+    research_ms = sorted(probe.research_ms)
+    lead_ms.sort()
+    return {
+        "projects": projects,
+        "lead_failures": sum(1 for r in results if r.get("status") != "features_delegated"),
+        "features_delegated": delegated,
+        "features_completed": completed,
+        "timed_out": timed_out,
+        "wall_s": wall_s,
+        "features_per_min": completed / wall_s * 60 if wall_s else 0.0,
+        "lead_p50_ms": _percentile(lead_ms, 50),
+        "lead_p95_ms": _percentile(lead_ms, 95),
+        "research_p50_ms": _percentile(research_ms, 50),
+        "research_p95_ms": _percentile(research_ms, 95),
+        "feature_errors": probe.feature_errors,
+        "research_errors": probe.research_errors,
+        "injected_errors": llm_client.errors.injected + tavily.errors.injected,
+        "llm_calls": llm_client.calls,
+        "llm_max_in_flight": llm_client.max_in_flight,
+        "search_calls": tavily.calls,
+        "replay_hits": llm_client.store.hits,
+        "llm": llm.get_metrics()
+    }
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render the headline numbers of a load run"""
+    lines = [
+        f"features completed   {report['features_completed']}/{report['features_delegated']}"
+        f" from {report['projects']} projects" + (" (timed out)" if report["timed_out"] else ""),
+        f"throughput           {report['features_per_min']:.0f} features/min over {report['wall_s']:.1f}s",
+        f"lead analysis        p50 {report['lead_p50_ms']:.0f} ms, p95 {report['lead_p95_ms']:.0f} ms",
+        f"research             p50 {report['research_p50_ms']:.0f} ms, p95 {report['research_p95_ms']:.0f} ms",
+        f"errors               lead {report['lead_failures']}, feature {report['feature_errors']}, "
+        f"research {report['research_errors']} ({report['injected_errors']} injected)",
+        f"calls                llm {report['llm_calls']} (max {report['llm_max_in_flight']} in flight), "
+        f"search {report['search_calls']}, replayed {report['replay_hits']}"
+    ]
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--features", type=int, default=5, help="Features per project")
+    parser.add_argument("--concurrency", type=int, default=10, help="Projects analysed at once")
+    parser.add_argument("--llm-median-ms", type=float, default=50)
+    parser.add_argument("--llm-p95-ms", type=float, default=200)
+    parser.add_argument("--search-median-ms", type=float, default=30)
+    parser.add_argument("--search-p95-ms", type=float, default=120)
+    parser.add_argument("--latency-kind", choices=["lognormal", "uniform", "constant"], default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--recordings", metavar="PATH", help="JSON recordings to replay")
+    parser.add_argument("--stream", action="store_true", help="Delegate features while they stream")
+    parser.add_argument("--hedge", action="store_true", help="Hedge slow LLM calls")
+    parser.add_argument("--tokens-per-minute", type=int, default=10_000_000)
+    parser.add_argument("--requests-per-minute", type=int, default=100_000)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(
+        projects=args.projects,
+        features_per_project=args.features,
+        concurrency=args.concurrency,
+        llm_latency=LatencyModel(args.llm_median_ms, args.llm_p95_ms, args.latency_kind, args.seed),
+        search_latency=LatencyModel(args.search_median_ms, args.search_p95_ms, args.latency_kind, args.seed + 1),
+        error_rate=args.error_rate,
+        store=ReplayStore.load(args.recordings) if args.recordings else None,
+        stream_features=args.stream,
+        hedge=args.hedge,
+        tokens_per_minute=args.tokens_per_minute,
+        requests_per_minute=args.requests_per_minute,
+        timeout_s=args.timeout,
+        seed=args.seed
+    ))
+    print(json.dumps(report, indent=2, default=str) if args.json else format_report(report))
+    return 1 if report["timed_out"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
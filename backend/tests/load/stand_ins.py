@@ -0,0 +1,311 @@
+"""Offline stand-ins for the OpenAI and Tavily clients.
+
+``FakeOpenAI`` implements the part of ``AsyncOpenAI`` the LLM services
+use (``chat.completions.create``, with and without streaming, and
+``embeddings.create``). ``FakeTavilyClient`` implements ``search`` as
+ResearchAgent awaits it. Both sleep for a sampled latency and fail at a
+configurable rate. Chat responses come from a ``ReplayStore`` of recorded
+completions, falling back to synthetic responses shaped like the agents'
+schemas. ``RecordingOpenAI`` wraps a real client to fill a store.
+"""
+from typing import Dict, Any, Optional, List, Callable
+from types import SimpleNamespace
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import random
+import httpx
+import openai
+
+class LatencyModel:
+    """Samples call latencies in seconds.
+
+    ``lognormal`` has the given median and p95, ``uniform`` spreads
+    evenly between zero and twice the median, and ``constant`` always
+    returns the median.
+    """
+    def __init__(
+        self,
+        median_ms: float = 0.0,
+        p95_ms: Optional[float] = None,
+        kind: str = "lognormal",
+        seed: Optional[int] = None
+    ):
+        if kind not in ("lognormal", "uniform", "constant"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.median_ms = median_ms
+        self.p95_ms = p95_ms if p95_ms is not None else median_ms
+        self.kind = kind
+        self._random = random.Random(seed)
+        # p95 of a lognormal lies 1.645 standard deviations above its median
+        self._sigma = (
+            math.log(self.p95_ms / median_ms) / 1.645 if median_ms > 0 and self.p95_ms > median_ms else 0.0
+        )
+
+    def sample(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        if self.kind == "constant":
+            return self.median_ms / 1000
+        if self.kind == "uniform":
+            return self._random.uniform(0, 2 * self.median_ms) / 1000
+        return self._random.lognormvariate(math.log(self.median_ms), self._sigma) / 1000
+
+class ErrorInjector:
+    """Fails a fraction of calls"""
+    def __init__(self, rate: float = 0.0, seed: Optional[int] = None):
+        self.rate = rate
+        self._random = random.Random(seed)
+        self.injected = 0
+
+    def maybe_fail(self, make_error: Callable[[], Exception]) -> None:
+        if self.rate > 0 and self._random.random() < self.rate:
+            self.injected += 1
+            raise make_error()
+
+def _injected_api_error() -> Exception:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.APIConnectionError(message="Injected failure", request=request)
+
+def request_key(messages: List[Dict[str, Any]]) -> str:
+    """Replay key of a chat request; independent of the model so routing does not miss"""
+    canonical = json.dumps(messages, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ReplayStore:
+    """Recorded completion texts keyed by request"""
+    def __init__(self, recordings: Optional[Dict[str, str]] = None):
+        self.recordings: Dict[str, str] = dict(recordings or {})
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str) -> "ReplayStore":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.recordings, f, indent=2, sort_keys=True)
+
+    def get(self, messages: List[Dict[str, Any]]) -> Optional[str]:
+        content = self.recordings.get(request_key(messages))
+        if content is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return content
+
+    def put(self, messages: List[Dict[str, Any]], content: str) -> None:
+        self.recordings[request_key(messages)] = content
+
+def synthetic_response(messages: List[Dict[str, Any]], features_per_project: int = 5) -> str:
+    """Completion shaped like what the agents ask for, derived from the request"""
+    system = " ".join(m["content"] for m in messages if m["role"] == "system")
+    user = " ".join(m["content"] for m in messages if m["role"] == "user")
+    seed = hashlib.blake2b(user.encode("utf-8"), digest_size=4).hexdigest()
+
+    if "core_features" in system:
+        return json.dumps({
+            "core_features": [
+                {
+                    "name": f"Feature {seed}-{index}",
+                    "description": f"Synthetic feature {index} of project {seed}",
+                    "requirements": [f"Requirement {index}.{n}" for n in range(3)],
+                    "priority": ("high", "medium", "low")[index % 3],
+                    "dependencies": []
+                }
+                for index in range(features_per_project)
+            ],
+            "technical_requirements": [{"category": "backend", "requirements": ["API"]}],
+            "integration_points": ["REST API"],
+            "constraints": ["Offline load test"],
+            "success_metrics": ["Throughput"]
+        })
+    if "implementation_details" in system:
+        return json.dumps({
+            "name": f"Analyzed feature {seed}",
+            "description": "Synthetic feature analysis",
+            "requirements": ["Requirement A", "Requirement B"],
+            "priority": "medium",
+            "dependencies": [],
+            "implementation_details": "Synthetic implementation notes"
+        })
+    if "target_users" in system:
+        return json.dumps({
+            "title": f"Project {seed}",
+            "description": "Synthetic project summary",
+            "target_users": ["Testers"],
+            "goals": ["Measure throughput"],
+            "key_features": ["Load testing"]
+        })
+    return f"Synthetic reply {seed}. What else should the project do?"
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens
+    )
+
+def _rough_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    async def create(self, **kwargs) -> Any:
+        return await self._owner._create_chat(**kwargs)
+
+class _FakeEmbeddings:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    async def create(self, model: str, input: List[str], **kwargs) -> Any:
+        return await self._owner._create_embeddings(model, input)
+
+class FakeOpenAI:
+    """Offline replacement for ``AsyncOpenAI``"""
+    def __init__(
+        self,
+        store: Optional[ReplayStore] = None,
+        latency: Optional[LatencyModel] = None,
+        errors: Optional[ErrorInjector] = None,
+        features_per_project: int = 5,
+        embedding_dim: int = 1536,
+        stream_chunk_chars: int = 40
+    ):
+        self.store = store or ReplayStore()
+        self.latency = latency or LatencyModel()
+        self.errors = errors or ErrorInjector()
+        self.features_per_project = features_per_project
+        self.embedding_dim = embedding_dim
+        self.stream_chunk_chars = stream_chunk_chars
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+        self.embeddings = _FakeEmbeddings(self)
+        self._ids = itertools.count()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _content(self, messages: List[Dict[str, Any]]) -> str:
+        content = self.store.get(messages)
+        if content is None:
+            content = synthetic_response(messages, self.features_per_project)
+        return content
+
+    async def _create_chat(self, model: str, messages: List[Dict[str, Any]], stream: bool = False, **kwargs) -> Any:
+        self.calls += 1
+        content = self._content(messages)
+        prompt_tokens = sum(_rough_tokens(m.get("content") or "") for m in messages)
+        usage = _usage(prompt_tokens, _rough_tokens(content))
+        response_id = f"chatcmpl-fake-{next(self._ids)}"
+        if stream:
+            include_usage = (kwargs.get("stream_options") or {}).get("include_usage", False)
+            return self._stream(model, content, usage if include_usage else None, response_id)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency.sample())
+            self.errors.maybe_fail(_injected_api_error)
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(
+            id=response_id,
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                finish_reason="stop",
+                message=SimpleNamespace(role="assistant", content=content, function_call=None)
+            )],
+            usage=usage
+        )
+
+    async def _stream(self, model: str, content: str, usage: Optional[SimpleNamespace], response_id: str):
+        pieces = [
+            content[start:start + self.stream_chunk_chars]
+            for start in range(0, len(content), self.stream_chunk_chars)
+        ] or [""]
+        # The sampled latency is spread across the chunks
+        delay = self.latency.sample() / len(pieces)
+        self.errors.maybe_fail(_injected_api_error)
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield SimpleNamespace(
+                id=response_id,
+                model=model,
+                choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=piece))],
+                usage=None
+            )
+        if usage is not None:
+            yield SimpleNamespace(id=response_id, model=model, choices=[], usage=usage)
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=32).digest()
+        rng = random.Random(digest)
+        return [rng.uniform(-1, 1) for _ in range(self.embedding_dim)]
+
+    async def _create_embeddings(self, model: str, texts: List[str]) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        self.errors.maybe_fail(_injected_api_error)
+        return SimpleNamespace(
+            model=model,
+            data=[SimpleNamespace(index=i, embedding=self._vector(text)) for i, text in enumerate(texts)],
+            usage=_usage(sum(_rough_tokens(text) for text in texts), 0)
+        )
+
+    async def close(self) -> None:
+        pass
+
+class RecordingOpenAI:
+    """Wraps a real client and records every chat completion into a store"""
+    def __init__(self, client: Any, store: ReplayStore):
+        self._client = client
+        self.store = store
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat))
+        self.embeddings = client.embeddings
+
+    async def _create_chat(self, **kwargs) -> Any:
+        response = await self._client.chat.completions.create(**kwargs)
+        if not kwargs.get("stream"):
+            self.store.put(kwargs["messages"], response.choices[0].message.content)
+        return response
+
+    async def close(self) -> None:
+        await self._client.close()
+
+class FakeTavilyClient:
+    """Offline replacement for ``TavilyClient.search``"""
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        errors: Optional[ErrorInjector] = None,
+        results_per_query: int = 5
+    ):
+        self.latency = latency or LatencyModel()
+        self.errors = errors or ErrorInjector()
+        self.results_per_query = results_per_query
+        self.calls = 0
+
+    async def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        self.errors.maybe_fail(lambda: Exception("Injected Tavily failure"))
+        slug = hashlib.blake2b(query.encode("utf-8"), digest_size=4).hexdigest()
+        results = []
+        for index in range(self.results_per_query):
+            score = round(1.0 - index * 0.1, 2)
+            results.append({
+                "title": f"Result {index} for {query}",
+                "url": f"https://example.com/{slug}/{index}",
+                "snippet": f"Finding {index} about {query}",
+                "content": f"Finding {index} about {query}",
+                "relevance_score": score,
+                "score": score
+            })
+        return {"query": query, "results": results}
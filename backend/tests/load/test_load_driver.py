@@ -0,0 +1,68 @@
+import pytest
+import json
+from backend.tests.load.stand_ins import (
+    FakeOpenAI, FakeTavilyClient, LatencyModel, ErrorInjector, ReplayStore, RecordingOpenAI
+)
+from backend.tests.load.load_driver import run_load
+
+def test_latency_model_percentiles():
+    """Test sampled latencies follow the configured median and p95"""
+    model = LatencyModel(100, 400, seed=1)
+    samples = sorted(model.sample() * 1000 for _ in range(5000))
+    assert 85 < samples[2500] < 115
+    assert 320 < samples[4750] < 480
+    assert LatencyModel(100, kind="constant").sample() == 0.1
+    assert LatencyModel().sample() == 0.0
+
+@pytest.mark.asyncio
+async def test_recorded_completions_replayed(tmp_path):
+    """Test recordings made through a real client are replayed offline"""
+    messages = [{"role": "user", "content": "Hello"}]
+    store = ReplayStore()
+    recorder = RecordingOpenAI(FakeOpenAI(), store)
+    recorded = await recorder.chat.completions.create(model="gpt-3.5-turbo", messages=messages)
+    path = tmp_path / "recordings.json"
+    store.save(str(path))
+
+    replay = FakeOpenAI(store=ReplayStore.load(str(path)))
+    response = await replay.chat.completions.create(model="gpt-4-turbo-preview", messages=messages)
+    assert response.choices[0].message.content == recorded.choices[0].message.content
+    assert replay.store.hits == 1
+
+@pytest.mark.asyncio
+async def test_streamed_completion_ends_with_usage():
+    """Test streamed chunks rebuild the completion and the usage chunk comes last"""
+    client = FakeOpenAI(stream_chunk_chars=7)
+    messages = [{"role": "system", "content": "core_features"}, {"role": "user", "content": "Plan"}]
+    chunks = [chunk async for chunk in await client.chat.completions.create(
+        model="gpt-4-turbo-preview", messages=messages, stream=True, stream_options={"include_usage": True}
+    )]
+    text = "".join(chunk.choices[0].delta.content for chunk in chunks if chunk.choices)
+    assert len(json.loads(text)["core_features"]) == 5
+    assert chunks[-1].choices == [] and chunks[-1].usage.total_tokens > 0
+
+@pytest.mark.asyncio
+async def test_errors_injected():
+    """Test the configured share of calls fail"""
+    tavily = FakeTavilyClient(errors=ErrorInjector(1.0))
+    with pytest.raises(Exception):
+        await tavily.search("auth")
+    assert tavily.errors.injected == 1
+
+@pytest.mark.asyncio
+async def test_pipeline_load_run():
+    """Test every delegated feature is analysed and researched offline"""
+    report = await run_load(
+        projects=4,
+        features_per_project=3,
+        concurrency=2,
+        llm_latency=LatencyModel(2, 5, seed=0),
+        search_latency=LatencyModel(1, 3, seed=1),
+        timeout_s=30
+    )
+    assert not report["timed_out"]
+    assert report["features_delegated"] == 12
+    assert report["features_completed"] == 12
+    assert report["features_per_min"] > 0
+    assert report["llm_calls"] == 4 + 12
+    assert report["search_calls"] == 12